@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "requests",
+#     "beautifulsoup4",
+# ]
+# ///
+"""
+Benchmark the fast Bandcamp parser against the BeautifulSoup path.
+
+Parses saved album pages with both parse paths, checks that they produce the
+same data and reports the time per page for each. Without any pages it uses
+the album pages in scripts/fixtures/bandcamp/ (an album with a data-tralbum
+attribute, a compilation with an inline TralbumData script and a page
+without JSON-LD, each padded out with the fan and recommendation markup of a
+real page).
+
+Usage:
+    uv run scripts/bench_bandcamp_parse.py
+    uv run scripts/bench_bandcamp_parse.py page1.html page2.html ...
+    uv run scripts/bench_bandcamp_parse.py saved_pages/
+    uv run scripts/bench_bandcamp_parse.py --from-cache   # pages in .cache/responses.sqlite
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from praesens.cache import DEFAULT_CACHE_PATH
+from praesens.sources.bandcamp import build_bandcamp_data, parse_bandcamp_html, soup_page_pieces
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'bandcamp'
+
+
+def load_pages(paths, from_cache):
+    """(name, html) pairs from files, directories of .html files and/or the response cache."""
+    pages = []
+    for path in map(Path, paths):
+        files = sorted(path.glob('*.html')) if path.is_dir() else [path]
+        for file in files:
+            pages.append((file.name, file.read_text(encoding='utf-8')))
+    if from_cache and Path(DEFAULT_CACHE_PATH).exists():
+        db = sqlite3.connect(DEFAULT_CACHE_PATH)
+        rows = db.execute("SELECT key, body FROM responses WHERE namespace = 'bandcamp-html'")
+        pages.extend(rows.fetchall())
+        db.close()
+    return pages
+
+
+def time_parser(parse, pages, rounds):
+    """Best-of-rounds total seconds to parse every page."""
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for name, html in pages:
+            parse(html, name)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Bandcamp page parsing')
+    parser.add_argument('paths', nargs='*',
+                        help='Saved album pages or directories of .html files (default: scripts/fixtures/bandcamp)')
+    parser.add_argument('--from-cache', action='store_true', help='Also benchmark pages in the response cache')
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds, best is reported (default: 5)')
+
+    args = parser.parse_args()
+
+    paths = args.paths or ([] if args.from_cache else [FIXTURES])
+    pages = load_pages(paths, args.from_cache)
+    if not pages:
+        print("Error: no pages to benchmark", file=sys.stderr)
+        sys.exit(1)
+
+    def soup_parse(html, url):
+        return build_bandcamp_data(soup_page_pieces(html), url)
+
+    mismatches = [name for name, html in pages if parse_bandcamp_html(html, name) != soup_parse(html, name)]
+    for name in mismatches:
+        print(f"Warning: fast and soup paths disagree on {name}")
+
+    size = sum(len(html) for _, html in pages)
+    fast = time_parser(parse_bandcamp_html, pages, args.rounds)
+    soup = time_parser(soup_parse, pages, args.rounds)
+
+    print(f"{len(pages)} pages, {size / 1024:.0f}KB of HTML")
+    print(f"  fast scan:     {fast / len(pages) * 1000:8.2f}ms/page")
+    print(f"  BeautifulSoup: {soup / len(pages) * 1000:8.2f}ms/page")
+    print(f"  speedup:       {soup / fast:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
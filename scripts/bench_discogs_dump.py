@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "requests",
+#     "python3-discogs-client",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Benchmark reading releases from a Discogs data dump.
+
+Writes a synthetic gzipped releases dump shaped like the real one (artists,
+credits, labels, formats, companies, identifiers, videos, index tracks and
+headings), then times:
+
+    full scan     every release turned into API-shaped JSON
+    selective     only --pick releases spread over the dump, as an import does
+    entries       the picked releases parsed and rendered into index.md text
+
+and reports records per second and the peak resident set size of the
+process. Run it with a few --releases sizes: peak RSS should stay the same
+however large the dump gets.
+
+Usage:
+    uv run scripts/bench_discogs_dump.py
+    uv run scripts/bench_discogs_dump.py --releases 500000 --pick 5000
+    uv run scripts/bench_discogs_dump.py --dump discogs_20261001_releases.xml.gz --pick 0
+"""
+
+import argparse
+import gzip
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from praesens.sources.discogs import Source, parse_discogs_release, release_url
+from praesens.sources.discogs_dump import iter_dump_releases
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def artist_xml(tag, artist_id, name, role=''):
+    return (f"<{tag}><id>{artist_id}</id><name>{escape(name)}</name><anv/><join/>"
+            f"<role>{escape(role)}</role><tracks/></{tag}>")
+
+
+def release_xml(release_id):
+    """One synthetic <release>, about the size of a typical real one."""
+    n = release_id
+    sides = 'AB' if n % 4 else 'ABCD'
+    tracks = []
+    if n % 10 == 0:
+        tracks.append('<track><position/><title>Side One</title><duration/></track>')
+    for side in sides:
+        for i in range(1, 5):
+            credit = artist_xml('artist', 30000 + (n + i) % 500, f"Session Player {(n + i) % 500}", 'Bass')
+            tracks.append(
+                f"<track><position>{side}{i}</position><title>Song {n}-{side}{i}</title>"
+                f"<duration>{3 + i}:{(n * i) % 60:02d}</duration><extraartists>{credit}</extraartists></track>"
+            )
+    if n % 7 == 0:
+        subs = ''.join(
+            f"<track><position>{sides[-1]}5.{c}</position><title>Movement {c}</title><duration>2:10</duration></track>"
+            for c in 'abc'
+        )
+        tracks.append(f"<track><position/><title>Suite {n}</title><duration/><sub_tracks>{subs}</sub_tracks></track>")
+
+    credits = ''.join(
+        artist_xml('artist', 40000 + (n * 3 + k) % 2000, f"Engineer {(n * 3 + k) % 2000}", role)
+        for k, role in enumerate(['Producer', 'Engineer', 'Mastered By', 'Design', 'Photography By'])
+    )
+    notes = escape(f"Recorded at Studio {n % 40}. Released with an insert & printed inner sleeve. " * 3)
+    return (
+        f'<release id="{n}" status="Accepted">'
+        f'<images><image height="600" type="primary" uri="" uri150="" width="600"/></images>'
+        f"<artists>{artist_xml('artist', 1000 + n % 5000, f'Dump Artist {n % 5000}')}</artists>"
+        f"<title>Dump Album {n}</title>"
+        f'<labels><label catno={quoteattr(f"DMP-{n}")} id="{500 + n % 300}" name={quoteattr(f"Label {n % 300}")}/></labels>'
+        f"<extraartists>{credits}</extraartists>"
+        f'<formats><format name="Vinyl" qty="{len(sides) // 2}" text=""><descriptions>'
+        f"<description>LP</description><description>Album</description></descriptions></format></formats>"
+        f"<genres><genre>Jazz</genre><genre>Funk / Soul</genre></genres>"
+        f"<styles><style>Fusion</style><style>Soul-Jazz</style></styles>"
+        f"<country>US</country><released>{1960 + n % 60}-0{1 + n % 9}-00</released>"
+        f"<notes>{notes}</notes><data_quality>Needs Vote</data_quality>"
+        f'<master_id is_main_release="{str(n % 2 == 0).lower()}">{20000 + n // 2}</master_id>'
+        f"<tracklist>{''.join(tracks)}</tracklist>"
+        f'<identifiers><identifier type="Barcode" value="0{n:011d}"/>'
+        f'<identifier type="Matrix / Runout" description="Side A" value="DMP-{n}-A"/></identifiers>'
+        f'<videos><video duration="290" embed="true" src="https://www.youtube.com/watch?v=v{n:010d}">'
+        f"<title>Song {n}</title><description/></video></videos>"
+        f'<companies><company><id>{700 + n % 50}</id><name>Pressing Plant {n % 50}</name>'
+        f"<catno/><entity_type>17</entity_type><entity_type_name>Pressed By</entity_type_name></company></companies>"
+        f"</release>\n"
+    )
+
+
+def write_dump(path, releases):
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        f.write('<releases>\n')
+        for release_id in range(1, releases + 1):
+            f.write(release_xml(release_id))
+        f.write('</releases>\n')
+
+
+def report(name, count, elapsed, unit):
+    rate = count / elapsed if elapsed else 0
+    print(f"  {name:<12} {count:>9} {unit:<8} {elapsed:>7.2f}s {rate:>10.0f}/s   peak RSS {peak_rss_mb():.0f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reading releases from a Discogs data dump')
+    parser.add_argument('--releases', type=int, default=100000, help='Releases in the synthetic dump (default: 100000)')
+    parser.add_argument('--pick', type=int, default=1000, help='Releases to pick for an import (default: 1000)')
+    parser.add_argument('--dump', help='Benchmark an existing dump instead of a synthetic one')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dump:
+            path = Path(args.dump)
+        else:
+            path = Path(tmp) / 'discogs_releases.xml.gz'
+            started = time.perf_counter()
+            write_dump(path, args.releases)
+            print(f"Wrote {args.releases} releases to a {path.stat().st_size / 1024 / 1024:.0f}MB synthetic dump "
+                  f"in {time.perf_counter() - started:.1f}s")
+        print(f"Peak RSS before reading: {peak_rss_mb():.0f}MB\n")
+
+        stats = {}
+        started = time.perf_counter()
+        for _ in iter_dump_releases(path, stats=stats):
+            pass
+        report('full scan', stats['scanned'], time.perf_counter() - started, 'releases')
+        total = stats['scanned']
+
+        if args.pick:
+            # Spread over the dump, so the last one is near the end (a real dump is not sorted by ID)
+            step = max(1, total // args.pick)
+            ids = set(range(step, total + 1, step))
+            started = time.perf_counter()
+            releases = list(iter_dump_releases(path, ids, stats))
+            report('selective', stats['scanned'], time.perf_counter() - started, 'releases')
+            if len(releases) < len(ids):
+                print(f"  (only {len(releases)} of {len(ids)} picked IDs are in the dump)")
+
+            source = Source()
+            started = time.perf_counter()
+            for release in releases:
+                data = parse_discogs_release(release, release_url(release['id']))
+                source.render(data, '2026-01-01')
+            report('entries', len(releases), time.perf_counter() - started, 'entries')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
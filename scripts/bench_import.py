@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "requests",
+#     "beautifulsoup4",
+#     "python3-discogs-client",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Offline benchmark for the import path.
+
+Serves Discogs release JSON, Bandcamp album pages and cover images from a
+local stub HTTP server and runs them through extract_discogs_data(),
+extract_bandcamp_data() and write_entry() into a temporary content
+directory, exactly as an import would but without touching the network.
+
+The fixtures are generated deterministically: regular albums, large
+compilations and multi-disc box sets with headings and index tracks. With
+--from-cache, responses recorded in .cache/responses.sqlite by earlier real
+imports are replayed as well.
+
+For each case it reports throughput, end-to-end latency per entry, peak
+traced (Python) memory and the mean time per stage (see praesens.timing).
+Save a run with --save and compare a later one against it with --compare;
+the exit status is 1 when a case got slower or bigger than --tolerance.
+
+Usage:
+    uv run scripts/bench_import.py
+    uv run scripts/bench_import.py --save bench-before.json
+    uv run scripts/bench_import.py --compare bench-before.json
+    uv run scripts/bench_import.py --cases discogs-box-set --count 50 --from-cache
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from praesens.cache import DEFAULT_CACHE_PATH
+from praesens.entry import write_entry
+from praesens.http_session import default_client
+from praesens.index import CollectionIndex
+from praesens.manifest import Manifest
+from praesens.sources import Sources
+from praesens.sources.bandcamp import extract_bandcamp_data
+from praesens.sources.discogs import create_client, extract_discogs_data
+from praesens.timing import timings
+
+# name -> (source, tracklist shape)
+CASES = {
+    'discogs-lp': ('discogs', {'discs': 1, 'sides': 2, 'tracks': 5}),
+    'discogs-compilation': ('discogs', {'discs': 1, 'sides': 0, 'tracks': 120}),
+    'discogs-box-set': ('discogs', {'discs': 8, 'sides': 0, 'tracks': 24}),
+    'bandcamp-album': ('bandcamp', {'tracks': 10}),
+    'bandcamp-compilation': ('bandcamp', {'tracks': 150}),
+}
+# Replayed response cache namespace per recorded case
+RECORDED = {
+    'recorded-discogs': 'discogs-release',
+    'recorded-bandcamp': 'bandcamp-html',
+}
+STAGES = ('http_fetch', 'parse', 'cover_download', 'cover_hash', 'render', 'write', 'save')
+# Size of the page chrome around the album data on a real Bandcamp page
+PAGE_FILLER = 2000
+COVER_SIZE = 150 * 1024
+
+
+def cover_bytes(n):
+    """A JPEG-shaped cover: start and end markers around deterministic bytes."""
+    body = bytes((n + i) % 251 for i in range(COVER_SIZE))
+    return b'\xff\xd8\xff\xe0' + body + b'\xff\xd9'
+
+
+def discogs_release(release_id, discs, sides, tracks):
+    """Release JSON shaped like the Discogs API's."""
+    tracklist = []
+    if sides:
+        for side in 'ABCDEFGH'[:sides * discs]:
+            tracklist.extend(
+                {'type_': 'track', 'position': f"{side}{n}", 'title': f"Side {side} Track {n}",
+                 'duration': f"{3 + n % 4}:{n * 7 % 60:02d}"}
+                for n in range(1, tracks + 1)
+            )
+    else:
+        for disc in range(1, discs + 1):
+            if discs > 1:
+                tracklist.append({'type_': 'heading', 'position': '', 'title': f"Disc {disc}: Session {disc}",
+                                  'duration': ''})
+            for n in range(1, tracks + 1):
+                position = f"{disc}-{n}" if discs > 1 else str(n)
+                if n % 8 == 0:
+                    # Suites listed as index tracks with sub-tracks
+                    tracklist.append({'type_': 'index', 'position': '', 'title': f"Suite {n // 8}", 'duration': '',
+                                      'sub_tracks': [
+                                          {'type_': 'track', 'position': f"{position}{part}",
+                                           'title': f"Movement {part}", 'duration': '2:30'}
+                                          for part in 'abc'
+                                      ]})
+                else:
+                    tracklist.append({'type_': 'track', 'position': position, 'title': f"Track {n} (Take {disc})",
+                                      'duration': f"{2 + n % 5}:{n * 13 % 60:02d}"})
+    return {
+        'id': release_id,
+        'title': f"Benchmark Release {release_id}",
+        'year': 1960 + release_id % 60,
+        'artists': [{'name': f"Benchmark Artist {release_id % 89}"}],
+        'labels': [{'name': 'Benchmark Records', 'catno': f"BR-{release_id}"}],
+        'genres': ['Jazz', 'Funk / Soul'],
+        'styles': ['Hard Bop', 'Soul-Jazz'],
+        'tracklist': tracklist,
+        'notes': f"Liner notes for release {release_id}. " * 20,
+        'extraartists': [{'name': f"Player {n}", 'role': 'Saxophone' if n % 2 else 'Drums'} for n in range(30)],
+        'images': [{'type': 'primary', 'uri': f"https://i.discogs.com/{release_id}.jpg"}],
+        'videos': [{'uri': f"https://www.youtube.com/watch?v=bench{release_id}"}],
+    }
+
+
+def bandcamp_page(n, tracks):
+    """Album page with the JSON-LD, TralbumData and text blocks the parser reads."""
+    ld = {
+        '@type': 'MusicAlbum',
+        'name': f"Benchmark Album {n}",
+        'byArtist': {'name': f"Benchmark Band {n % 89}"},
+        'datePublished': '01 Apr 1999 00:00:00 GMT',
+        'description': f"Album notes for album {n}.",
+        'image': f"https://f4.bcbits.com/img/a{n}_10.jpg",
+        'keywords': ['Punk', 'Washington DC'],
+    }
+    tralbum = {'trackinfo': [
+        {'track_num': i, 'title': f"Track {i} & more", 'duration': 120.0 + i * 17 % 240}
+        for i in range(1, tracks + 1)
+    ]}
+    filler = ''.join(
+        f'<div class="x"><p>filler <a href="#">{i}</a> <span>text</span></p></div>' for i in range(PAGE_FILLER)
+    )
+    return (
+        '<!DOCTYPE html><html><head>'
+        f'<meta property="og:site_name" content="Benchmark Band {n % 89}">'
+        f'<script type="application/ld+json">{json.dumps(ld)}</script>'
+        f'<script type="text/javascript">var TralbumData = {json.dumps(tralbum)};</script>'
+        f'</head><body>{filler}<span class="label">Benchmark Records</span>'
+        '<div class="tralbumData tralbum-about">Recorded live <b>to tape</b></div>'
+        '<div class="tralbumData tralbum-credits">released April 1, 1999<br>Player One - vocals<br>'
+        'Player Two - bass</div>'
+        '<div class="tralbum-tags"><a class="tag" href="#">punk</a><a class="tag" href="#">dc</a></div>'
+        '</body></html>'
+    )
+
+
+def recorded_responses(path=DEFAULT_CACHE_PATH):
+    """(namespace, key, body) rows recorded by real imports, if there is a response cache."""
+    if not Path(path).exists():
+        return []
+    db = sqlite3.connect(path)
+    try:
+        return db.execute(
+            "SELECT namespace, key, body FROM responses WHERE namespace IN ('discogs-release', 'bandcamp-html')"
+        ).fetchall()
+    finally:
+        db.close()
+
+
+class StubServer:
+    """Local HTTP server answering from a dict of path -> (content type, body)."""
+
+    def __init__(self):
+        self.routes = {}
+        routes = self.routes
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the client's connection pool behaves as against the real hosts
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; don't let delayed ACKs stall them
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path not in routes:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                content_type, body = routes[path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', f'"{len(body)}"')
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add(self, path, body, content_type='application/json'):
+        self.routes[path] = (content_type, body.encode('utf-8') if isinstance(body, str) else body)
+        return self.url + path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_items(server, case, count, recorded):
+    """(source, fetch URL, cover URL) per entry of a case, with the fixtures added to the server."""
+    items = []
+    if case in RECORDED:
+        source = case.split('-', 1)[1]
+        rows = [(key, body) for namespace, key, body in recorded if namespace == RECORDED[case]]
+        for n, (key, body) in enumerate(rows[:count]):
+            cover_url = server.add(f"/covers/{case}-{n}.jpg", cover_bytes(n), 'image/jpeg')
+            if source == 'discogs':
+                server.add(f"/releases/{key}", body)
+                items.append((source, f"https://www.discogs.com/release/{key}", cover_url))
+            else:
+                items.append((source, server.add(f"/album/recorded-{n}", body, 'text/html'), cover_url))
+        return items
+
+    source, shape = CASES[case]
+    for n in range(count):
+        cover_url = server.add(f"/covers/{case}-{n}.jpg", cover_bytes(n), 'image/jpeg')
+        if source == 'discogs':
+            release_id = 100000 * (list(CASES).index(case) + 1) + n
+            server.add(f"/releases/{release_id}", json.dumps(discogs_release(release_id, **shape)))
+            items.append((source, f"https://www.discogs.com/release/{release_id}", cover_url))
+        else:
+            page = bandcamp_page(n, **shape)
+            items.append((source, server.add(f"/album/{case}-{n}", page, 'text/html'), cover_url))
+    return items
+
+
+def import_items(items, server, sources):
+    """Import every item into a fresh content directory; returns seconds per entry."""
+    client = create_client(http=default_client())
+    # discogs_client builds release URLs from the client's base URL
+    client._base_url = server.url
+    latencies = []
+    with tempfile.TemporaryDirectory() as site:
+        # A throwaway Hugo site, so the search index lands in its static/
+        (Path(site) / 'hugo.toml').touch()
+        content_dir = Path(site) / 'content' / 'collection'
+        content_dir.mkdir(parents=True)
+        manifest = Manifest(content_dir)
+        index = CollectionIndex(content_dir)
+        for source_name, url, cover_url in items:
+            started = time.perf_counter()
+            if source_name == 'discogs':
+                data = extract_discogs_data(url, client=client)
+            else:
+                data = extract_bandcamp_data(url)
+            data['cover_url'] = cover_url
+            write_entry(sources.get(source_name), data, content_dir, manifest, index)
+            latencies.append(time.perf_counter() - started)
+        with timings.span('save'):
+            manifest.save()
+            index.save()
+    return latencies
+
+
+def run_case(items, server, sources, rounds):
+    """Best-of-rounds throughput and stage times, plus peak memory from one traced round."""
+    best = None
+    for _ in range(rounds):
+        timings.stages.clear()
+        latencies = import_items(items, server, sources)
+        if best is None or sum(latencies) < sum(best[0]):
+            best = (latencies, {stage: dict(totals) for stage, totals in timings.stages.items()})
+    latencies, stages = best
+
+    tracemalloc.start()
+    import_items(items, server, sources)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = sorted(latencies)
+    return {
+        'entries': len(latencies),
+        'entries_per_sec': len(latencies) / sum(latencies),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'peak_mb': peak / 1024 / 1024,
+        'stages_ms': {
+            stage: totals['total'] / len(latencies) * 1000 for stage, totals in stages.items()
+        },
+    }
+
+
+def print_results(results):
+    print(f"\n{'case':<24} {'entries/s':>9} {'p50':>9} {'p95':>9} {'peak':>8}")
+    for case, result in results.items():
+        print(f"{case:<24} {result['entries_per_sec']:>9.1f} {result['p50_ms']:>7.1f}ms "
+              f"{result['p95_ms']:>7.1f}ms {result['peak_mb']:>6.1f}MB")
+
+    print("\nMean time per entry by stage (ms):")
+    print(f"{'case':<24} " + ' '.join(f"{stage:>14}" for stage in STAGES))
+    for case, result in results.items():
+        print(f"{case:<24} " + ' '.join(f"{result['stages_ms'].get(stage, 0):>14.2f}" for stage in STAGES))
+
+
+def compare_results(results, baseline, tolerance):
+    """Print changes against a saved run; returns the number of regressions."""
+    regressions = 0
+    print(f"\nCompared with baseline (tolerance {tolerance:.0%}):")
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None:
+            print(f"  {case}: not in baseline")
+            continue
+        speed = result['entries_per_sec'] / before['entries_per_sec'] - 1
+        memory = result['peak_mb'] / before['peak_mb'] - 1 if before['peak_mb'] else 0
+        slower = speed < -tolerance
+        bigger = memory > tolerance
+        marker = '✗' if slower or bigger else '✓'
+        print(f"  {marker} {case}: throughput {speed:+.1%}, peak memory {memory:+.1%}")
+        if slower or bigger:
+            regressions += 1
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the import path offline against a stub server')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES),
+                        help='Cases to run (default: all)')
+    parser.add_argument('--count', type=int, default=20, help='Entries per case (default: 20)')
+    parser.add_argument('--rounds', type=int, default=3, help='Timing rounds per case, best is reported (default: 3)')
+    parser.add_argument('--from-cache', action='store_true',
+                        help='Also replay responses recorded in .cache/responses.sqlite')
+    parser.add_argument('--save', metavar='FILE', help='Write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Compare with results saved by an earlier --save')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed slowdown or memory growth before a case counts as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    cases = list(args.cases)
+    recorded = recorded_responses() if args.from_cache else []
+    if args.from_cache:
+        namespaces = {namespace for namespace, _, _ in recorded}
+        cases += [case for case, namespace in RECORDED.items() if namespace in namespaces]
+        if not recorded:
+            print(f"ℹ No recorded responses in {DEFAULT_CACHE_PATH}")
+
+    server = StubServer()
+    sources = Sources()
+    results = {}
+    try:
+        for case in cases:
+            items = build_items(server, case, args.count, recorded)
+            print(f"Running {case} ({len(items)} entries)...")
+            # The importers report every step; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[case] = run_case(items, server, sources, args.rounds)
+    finally:
+        server.close()
+
+    print_results(results)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_results(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "python3-discogs-client",
+#     "requests",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Run the import job queue and worker against a fake source adapter.
+
+Queues --jobs URLs of a fake source whose fetch() behaves by URL:
+
+    /ok/N        imports
+    /flaky/N     fails the first time, imports on the retry
+    /broken/N    always fails (ends up 'failed' after --max-attempts)
+    /limited/N   answers 429 once the way discogs_client does (parked, not an attempt)
+    /throttled/N answers 429 once with an HTTP-date Retry-After, the way requests does
+    /master/N    a URL the adapter can't import (fails at once, must not stop the worker)
+
+The fake source has a token bucket of --rate fetches per second, so jobs
+are parked while it is out of tokens. A few jobs are left 'running' before
+the worker starts, as if a worker had been killed, and must be picked up
+again. The queue, entries and manifest live in a temporary directory.
+
+It reports jobs per second and checks every job's final status, the
+entries written and the worker's counts; exits 1 if any of them are wrong.
+
+Usage:
+    uv run scripts/bench_job_queue.py
+    uv run scripts/bench_job_queue.py --jobs 2000 --workers 8 --rate 500
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+
+import requests
+from discogs_client.exceptions import HTTPError
+
+from praesens import jobs
+from praesens.entry import entry_document
+from praesens.jobs import JobQueue, run_worker
+from praesens.manifest import Manifest
+from praesens.sources import SourceAdapter
+
+KINDS = {
+    'ok': 'done',
+    'flaky': 'done',
+    'broken': 'failed',
+    'limited': 'done',
+    'throttled': 'done',
+    'master': 'failed',
+}
+# One job in this many is not an /ok/ job
+MIX = 10
+URL = re.compile(r'^https://fake\.example/(\w+)/(\d+)$')
+
+
+class FakeBucket:
+    """Token bucket of `rate` tokens per second (one at a time)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_at:
+                return self.next_at - now
+            self.next_at = now + self.interval
+            return 0.0
+
+
+def throttled_error():
+    """A requests HTTPError for a 429 whose Retry-After is an HTTP date a second from now."""
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = formatdate(time.time() + 1, usegmt=True)
+    return requests.HTTPError('429 Too Many Requests', response=response)
+
+
+class FakeSource(SourceAdapter):
+    name = 'fake'
+
+    def __init__(self, rate, latency):
+        super().__init__()
+        self.bucket = FakeBucket(rate)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def source_key(self, url):
+        match = URL.match(url)
+        if not match or match.group(1) == 'master':
+            raise ValueError(f"Could not extract release ID from URL: {url}")
+        return url
+
+    def url_for(self, data):
+        return data['fake_url']
+
+    def fetch(self, url, cache=None, refresh=False, options=None):
+        kind, n = URL.match(url).groups()
+        with self.lock:
+            self.calls[url] = calls = self.calls.get(url, 0) + 1
+        time.sleep(self.latency)
+        if kind == 'broken' or (kind == 'flaky' and calls == 1):
+            raise RuntimeError(f"fake failure #{calls}")
+        if kind == 'limited' and calls == 1:
+            # What discogs_client raises once the HTTP layer gives up: a status_code and no response
+            raise HTTPError('You are making requests too quickly.', 429)
+        if kind == 'throttled' and calls == 1:
+            raise throttled_error()
+        return {
+            'artist': f"Fake Artist {n}", 'title': f"Album {n}", 'release_year': 1970 + int(n) % 50,
+            'description': '', 'cover_url': '', 'genres': ['Jazz'], 'label': '', 'credits_text': '',
+            'tracklist': [{'position': str(i), 'title': f"Track {i}", 'duration': None} for i in range(1, 5)],
+            'fake_url': url,
+        }
+
+    def document(self, data, date, options=None):
+        return entry_document(data, date, {})
+
+
+class FakeSources:
+    def __init__(self, source):
+        self.source = source
+
+    def for_url(self, url):
+        return self.source
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the job queue and worker against a fake source adapter')
+    parser.add_argument('--jobs', type=int, default=500, help='Jobs to queue (default: 500)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads (default: 4)')
+    parser.add_argument('--rate', type=float, default=400, help='Fake source fetches per second (default: 400)')
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds each fetch takes (default: 0.005)')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Attempts before a job fails (default: 3)')
+    args = parser.parse_args()
+
+    # Retry after a fraction of a second rather than half a minute
+    jobs.RETRY_BASE = 0.05
+
+    expected = {}
+    kinds = list(KINDS)
+    for i in range(args.jobs):
+        kind = kinds[1 + (i // MIX) % (len(kinds) - 1)] if i % MIX == 0 else 'ok'
+        expected[f"https://fake.example/{kind}/{i}"] = KINDS[kind]
+
+    with tempfile.TemporaryDirectory() as tmp, open(Path(tmp) / 'worker.log', 'w') as log:
+        content_dir = Path(tmp) / 'collection'
+        queue = JobQueue(Path(tmp) / 'jobs.sqlite', max_attempts=args.max_attempts)
+        # source_name() only knows real hosts; the fake source is given directly
+        with queue.lock:
+            now = time.time()
+            queue.db.executemany(
+                "INSERT INTO jobs (url, source, created_at, updated_at) VALUES (?, 'fake', ?, ?)",
+                [(url, now, now) for url in expected],
+            )
+            queue.db.commit()
+        # As if a worker had been killed with these running
+        interrupted = [queue.claim()['id'] for _ in range(min(3, args.jobs))]
+
+        source = FakeSource(args.rate, args.latency)
+        manifest = Manifest(content_dir)
+        started = time.perf_counter()
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = log
+        try:
+            stats = run_worker(queue, FakeSources(source), content_dir, None, manifest, None, workers=args.workers,
+                               checkpoint_every=50)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        elapsed = time.perf_counter() - started
+
+        statuses = dict(queue.db.execute('SELECT url, status FROM jobs').fetchall())
+        attempts = dict(queue.db.execute('SELECT url, attempts FROM jobs').fetchall())
+        written = len(list(content_dir.glob('*/index.md')))
+        manifest = Manifest(content_dir)
+
+    wrong = {url: statuses[url] for url, status in expected.items() if statuses[url] != status}
+    problems = [f"{url} is {status}, expected {expected[url]}" for url, status in sorted(wrong.items())[:10]]
+    done = sum(1 for status in expected.values() if status == 'done')
+    if written != done or len(manifest.entries) != done:
+        problems.append(f"{written} entries and {len(manifest.entries)} manifest records written, expected {done}")
+    if stats['recovered'] != len(interrupted):
+        problems.append(f"{stats['recovered']} interrupted jobs recovered, expected {len(interrupted)}")
+    broken = [url for url in expected if '/broken/' in url]
+    if any(attempts[url] != args.max_attempts for url in broken):
+        problems.append(f"broken jobs should fail after exactly {args.max_attempts} attempts")
+    if any(attempts[url] for url in expected if '/limited/' in url or '/throttled/' in url):
+        problems.append('429s should park jobs without counting an attempt')
+    if any(source.calls.get(url) for url in expected if '/master/' in url):
+        problems.append('unimportable URLs should never be fetched')
+
+    print(f"{args.jobs} jobs, {args.workers} workers, fake source at {args.rate:.0f} fetches/s\n")
+    print(f"  {stats['done']} done, {stats['retried']} retried, {stats['failed']} failed, "
+          f"{stats['parked']} parked, {stats['recovered']} recovered")
+    print(f"  {elapsed:.2f}s ({args.jobs / elapsed:.0f} jobs/s)")
+
+    if problems:
+        for problem in problems:
+            print(f"Error: {problem}", file=sys.stderr)
+        return 1
+    print(f"\n✓ All {len(expected)} jobs ended as expected")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "aiohttp>=3.9",
+#     "requests",
+# ]
+# ///
+"""
+Benchmark the link checker against local stub servers.
+
+Starts --hosts stub HTTP servers on localhost (each port counts as its own
+host) that answer after --latency seconds, then checks --links URLs spread
+over them, mixing:
+
+    /ok/N         200
+    /gone/N       404 (dead)
+    /nohead/N     405 to HEAD, 200 to GET (must not be reported)
+    /redirect/N   301 to /ok/N
+    /limited/N    429 with Retry-After: 1 the first time, then 200
+    /broken/N     500 (error, not dead)
+
+It reports links per second, checks every verdict, the most requests any
+host had in flight and the busiest host's request rate, then runs again to
+show that fresh results come from the cache.
+
+Usage:
+    uv run scripts/bench_link_check.py
+    uv run scripts/bench_link_check.py --links 5000 --hosts 20 --latency 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+from praesens.linkcheck import LinkCache, check_links
+
+KINDS = {
+    'ok': 'ok',
+    'gone': 'dead',
+    'nohead': 'ok',
+    'redirect': 'ok',
+    'limited': 'ok',
+    'broken': 'error',
+}
+# One link in this many is not an /ok/ link
+MIX = 10
+
+
+class StubHost:
+    """One stub server; records concurrency and request start times."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.starts = []
+        self.limited = set()
+
+    async def handle(self, request):
+        self.starts.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            kind, n = request.match_info['kind'], request.match_info['n']
+            if kind == 'gone':
+                return web.Response(status=404)
+            if kind == 'nohead' and request.method == 'HEAD':
+                return web.Response(status=405)
+            if kind == 'redirect':
+                raise web.HTTPMovedPermanently(f"/ok/{n}")
+            if kind == 'limited' and n not in self.limited:
+                self.limited.add(n)
+                return web.Response(status=429, headers={'Retry-After': '1'})
+            if kind == 'broken':
+                return web.Response(status=500)
+            return web.Response(text='ok')
+        finally:
+            self.in_flight -= 1
+
+    def rate(self):
+        """Requests per second this host received, first to last."""
+        if len(self.starts) < 2:
+            return 0
+        return (len(self.starts) - 1) / (max(self.starts) - min(self.starts))
+
+
+def start_servers(hosts, latency):
+    """Run the stub servers on a background event loop; returns [(port, StubHost)]."""
+    loop = asyncio.new_event_loop()
+    servers = []
+
+    async def start():
+        for _ in range(hosts):
+            stub = StubHost(latency)
+            app = web.Application()
+            app.router.add_route('*', '/{kind}/{n}', stub.handle)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            servers.append((site._server.sockets[0].getsockname()[1], stub))
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the link checker against local stub servers')
+    parser.add_argument('--links', type=int, default=2000, help='Links to check (default: 2000)')
+    parser.add_argument('--hosts', type=int, default=10, help='Stub hosts (default: 10)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds each response takes (default: 0.2)')
+    parser.add_argument('--per-host', type=int, default=4, help='Requests in flight per host (default: 4)')
+    parser.add_argument(
+        '--delay', type=float, default=0.01, help='Seconds between requests to one host (default: 0.01)'
+    )
+    args = parser.parse_args()
+
+    servers = start_servers(args.hosts, args.latency)
+    expected = {}
+    kinds = list(KINDS)
+    for i in range(args.links):
+        port, _ = servers[i % len(servers)]
+        # Every MIX-th round over the hosts, each host gets another kind of link
+        n = i // len(servers)
+        kind = kinds[1 + (n // MIX + i) % (len(kinds) - 1)] if n % MIX == 0 else 'ok'
+        expected[f"http://127.0.0.1:{port}/{kind}/{i}"] = KINDS[kind]
+    print(f"{args.links} links on {args.hosts} stub hosts answering in {args.latency * 1000:.0f}ms "
+          f"({args.per_host} per host, {args.delay * 1000:.0f}ms apart)\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LinkCache(Path(tmp) / 'links.json')
+        started = time.perf_counter()
+        check_links(list(expected), cache, per_host=args.per_host, delay=args.delay)
+        elapsed = time.perf_counter() - started
+        cache.save()
+        print(f"  first run    {len(expected):>6} links {elapsed:>7.2f}s {len(expected) / elapsed:>8.0f}/s")
+
+        wrong = {url: cache.get(url)['verdict'] for url, verdict in expected.items()
+                 if cache.get(url)['verdict'] != verdict}
+        busiest = max(stub.max_in_flight for _, stub in servers)
+        print(f"  most in flight on one host: {busiest} (limit {args.per_host})")
+        if args.delay:
+            print(f"  busiest host: {max(stub.rate() for _, stub in servers):.0f} requests/s "
+                  f"(limit {1 / args.delay:.0f})")
+
+        cache = LinkCache(Path(tmp) / 'links.json')
+        started = time.perf_counter()
+        due = cache.due(expected)
+        if due:
+            check_links(due, cache, per_host=args.per_host, delay=args.delay)
+        print(f"  second run   {len(due):>6} links {time.perf_counter() - started:>7.2f}s "
+              f"(the rest fresh in the cache)")
+
+    if wrong:
+        for url, verdict in sorted(wrong.items())[:10]:
+            print(f"Error: {url} is {verdict}, expected {expected[url]}", file=sys.stderr)
+        return 1
+    print(f"\n✓ All {len(expected)} verdicts as expected")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# ///
+"""
+Check and benchmark the tracklist layout engine.
+
+Lays out every tracklist in scripts/fixtures/tracklists.json and compares the
+sides with the expected ones, then times synthetic compilations of growing
+size to show that layout time grows linearly with the number of tracks.
+
+Usage:
+    uv run scripts/bench_tracklist_layout.py
+    uv run scripts/bench_tracklist_layout.py --sizes 100 1000 10000 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from praesens.tracklist import layout_sides
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'tracklists.json'
+
+
+def fixture_tracks(rows):
+    """Track dicts from [position, duration] rows; "heading" rows become headings."""
+    tracks = []
+    for position, value in rows:
+        if position == 'heading':
+            tracks.append({'heading': True, 'title': value})
+        else:
+            tracks.append({'position': position, 'title': f"Track {position}", 'duration': value or None})
+    return tracks
+
+
+def check_fixtures(path):
+    """Number of fixtures whose layout differs from the expected sides."""
+    with open(path, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    failures = 0
+    for fixture in fixtures:
+        sides = [[side['side'], len(side['tracks'])] for side in layout_sides(fixture_tracks(fixture['tracks']))]
+        if sides != fixture['sides']:
+            failures += 1
+            print(f"✗ {fixture['name']}: expected {fixture['sides']}, got {sides}")
+    print(f"✓ {len(fixtures) - failures}/{len(fixtures)} fixtures laid out as expected")
+    return failures
+
+
+def compilation(size, lettered):
+    """A synthetic compilation: lettered vinyl positions or a plain running order with durations."""
+    if lettered:
+        return [
+            {'position': f"{chr(ord('A') + i // 6 % 26)}{i % 6 + 1}", 'title': f"Track {i}", 'duration': '4:12'}
+            for i in range(size)
+        ]
+    return [{'position': str(i + 1), 'title': f"Track {i}", 'duration': 180.0 + i % 120} for i in range(size)]
+
+
+def time_layout(tracks, rounds):
+    """Best-of-rounds seconds for one layout."""
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        layout_sides(tracks)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and benchmark tracklist layout')
+    parser.add_argument('--fixtures', default=str(FIXTURES), help=f'Fixture corpus (default: {FIXTURES})')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Compilation sizes to time (default: 100 1000 10000)')
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds per size, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    failures = check_fixtures(args.fixtures)
+
+    print(f"\n{'tracks':>8}  {'lettered':>12}  {'running order':>14}  {'µs/track':>9}")
+    for size in args.sizes:
+        lettered = time_layout(compilation(size, True), args.rounds)
+        plain = time_layout(compilation(size, False), args.rounds)
+        per_track = max(lettered, plain) / size * 1e6
+        print(f"{size:>8}  {lettered * 1000:>10.2f}ms  {plain * 1000:>12.2f}ms  {per_track:>9.2f}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
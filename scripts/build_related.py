@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "numpy>=1.24",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Precompute "related albums" for the album pages.
+
+Scores every published collection entry against the others on shared
+genres and styles, labels, credited personnel and release year, and writes
+the best few of each to data/related.json, which the album page template
+renders as a row of album cards. See praesens/related.py for how the scores
+are computed.
+
+The neighbour lists are cached in .cache/related.json; re-running after a
+few entries were added or edited only rescores those entries.
+
+Usage:
+    uv run scripts/build_related.py
+    uv run scripts/build_related.py --full        # rescore the whole collection
+    uv run scripts/build_related.py --top 8       # publish 8 related albums per entry
+"""
+
+import argparse
+import sys
+import time
+
+from praesens.mirror import CollectionMirror
+from praesens.related import KEEP, TOP_K, related_path_for, update_related, write_related
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute related albums for the collection pages')
+    parser.add_argument(
+        '--content-dir',
+        default='content/collection',
+        help='Path to Hugo content/collection directory (default: content/collection)'
+    )
+    parser.add_argument('--full', action='store_true', help='Rescore every entry instead of only changed ones')
+    parser.add_argument('--top', type=int, default=TOP_K, help=f'Related albums per entry (default: {TOP_K})')
+    parser.add_argument('--output', help='Where to write the related albums (default: data/related.json)')
+
+    args = parser.parse_args()
+    if not 0 < args.top <= KEEP:
+        print(f"Error: --top must be between 1 and {KEEP}", file=sys.stderr)
+        return 1
+    try:
+        output = args.output or related_path_for(args.content_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    mirror = CollectionMirror(args.content_dir)
+    mirror.refresh()
+    state, counts = update_related(mirror, full=args.full)
+    mirror.close()
+
+    changed = write_related(state, output, args.top)
+    elapsed = time.perf_counter() - started
+    with_related = sum(1 for pairs in state['neighbours'].values() if pairs)
+
+    if counts['mode'] == 'unchanged':
+        print(f"ℹ No entries changed since the last run ({counts['albums']} entries)")
+    else:
+        print(f"✓ Scored {counts['computed']} of {counts['albums']} entries ({counts['mode']}) in {elapsed:.2f}s")
+    print(f"{'✓ Wrote' if changed else 'ℹ Unchanged:'} {output} "
+          f"({with_related} of {counts['albums']} entries have related albums)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "numpy>=1.24",
+#     "pillow>=11.3",
+#     "requests",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Find duplicate and suspicious collection covers.
+
+Hashes every entry's original cover.* (SHA-256 and a perceptual hash, cached
+in .cache/covers.json so a re-run only reads new or changed covers) and
+reports:
+
+    - byte-identical covers, by whether the entries are the same album
+      (a reissue or an accidental re-import) or different ones
+    - near-identical covers: the same artwork re-encoded or resized
+    - covers that look wrong: nearly blank, small, far from square, or a
+      secondary Discogs image (back cover, label) when the release has a
+      primary one
+    - deduplicated entries whose shared cover is gone or has changed
+
+With --dedupe, only the first entry of each group of byte-identical covers
+of the same album keeps its files; the others name it in [album.cover] from
+and the templates show its cover. Identical covers on different albums are
+only deduplicated with --include-different-albums as well, after checking
+none of them is a wrong cover. See praesens/covers.py for the details.
+
+Usage:
+    uv run scripts/check_covers.py
+    uv run scripts/check_covers.py --distance 4     # stricter near-duplicate matching
+    uv run scripts/check_covers.py --dedupe         # keep one copy of identical covers of the same album
+    uv run scripts/check_covers.py --dedupe --include-different-albums
+"""
+
+import argparse
+import sys
+import time
+
+from praesens import covers
+from praesens.cache import ResponseCache
+from praesens.covers import CoverIndex, dedupe, shared_problems
+from praesens.index import site_root
+from praesens.manifest import Manifest
+from praesens.mirror import CollectionMirror
+
+
+def size_text(size):
+    return f"{size / 1024 / 1024:.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find duplicate and suspicious collection covers')
+    parser.add_argument(
+        '--content-dir',
+        default='content/collection',
+        help='Path to Hugo content/collection directory (default: content/collection)'
+    )
+    parser.add_argument('--distance', type=int, default=covers.NEAR_DISTANCE,
+                        help=f'Differing hash bits (of 64) for near duplicates (default: {covers.NEAR_DISTANCE})')
+    parser.add_argument('--workers', type=int, help='Worker processes for hashing (default: CPU count)')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Keep one copy of byte-identical covers of the same album, pointing the other entries at it')
+    parser.add_argument('--include-different-albums', action='store_true',
+                        help='With --dedupe, also deduplicate identical covers shared by different albums')
+    parser.add_argument('--index', help=f'Hash index (default: {covers.DEFAULT_INDEX_PATH} under the site root)')
+
+    args = parser.parse_args()
+    if args.include_different_albums and not args.dedupe:
+        parser.error('--include-different-albums only works with --dedupe')
+    try:
+        site_root(args.content_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    index = CoverIndex(args.content_dir, args.index)
+    counts = index.refresh(args.workers)
+    index.save()
+    print(f"✓ {len(index.files)} covers in {time.perf_counter() - started:.2f}s "
+          f"({counts['hashed']} hashed, {counts['known']} already known, {counts['unchanged']} unchanged)")
+
+    mirror = CollectionMirror(args.content_dir)
+    mirror.refresh()
+    albums = {slug: (artist, title) for slug, artist, title in mirror.execute('SELECT slug, artist, title FROM albums')}
+    mirror.close()
+    manifest = Manifest(args.content_dir)
+
+    exact, near = index.duplicates(albums, args.distance)
+    same = [slugs for slugs, same_album in exact if same_album]
+    different = [slugs for slugs, same_album in exact if not same_album]
+    if same:
+        print("\nIdentical covers, same album (reissues or re-imports):")
+        for slugs in same:
+            print(f"  - {', '.join(slugs)}")
+    if different:
+        print("\nIdentical covers on different albums (check these are right):")
+        for slugs in different:
+            print(f"  - {', '.join(slugs)}")
+    if near:
+        print("\nNear-identical covers (re-encoded or resized):")
+        for distance, a, b, same_album in near:
+            print(f"  - {a}, {b} ({distance} bits apart{', same album' if same_album else ''})")
+
+    cache = ResponseCache()
+    flagged = index.suspicious(manifest, cache)
+    cache.close()
+    if flagged:
+        print("\nSuspicious covers:")
+        for slug, reasons in flagged.items():
+            print(f"  - {slug}: {'; '.join(reasons)}")
+
+    problems = shared_problems(args.content_dir, index)
+    if problems:
+        print("\nShared covers:")
+        for slug, problem in problems.items():
+            print(f"  - {slug}: {problem}")
+
+    if args.dedupe:
+        changed, freed = dedupe(index, exact, manifest, args.include_different_albums)
+        if manifest.entries:
+            manifest.save()
+        index.save()
+        if changed:
+            print(f"\n✓ Deduplicated {changed} covers, freed {size_text(freed)}")
+        else:
+            print("\nℹ No identical covers to deduplicate")
+        if different and not args.include_different_albums:
+            print(f"ℹ Left {len(different)} groups on different albums alone; "
+                  f"--include-different-albums deduplicates them too")
+    elif exact:
+        duplicated = sum(len(slugs) - 1 for slugs in same)
+        if duplicated:
+            print(f"\nℹ {duplicated} covers are copies of another entry's; --dedupe keeps one of each")
+    if not (exact or near or flagged or problems):
+        print("\n✓ No duplicate or suspicious covers")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
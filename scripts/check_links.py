@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "aiohttp>=3.9",
+#     "requests",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Check the streaming and cover links of every collection entry.
+
+Requests every album link (Spotify, Bandcamp, Apple Music, YouTube, ...) and
+recorded cover URL concurrently, a few at a time per host, and lists the
+dead ones by entry. Results are cached in the site's .cache/links.json, so
+a re-run only rechecks links that are due (OK links every couple of weeks,
+failing ones daily). See praesens/linkcheck.py for how links are checked.
+
+Exits with status 1 when dead links were found.
+
+Usage:
+    uv run scripts/check_links.py
+    uv run scripts/check_links.py --all                 # recheck every link now
+    uv run scripts/check_links.py --json links.json     # also write the report as JSON
+    uv run scripts/check_links.py --per-host 2 --delay 0.5
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from praesens import linkcheck
+from praesens.linkcheck import LinkCache, check_links, collection_links
+from praesens.index import site_root
+from praesens.manifest import Manifest
+from praesens.mirror import CollectionMirror
+
+
+def describe(result):
+    if result.get('status') is not None:
+        return f"HTTP {result['status']}"
+    return result.get('error') or 'failed'
+
+
+def print_report(links, cache, verdict, heading):
+    """Problem links with this verdict, grouped by entry; returns how many there were."""
+    by_slug = {}
+    for url, used_by in links.items():
+        result = cache.get(url)
+        if result and result['verdict'] == verdict:
+            for slug, service in used_by:
+                by_slug.setdefault(slug, []).append((service, url, result))
+    if not by_slug:
+        return 0
+    print(f"\n{heading}:")
+    for slug in sorted(by_slug):
+        print(f"{slug}:")
+        for service, url, result in sorted(by_slug[slug]):
+            since = time.strftime('%Y-%m-%d', time.localtime(result['failing_since']))
+            print(f"  - {service}: {url} ({describe(result)}, failing since {since})")
+    return sum(1 for url in links if (cache.get(url) or {}).get('verdict') == verdict)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the streaming and cover links of collection entries')
+    parser.add_argument(
+        '--content-dir',
+        default='content/collection',
+        help='Path to Hugo content/collection directory (default: content/collection)'
+    )
+    parser.add_argument('--all', action='store_true', help='Recheck every link, not only those due')
+    parser.add_argument('--per-host', type=int, default=linkcheck.PER_HOST,
+                        help=f'Requests in flight per host (default: {linkcheck.PER_HOST})')
+    parser.add_argument('--delay', type=float, default=linkcheck.HOST_DELAY,
+                        help=f'Seconds between requests to one host (default: {linkcheck.HOST_DELAY})')
+    parser.add_argument('--connections', type=int, default=linkcheck.CONNECTIONS,
+                        help=f'Requests in flight overall (default: {linkcheck.CONNECTIONS})')
+    parser.add_argument('--timeout', type=float, default=linkcheck.TIMEOUT,
+                        help=f'Seconds before a request counts as failed (default: {linkcheck.TIMEOUT})')
+    parser.add_argument('--cache', help=f'Result cache (default: {linkcheck.DEFAULT_CACHE_PATH} under the site root)')
+    parser.add_argument('--json', metavar='FILE', help='Also write every failing link to FILE as JSON')
+
+    args = parser.parse_args()
+    try:
+        cache_path = args.cache or site_root(args.content_dir) / linkcheck.DEFAULT_CACHE_PATH
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    mirror = CollectionMirror(args.content_dir)
+    mirror.refresh()
+    links = collection_links(mirror, Manifest(args.content_dir))
+    mirror.close()
+
+    cache = LinkCache(cache_path)
+    cache.prune(links)
+    due = list(links) if args.all else cache.due(links)
+    print(f"Checking {len(due)} of {len(links)} links ({len(links) - len(due)} checked recently)...")
+
+    started = time.perf_counter()
+    checked = answered = 0
+
+    def progress(url, result):
+        nonlocal checked, answered
+        checked += 1
+        answered += result.get('status') is not None
+        if checked % 100 == 0:
+            print(f"  {checked}/{len(due)} links ({checked / (time.perf_counter() - started):.0f}/s)")
+
+    try:
+        if due:
+            check_links(due, cache, args.per_host, args.delay, args.timeout, args.connections, progress)
+    except KeyboardInterrupt:
+        print("\nℹ Interrupted, keeping the results so far")
+    finally:
+        cache.save()
+    elapsed = time.perf_counter() - started
+    if due:
+        print(f"✓ Checked {checked} links in {elapsed:.1f}s ({checked / max(elapsed, 1e-9):.0f}/s)")
+    if checked and not answered:
+        print("Warning: no host could be reached - offline?", file=sys.stderr)
+
+    dead = print_report(links, cache, 'dead', 'Dead links')
+    failing = print_report(links, cache, 'error', 'Could not check (often temporary or bot blocking)')
+
+    if args.json:
+        report = [
+            dict(cache.get(url), url=url, entries=[{'slug': slug, 'service': service} for slug, service in used_by])
+            for url, used_by in sorted(links.items())
+            if (cache.get(url) or {}).get('verdict', 'ok') != 'ok'
+        ]
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Wrote {len(report)} failing links to {args.json}")
+
+    if dead:
+        print(f"\nError: {dead} dead links, {failing} could not be checked", file=sys.stderr)
+        return 1
+    print(f"\n✓ No dead links among {len(links)}" + (f" ({failing} could not be checked)" if failing else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "python3-discogs-client",
+#     "requests",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Check library sync plans against recorded listings.
+
+Pages through the Discogs collection folder responses in
+scripts/fixtures/discogs/ and reads the Bandcamp fan collection export in
+scripts/fixtures/bandcamp/collection-export.json, then plans a sync of each
+against a temporary site holding:
+
+    generated entries still in the library, one of them edited by hand (update)
+    a generated entry of each source that left the library (removed)
+    an album of each source merged into the other source's entry (existing)
+    a hand-made Discogs album at its expected slug (existing)
+    a hand-made entry linking to a Bandcamp album under another slug (existing)
+
+Everything else in the listings must be planned for creation. Exits 1 if
+the pages fetched, the expected slugs or any plan bucket are wrong.
+
+Usage:
+    uv run scripts/check_sync_plan.py
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from praesens.manifest import Manifest
+from praesens.sources import bandcamp, discogs
+from praesens.sync import iter_pages, plan_sync, print_plan
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+EXPECTED_SLUGS = {
+    'https://www.discogs.com/release/1001': 'idris-muhammad-turn-this-mutha-out',
+    'https://www.discogs.com/release/1002': 'fugazi-instrument',
+    'https://www.discogs.com/release/1003': 'alice-coltrane-journey-in-satchidananda',
+    'https://www.discogs.com/release/1004': 'mulatu-astatke-mulatu-of-ethiopia',
+    'https://www.discogs.com/release/1005': 'pharoah-sanders-karma',
+}
+
+EXPECTED_DISCOGS = {
+    'create': ['https://www.discogs.com/release/1005'],
+    'update': ['https://www.discogs.com/release/1001', 'https://www.discogs.com/release/1004'],
+    'existing': ['https://www.discogs.com/release/1002', 'https://www.discogs.com/release/1003'],
+    'removed': ['ahmad-jamal-the-awakening'],
+}
+
+EXPECTED_BANDCAMP = {
+    'create': ['https://beingdead.bandcamp.com/album/eels'],
+    'update': ['https://fugazi.bandcamp.com/album/instrument'],
+    'existing': ['https://khruangbin.bandcamp.com/album/mordechai',
+                 'https://idrismuhammad.bandcamp.com/album/turn-this-mutha-out'],
+    'removed': ['being-dead-when-horses-would-run'],
+}
+
+ENTRY = '''+++
+title = "{title}"
+date = 2025-12-25
+draft = false
+
+[album]
+artist = "{artist}"
+
+[album.links]
+spotify = ""
+bandcamp = "{bandcamp}"
++++
+
+{body}
+'''
+
+
+def write_entry(content_dir, slug, artist, title, bandcamp_url='', body='Album description.'):
+    """Write a minimal index.md and return its text."""
+    text = ENTRY.format(title=title, artist=artist, bandcamp=bandcamp_url, body=body)
+    (content_dir / slug).mkdir(parents=True)
+    (content_dir / slug / 'index.md').write_text(text, encoding='utf-8')
+    return text
+
+
+def record(manifest, content_dir, slug, source, url, artist, title, bandcamp_url=''):
+    """Write and record a generated entry."""
+    text = write_entry(content_dir, slug, artist, title, bandcamp_url)
+    manifest.record(slug, source, url, {'url': url}, text, 5, '2025-12-25')
+
+
+def make_site(root):
+    """A Hugo site with one entry for each plan outcome; returns (content_dir, manifest)."""
+    (root / 'hugo.toml').touch()
+    content_dir = root / 'content' / 'collection'
+    content_dir.mkdir(parents=True)
+    manifest = Manifest(content_dir)
+
+    # Generated from Discogs, a Bandcamp copy merged in, then retitled by hand
+    slug = 'idris-muhammad-turn-this-mutha-out'
+    record(manifest, content_dir, slug, 'discogs', 'https://www.discogs.com/release/1001',
+           'Idris Muhammad', 'Turn This Mutha Out')
+    manifest.record_merge(slug, 'bandcamp', 'https://idrismuhammad.bandcamp.com/album/turn-this-mutha-out', {})
+    index_path = content_dir / slug / 'index.md'
+    index_path.write_text(index_path.read_text(encoding='utf-8').replace(
+        'title = "Turn This Mutha Out"', 'title = "Turn This Mutha Out (Kudu, 1977)"'), encoding='utf-8')
+    record(manifest, content_dir, 'mulatu-astatke-mulatu-of-ethiopia', 'discogs',
+           'https://www.discogs.com/release/1004-Mulatu-Astatke-Mulatu-Of-Ethiopia', 'Mulatu Astatke',
+           'Mulatu Of Ethiopia')
+    record(manifest, content_dir, 'ahmad-jamal-the-awakening', 'discogs', 'https://www.discogs.com/release/1006',
+           'Ahmad Jamal', 'The Awakening')
+
+    # Generated from Bandcamp, with the Discogs release merged in
+    record(manifest, content_dir, 'fugazi-instrument', 'bandcamp', 'https://fugazi.bandcamp.com/album/instrument',
+           'Fugazi', 'Instrument', 'https://fugazi.bandcamp.com/album/instrument')
+    manifest.record_merge('fugazi-instrument', 'discogs', 'https://www.discogs.com/release/1002', {})
+    record(manifest, content_dir, 'being-dead-when-horses-would-run', 'bandcamp',
+           'https://beingdead.bandcamp.com/album/when-horses-would-run', 'Being Dead', 'When Horses Would Run',
+           'https://beingdead.bandcamp.com/album/when-horses-would-run')
+
+    # Made by hand: one at the slug Discogs would give it, one under a slug of its own
+    write_entry(content_dir, 'alice-coltrane-journey-in-satchidananda', 'Alice Coltrane',
+                'Journey in Satchidananda')
+    write_entry(content_dir, 'khruangbin-mordechai-live-at-rich-mix', 'Khruangbin', 'Mordechai',
+                'https://khruangbin.bandcamp.com/album/mordechai/')
+    manifest.save()
+    return content_dir, Manifest(content_dir)
+
+
+def recorded_page_fetcher(fetched):
+    """fetch_page(page) over the recorded collection folder pages."""
+    def fetch_page(page):
+        fetched.append(page)
+        with open(FIXTURES / 'discogs' / f"collection-page-{page}.json", encoding='utf-8') as f:
+            return json.load(f)
+
+    return fetch_page
+
+
+def compare(name, plan, expected):
+    """Problems with one plan, one line per wrong bucket."""
+    return [f"{name} {bucket}: {sorted(plan[bucket])}, expected {sorted(urls)}"
+            for bucket, urls in expected.items() if sorted(plan[bucket]) != sorted(urls)]
+
+
+def main():
+    problems = []
+
+    fetched = []
+    ids = [item['id'] for item in iter_pages(recorded_page_fetcher(fetched), 'releases')]
+    if fetched != [1, 2] or ids != [1001, 1002, 1003, 1004, 1005]:
+        problems.append(f"iter_pages fetched pages {fetched} and releases {ids}, expected [1, 2] and 1001-1005")
+    remote = discogs.list_collection(recorded_page_fetcher([]))
+    if remote != EXPECTED_SLUGS:
+        problems.append(f"expected slugs {remote}, expected {EXPECTED_SLUGS}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir, manifest = make_site(Path(tmp))
+
+        discogs_source = discogs.Source()
+        discogs_plan = plan_sync(remote, manifest, discogs_source.name, discogs_source.source_key, content_dir)
+        problems.extend(compare('Discogs', discogs_plan, EXPECTED_DISCOGS))
+
+        bandcamp_source = bandcamp.Source()
+        remote, linked = bandcamp_source.list_library(FIXTURES / 'bandcamp' / 'collection-export.json', content_dir)
+        # Found through its bandcamp link, which has a trailing slash
+        if linked.get('https://khruangbin.bandcamp.com/album/mordechai') != 'khruangbin-mordechai-live-at-rich-mix':
+            problems.append(f"linked entries {linked} miss the hand-made Khruangbin entry")
+        bandcamp_plan = plan_sync(remote, manifest, bandcamp_source.name, bandcamp_source.source_key, content_dir,
+                                  linked)
+        problems.extend(compare('Bandcamp', bandcamp_plan, EXPECTED_BANDCAMP))
+
+    for name, plan in (('Discogs', discogs_plan), ('Bandcamp', bandcamp_plan)):
+        print(f"{name}:")
+        print_plan(plan)
+
+    if problems:
+        for problem in problems:
+            print(f"Error: {problem}", file=sys.stderr)
+        return 1
+    print("✓ Both sync plans match the recorded listings")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
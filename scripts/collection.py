@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "requests",
+#     "beautifulsoup4",
+#     "python3-discogs-client",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Import and maintain collection entries from Discogs and Bandcamp.
+
+Usage:
+    uv run scripts/collection.py import <url> [<url> ...]
+    uv run scripts/collection.py import --batch urls.txt
+    uv run scripts/collection.py sync discogs <username>
+    uv run scripts/collection.py sync bandcamp <export file>
+    uv run scripts/collection.py regenerate
+    uv run scripts/collection.py index
+
+See scripts/praesens/cli.py for all commands and options.
+"""
+
+import sys
+
+from praesens.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Rebuild static/collection-index.json from every entry.
+
+Same as `uv run scripts/collection.py index`.
+"""
+
+import sys
+
+from praesens.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(['index', *sys.argv[1:]]))
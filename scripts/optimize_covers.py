@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "pillow>=11.3",
+#     "requests",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Generate downsized WebP/AVIF cover derivatives for collection entries.
+
+For every content/collection/<slug>/cover.* this writes cover-<width>.webp
+(and cover-<width>.avif when Pillow has AVIF support) next to the original,
+in parallel across a process pool. The original dimensions and a tiny blurred
+placeholder are written into the entry's frontmatter as [album.cover], which
+the collection templates use for srcset, width/height and lazy loading.
+
+Derivatives are only rebuilt when the cover is newer than them, and a cover
+is only decoded when something has to be rebuilt, so re-running over an
+unchanged collection is cheap. Derivatives at or above the width of a
+replaced, narrower cover are deleted.
+
+Usage:
+    uv run scripts/optimize_covers.py
+    uv run scripts/optimize_covers.py --benchmark   # report bytes saved and time per image
+    uv run scripts/optimize_covers.py --force       # rebuild all derivatives
+"""
+
+import argparse
+import base64
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageFilter, features
+
+from praesens.entry import write_index
+from praesens.frontmatter import parse_entry, set_table_block
+from praesens.manifest import Manifest
+
+WIDTHS = (320, 640, 1280)
+GRID_WIDTH = 320  # derivative the collection grid loads at 1x
+PLACEHOLDER_WIDTH = 16
+QUALITY = {'webp': 80, 'avif': 60}
+DERIVATIVE = re.compile(r'^cover-(\d+)\.(webp|avif)$')
+
+
+def output_formats():
+    """Derivative formats supported by the installed Pillow."""
+    formats = ['webp']
+    if features.check('avif'):
+        formats.insert(0, 'avif')
+    return formats
+
+
+def find_cover(entry_dir):
+    """The original cover image of an entry, ignoring derivatives."""
+    for path in sorted(entry_dir.glob('cover.*')):
+        if not path.name.endswith('.part'):
+            return path
+    return None
+
+
+def placeholder_data_uri(image):
+    """Tiny blurred WebP of the cover as a data URI."""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    thumb = image.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    thumb.save(buffer, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def derivative_files(entry_dir):
+    """{path: width} for an entry's cover-<width>.* derivatives."""
+    files = {}
+    for path in entry_dir.glob('cover-*'):
+        match = DERIVATIVE.match(path.name)
+        if match:
+            files[path] = int(match.group(1))
+    return files
+
+
+def cover_table(entry_dir):
+    """The entry's [album.cover] table ({} without one)."""
+    try:
+        document, _ = parse_entry((entry_dir / 'index.md').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return (document.get('album') or {}).get('cover') or {}
+
+
+def optimize_cover(entry_dir, formats, force=False):
+    """Build derivatives for one entry; runs in a worker process.
+
+    The cover is only decoded when a derivative or the placeholder has to be
+    rebuilt; otherwise its size comes from the image header.
+    """
+    started = time.perf_counter()
+    entry_dir = Path(entry_dir)
+    cover = find_cover(entry_dir)
+    if cover is None:
+        return None
+    cover_mtime = cover.stat().st_mtime
+
+    with Image.open(cover) as original:
+        width, height = original.size
+        # Never upscale; the original covers anything larger
+        sizes = [(w, round(height * w / width)) for w in WIDTHS if w < width]
+        stale = set()
+        for w, _ in sizes:
+            for fmt in formats:
+                path = entry_dir / f"cover-{w}.{fmt}"
+                if force or not path.exists() or path.stat().st_mtime < cover_mtime:
+                    stale.add((w, fmt))
+        recorded = cover_table(entry_dir)
+        placeholder = None
+        if sizes and not stale and (recorded.get('width'), recorded.get('height')) == (width, height):
+            placeholder = recorded.get('placeholder')
+        image = original.convert('RGB') if stale or not placeholder else None
+
+    # A narrower replacement cover leaves wider derivatives that still show the old artwork
+    removed = 0
+    for path, w in derivative_files(entry_dir).items():
+        if w >= width:
+            path.unlink()
+            removed += 1
+
+    derivatives = {}
+    for w, h in sizes:
+        resized = None
+        for fmt in formats:
+            path = entry_dir / f"cover-{w}.{fmt}"
+            if (w, fmt) in stale:
+                if resized is None:
+                    resized = image.resize((w, h), Image.LANCZOS)
+                resized.save(path, fmt.upper(), quality=QUALITY[fmt])
+            derivatives[path.name] = path.stat().st_size
+
+    return {
+        'slug': entry_dir.name,
+        'width': width,
+        'height': height,
+        'placeholder': placeholder or placeholder_data_uri(image),
+        'original_bytes': cover.stat().st_size,
+        'derivatives': derivatives,
+        'built': len(stale),
+        'removed': removed,
+        'decoded': image is not None,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def cover_block(result):
+    """The [album.cover] frontmatter table for an optimized cover."""
+    return (
+        "[album.cover]\n"
+        f"width = {result['width']}\n"
+        f"height = {result['height']}\n"
+        f"placeholder = \"{result['placeholder']}\"\n"
+    )
+
+
+def update_frontmatter(entry_dir, result, manifest):
+    """Write [album.cover] into index.md, keeping the source manifest in sync."""
+    index_path = entry_dir / 'index.md'
+    if not index_path.exists():
+        return False
+    with open(index_path, encoding='utf-8') as f:
+        text = f.read()
+    updated = set_table_block(text, 'album.cover', cover_block(result))
+    if updated == text:
+        return False
+    write_index(index_path, updated)
+    # Generated entries stay "generated" rather than looking hand-edited
+    manifest.record_edit(entry_dir.name, text, updated, {})
+    return True
+
+
+def grid_bytes(result, formats):
+    """Bytes the collection grid downloads for this cover after optimization."""
+    for fmt in formats:
+        name = f"cover-{GRID_WIDTH}.{fmt}"
+        if name in result['derivatives']:
+            return result['derivatives'][name]
+    return result['original_bytes']
+
+
+def print_benchmark(results, formats, elapsed):
+    """Per-image timings and the grid page weight before and after."""
+    print(f"\n{'entry':<50} {'original':>10} {'grid':>10} {'time':>8}")
+    for result in sorted(results, key=lambda r: r['slug']):
+        print(f"{result['slug'][:50]:<50} {result['original_bytes'] / 1024:>8.1f}KB "
+              f"{grid_bytes(result, formats) / 1024:>8.1f}KB {result['seconds'] * 1000:>6.0f}ms")
+    before = sum(r['original_bytes'] for r in results)
+    after = sum(grid_bytes(r, formats) for r in results)
+    per_image = sum(r['seconds'] for r in results) / len(results)
+    print(f"\nGrid page covers: {before / 1024:.0f}KB -> {after / 1024:.0f}KB "
+          f"({before / max(after, 1):.1f}x smaller, {(before - after) / 1024:.0f}KB saved)")
+    print(f"Time per image: {per_image * 1000:.0f}ms (wall clock {elapsed:.2f}s for {len(results)} images)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate WebP/AVIF cover derivatives and placeholders for collection entries'
+    )
+    parser.add_argument(
+        '--content-dir',
+        default='content/collection',
+        help='Path to Hugo content/collection directory (default: content/collection)'
+    )
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rebuild derivatives even if up to date')
+    parser.add_argument('--benchmark', action='store_true', help='Report bytes saved and time per image')
+
+    args = parser.parse_args()
+
+    entry_dirs = sorted(path.parent for path in Path(args.content_dir).glob('*/index.md'))
+    formats = output_formats()
+    if 'avif' not in formats:
+        print("ℹ Pillow has no AVIF support - generating WebP only")
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(optimize_cover, str(d), formats, args.force) for d in entry_dirs]
+        for entry_dir, future in zip(entry_dirs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Warning: {entry_dir.name}: {e}", file=sys.stderr)
+                continue
+            if result is not None:
+                results.append(result)
+    elapsed = time.perf_counter() - started
+
+    manifest = Manifest(args.content_dir)
+    updated = 0
+    for result in results:
+        if update_frontmatter(Path(args.content_dir) / result['slug'], result, manifest):
+            updated += 1
+    if manifest.entries:
+        manifest.save()
+
+    built = sum(r['built'] for r in results)
+    removed = sum(r['removed'] for r in results)
+    decoded = sum(r['decoded'] for r in results)
+    print(f"✓ {len(results)} covers checked ({decoded} decoded), {built} derivatives written, "
+          f"{removed} outdated derivatives removed, {updated} entries updated")
+    if args.benchmark and results:
+        print_benchmark(results, formats, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+Importer package for the Präsens collection.
+
+Source adapters (Discogs, Bandcamp) live in praesens.sources and are imported
+lazily; everything they share - HTTP session, response cache, manifest,
+search index, cover downloads and entry rendering - lives next to them here.
+The command line front end is praesens.cli:
+
+    uv run scripts/collection.py import <url> [<url> ...]
+"""
@@ -0,0 +1,218 @@
+"""
+Persistent on-disk cache for raw Discogs and Bandcamp responses.
+
+Entries live in a single SQLite file under .cache/ and are keyed by a SHA-256
+of (namespace, key), where the key is a release ID or a canonical URL.
+Stale entries expire after a TTL and the least recently used entries are
+evicted once the cache grows past its size limit, down to EVICT_TO of it so
+the next few writes don't evict again. The total size is counted once when
+the cache is opened and kept up to date as entries are written, and access
+times are written in batches of TOUCH_BATCH (and on close()) instead of on
+every read.
+
+Usage from an importer:
+    cache = ResponseCache()
+    body = cache.get('bandcamp-html', canonical_url(url))
+    if body is None:
+        body = fetch(url)
+        cache.set('bandcamp-html', canonical_url(url), body)
+
+Entities that many entries share (Discogs artists, labels, master releases)
+go through an EntityCache on top, which keeps them in memory for the run and
+makes concurrent lookups of the same entity wait for a single fetch.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse, urlunparse
+
+DEFAULT_CACHE_PATH = '.cache/responses.sqlite'
+DEFAULT_TTL = 30 * 24 * 3600  # 30 days
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+EVICT_TO = 0.9  # share of max_bytes left after an eviction
+TOUCH_BATCH = 256  # reads between access time writes
+EVICT_BATCH = 256  # least recently used rows read at a time when evicting
+
+
+def canonical_url(url):
+    """Normalize a URL so trivially different spellings share a cache entry."""
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(('https', parsed.netloc.lower(), path, '', '', ''))
+
+
+def cache_key(namespace, key):
+    """Content address for a cached response."""
+    return hashlib.sha256(f"{namespace}:{key}".encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL expiry and LRU size eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Importers fetch from worker threads, so share one connection behind a lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                hash TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)')
+        self.db.commit()
+        # Other processes writing the same file aren't counted until the next open
+        self.total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        # hash -> last read time, not yet written
+        self.touched = {}
+
+    def get(self, namespace, key, max_age=None):
+        """Return the cached body, or None when missing or older than the TTL.
+
+        Pass max_age=float('inf') to accept any cached copy regardless of age.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        digest = cache_key(namespace, key)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT body, fetched_at FROM responses WHERE hash = ?', (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            body, fetched_at = row
+            if time.time() - fetched_at > max_age:
+                return None
+            self.touched[digest] = time.time()
+            if len(self.touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self.db.commit()
+        return body
+
+    def set(self, namespace, key, body):
+        """Store a response body and evict old entries if over the size limit."""
+        now = time.time()
+        digest = cache_key(namespace, key)
+        size = len(body.encode('utf-8'))
+        with self.lock:
+            replaced = self.db.execute('SELECT size FROM responses WHERE hash = ?', (digest,)).fetchone()
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (digest, namespace, key, body, size, now, now),
+            )
+            self.touched.pop(digest, None)
+            self.total += size - (replaced[0] if replaced else 0)
+            if self.total > self.max_bytes:
+                self._evict()
+            self.db.commit()
+
+    def set_many(self, namespace, items):
+        """Store (key, body) pairs in one transaction."""
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (cache_key(namespace, key), namespace, key, body, len(body.encode('utf-8')), now, now)
+                    for key, body in items
+                ],
+            )
+            # Replaced rows make the running total hard to adjust; a bulk load can afford one recount
+            self.total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if self.total > self.max_bytes:
+                self._evict()
+            self.db.commit()
+
+    def _flush_touched(self):
+        self.db.executemany(
+            'UPDATE responses SET accessed_at = ? WHERE hash = ?',
+            [(accessed_at, digest) for digest, accessed_at in self.touched.items()],
+        )
+        self.touched.clear()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is down to EVICT_TO of max_bytes."""
+        self._flush_touched()
+        target = self.max_bytes * EVICT_TO
+        while self.total > target:
+            rows = self.db.execute(
+                'SELECT hash, size FROM responses ORDER BY accessed_at LIMIT ?', (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for digest, size in rows:
+                if self.total <= target:
+                    break
+                doomed.append((digest,))
+                self.total -= size
+            self.db.executemany('DELETE FROM responses WHERE hash = ?', doomed)
+
+    def close(self):
+        """Write pending access times and close the database."""
+        with self.lock:
+            self._flush_touched()
+            self.db.commit()
+            self.db.close()
+
+
+class EntityCache:
+    """In-memory, fetch-once layer over ResponseCache for JSON entities shared by many entries.
+
+    get() answers from memory, then from the on-disk cache, and only then
+    calls fetch(). When several workers ask for the same entity at once, one
+    fetches it and the others wait for its result.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entities = {}
+        self.pending = {}
+        self.stats = {'memory': 0, 'disk': 0, 'fetched': 0}
+
+    def get(self, namespace, key, fetch, cache=None, refresh=False):
+        """Entity JSON for (namespace, key), or None if fetching it failed in another worker."""
+        entity_key = (namespace, str(key))
+        with self.lock:
+            if entity_key in self.entities:
+                self.stats['memory'] += 1
+                return self.entities[entity_key]
+            waiting = self.pending.get(entity_key)
+            if waiting is None:
+                self.pending[entity_key] = threading.Event()
+        if waiting is not None:
+            waiting.wait()
+            with self.lock:
+                self.stats['memory'] += 1
+                return self.entities.get(entity_key)
+
+        try:
+            body = cache.get(namespace, str(key)) if cache is not None and not refresh else None
+            if body is not None:
+                entity = json.loads(body)
+                source = 'disk'
+            else:
+                entity = fetch()
+                source = 'fetched'
+                if cache is not None:
+                    cache.set(namespace, str(key), json.dumps(entity))
+            with self.lock:
+                self.entities[entity_key] = entity
+                self.stats[source] += 1
+            return entity
+        finally:
+            with self.lock:
+                self.pending.pop(entity_key).set()
@@ -0,0 +1,640 @@
+"""
+Command line front end for the importers.
+
+One process handles any mix of Discogs and Bandcamp URLs: source adapters,
+requests, bs4 and discogs_client are only imported once a command needs them,
+so `--help` and the index command start without any of them, and a run over
+many URLs pays for the imports, the HTTP connection pool and the cache once.
+
+Usage:
+    uv run scripts/collection.py import <url> [<url> ...]
+    uv run scripts/collection.py import --batch urls.txt          # one URL per line, '-' for stdin
+    uv run scripts/collection.py import --batch urls.txt --timings spans.jsonl --profile
+    uv run scripts/collection.py import --batch urls.txt --dump discogs_20261001_releases.xml.gz
+    uv run scripts/collection.py sync discogs <username> [--folder ID]
+    uv run scripts/collection.py sync bandcamp <export file>
+    uv run scripts/collection.py queue add <url> [<url> ...] [--batch urls.txt]
+    uv run scripts/collection.py queue status | retry
+    uv run scripts/collection.py work [--workers N] [--wait]           # drain the queue, resumable
+    uv run scripts/collection.py regenerate [--dry-run] [--dump FILE] [slug ...]
+    uv run scripts/collection.py index
+    uv run scripts/collection.py query [text] [--genre Jazz] [--label Strata-East] [--decade 1970s] [--sql SQL]
+    uv run scripts/collection.py validate
+    uv run scripts/collection.py duplicates
+    uv run scripts/collection.py tags [--write]
+
+Discogs requests use DISCOGS_TOKEN from the environment when set (60 requests/min
+instead of 25).
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+
+def add_content_dir(parser):
+    parser.add_argument(
+        '--content-dir',
+        default='content/collection',
+        help='Path to Hugo content/collection directory (default: content/collection)'
+    )
+
+
+def decade(value):
+    """argparse type for --decade: "1970s", "1970" or "70s"."""
+    from .mirror import decade_start
+
+    try:
+        decade_start(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def add_dump(parser):
+    parser.add_argument(
+        '--dump',
+        metavar='FILE',
+        help='Read Discogs releases from a monthly data dump (discogs_*_releases.xml[.gz]) '
+             'instead of the API; releases missing from it are still fetched'
+    )
+
+
+def import_options():
+    """Options shared by the import and sync commands."""
+    parser = argparse.ArgumentParser(add_help=False)
+    add_content_dir(parser)
+    parser.add_argument('--youtube', help='YouTube URL for the album (Discogs only)')
+    parser.add_argument(
+        '--enrich',
+        action='store_true',
+        help='Discogs only: also fetch artists, labels and master releases for all artists, full credits '
+             'and the original year (each artist/label is fetched once per run)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Concurrent metadata fetches and cover downloads (default: 4)'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=int,
+        help='Discogs requests per minute (default: 60 with DISCOGS_TOKEN, 25 without)'
+    )
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached responses and fetch fresh data')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the on-disk response cache')
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Use offline fixture data instead of the Discogs API (for throughput testing)'
+    )
+    add_dump(parser)
+    parser.add_argument(
+        '--no-match',
+        action='store_true',
+        help='Key entries by slug only, without matching them against existing entries'
+    )
+    parser.add_argument(
+        '--timings',
+        metavar='FILE',
+        help='Write every timing span (stage, start, seconds, thread, URL) to FILE as JSON lines'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Run under cProfile and tracemalloc and print the hottest functions (slows the run down)'
+    )
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Import and maintain Hugo collection entries')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser(
+        'import', parents=[import_options()], help='Create entries from Discogs/Bandcamp URLs'
+    )
+    import_parser.add_argument('urls', nargs='*', help='Discogs release or Bandcamp album URLs')
+    import_parser.add_argument(
+        '--batch',
+        metavar='FILE',
+        help="Also import every URL listed in FILE (one per line, '-' for stdin)"
+    )
+    import_parser.add_argument(
+        '--source',
+        choices=['discogs', 'bandcamp'],
+        help='Reject URLs that do not belong to this source'
+    )
+
+    sync_parser = commands.add_parser(
+        'sync', parents=[import_options()],
+        help='Sync a whole library (creates, updates and flags removed entries)'
+    )
+    sync_parser.add_argument('source', choices=['discogs', 'bandcamp'])
+    sync_parser.add_argument('ref', help='Discogs username, or Bandcamp fan collection export file')
+    sync_parser.add_argument(
+        '--folder',
+        type=int,
+        default=0,
+        help='Discogs collection folder ID to sync (default: 0, all releases)'
+    )
+
+    queue_parser = commands.add_parser('queue', help='Queue URLs for `work` and show the queue')
+    queue_parser.add_argument('--queue', metavar='FILE', help='Job queue database (default: .cache/jobs.sqlite)')
+    queue_actions = queue_parser.add_subparsers(dest='action', required=True)
+    add_parser = queue_actions.add_parser('add', help='Queue Discogs/Bandcamp URLs (already queued ones are skipped)')
+    add_parser.add_argument('urls', nargs='*', help='Discogs release or Bandcamp album URLs')
+    add_parser.add_argument('--batch', metavar='FILE', help="Also queue every URL listed in FILE ('-' for stdin)")
+    add_parser.add_argument('--enrich', action='store_true', help='Import these Discogs releases with --enrich')
+    queue_actions.add_parser('status', help='Count jobs by status and list recent errors')
+    queue_actions.add_parser('retry', help='Queue failed jobs again')
+
+    work_parser = commands.add_parser('work', help='Import queued URLs; resumes where an interrupted run stopped')
+    add_content_dir(work_parser)
+    work_parser.add_argument('--queue', metavar='FILE', help='Job queue database (default: .cache/jobs.sqlite)')
+    work_parser.add_argument('--workers', type=int, default=4, help='Jobs run at once (default: 4)')
+    work_parser.add_argument(
+        '--rate-limit',
+        type=int,
+        help='Discogs requests per minute (default: 60 with DISCOGS_TOKEN, 25 without)'
+    )
+    work_parser.add_argument(
+        '--max-attempts', type=int, default=5, help='Tries per job before it is marked failed (default: 5)'
+    )
+    work_parser.add_argument(
+        '--checkpoint', type=int, default=25, metavar='N',
+        help='Save the manifest and mark jobs done every N jobs (and at least every 30s, default: 25)'
+    )
+    work_parser.add_argument('--wait', action='store_true', help='Keep waiting for new jobs when the queue is empty')
+    work_parser.add_argument('--no-cache', action='store_true', help='Do not read or write the on-disk response cache')
+    work_parser.add_argument('--no-match', action='store_true', help='Key entries by slug only')
+    work_parser.add_argument(
+        '--dry-run', action='store_true', help='Use offline fixture data instead of the Discogs API'
+    )
+
+    regenerate_parser = commands.add_parser(
+        'regenerate', help='Rebuild entries whose source data or template changed'
+    )
+    add_content_dir(regenerate_parser)
+    regenerate_parser.add_argument('slugs', nargs='*', help='Only regenerate these entries')
+    regenerate_parser.add_argument('--refresh', action='store_true', help='Refetch sources instead of using the cache')
+    regenerate_parser.add_argument(
+        '--force', action='store_true', help='Rebuild everything and overwrite hand-edited fields'
+    )
+    regenerate_parser.add_argument(
+        '--dry-run', action='store_true', help='Report what would be rebuilt without writing'
+    )
+    add_dump(regenerate_parser)
+
+    index_parser = commands.add_parser('index', help='Rebuild static/collection-index.json from all entries')
+    add_content_dir(index_parser)
+
+    query_parser = commands.add_parser(
+        'query', help='Search the collection through its SQLite mirror (.cache/collection.sqlite)'
+    )
+    add_content_dir(query_parser)
+    query_parser.add_argument('text', nargs='?', help='Words to find in artists, titles, labels, tracks and credits')
+    query_parser.add_argument('--artist', help='Artist name contains this')
+    query_parser.add_argument('--genre', help='Has this genre or style')
+    query_parser.add_argument('--label', help='Released on this label (or a sub-label of it)')
+    query_parser.add_argument('--decade', type=decade, help='Released in this decade, e.g. 1970s')
+    query_parser.add_argument('--credit', help='Credits someone whose name contains this')
+    query_parser.add_argument('--limit', type=int, default=50, help='Most albums to list (default: 50)')
+    query_parser.add_argument('--sql', help='Run this SQL against the mirror instead and print the rows')
+
+    duplicates_parser = commands.add_parser(
+        'duplicates', help='List entries that look like the same album (across sources and slugs)'
+    )
+    add_content_dir(duplicates_parser)
+
+    tags_parser = commands.add_parser(
+        'tags', help='Rewrite genres to their canonical names (labels and places taken out) and list unknown tags'
+    )
+    add_content_dir(tags_parser)
+    tags_parser.add_argument('--write', action='store_true', help='Rewrite the entries (default: only report)')
+
+    validate_parser = commands.add_parser('validate', help='Check every entry before building the site')
+    add_content_dir(validate_parser)
+    validate_parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    validate_parser.add_argument('--no-cache', action='store_true', help='Recheck every entry')
+    return parser
+
+
+def make_sources(args):
+    from .sources import Sources
+
+    token = os.environ.get('DISCOGS_TOKEN')
+    settings = {'discogs': {'token': token, 'rate_limit': getattr(args, 'rate_limit', None)}}
+    # regenerate --dry-run only means "report, don't write"; fixture data is for imports
+    return Sources(settings, dry_run=args.command in ('import', 'sync', 'work') and args.dry_run)
+
+
+def run_import_command(args, parser):
+    from .cache import ResponseCache
+    from .importer import print_summary, read_url_list, run_import
+    from .index import CollectionIndex
+    from .manifest import Manifest
+    from .matching import MatchIndex
+    from .mirror import CollectionMirror
+    from .sources import ADAPTERS, source_name
+    from .sync import plan_sync, print_plan
+    from .timing import span, timings
+
+    sources = make_sources(args)
+    manifest = Manifest(args.content_dir)
+    mirror = CollectionMirror(args.content_dir)
+    index = CollectionIndex(args.content_dir, mirror)
+
+    plan = None
+    if args.command == 'sync':
+        source = sources.get(args.source)
+        remote, linked = source.list_library(args.ref, args.content_dir, folder=args.folder)
+        plan = plan_sync(remote, manifest, source.name, source.source_key, args.content_dir, linked)
+        print_plan(plan)
+        urls = plan['create'] + plan['update']
+    else:
+        urls = list(args.urls)
+        if args.batch:
+            urls.extend(read_url_list(args.batch))
+        if not urls:
+            parser.error('provide at least one URL or --batch FILE')
+
+    # Validate URLs before anything is fetched
+    allowed = [args.source] if getattr(args, 'source', None) else list(ADAPTERS)
+    for url in urls:
+        try:
+            name = source_name(url)
+        except ValueError:
+            name = None
+        if name not in allowed:
+            names = ' or '.join(allowed_name.capitalize() for allowed_name in allowed)
+            print(f"Error: URL must be a {names} page: {url}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.dry_run:
+        print("ℹ Dry run - using offline fixture data")
+    elif not os.environ.get('DISCOGS_TOKEN') and any(source_name(url) == 'discogs' for url in urls):
+        print("ℹ No DISCOGS_TOKEN found - using unauthenticated API (rate limited)")
+        print("  For higher rate limits, get a token at: https://www.discogs.com/settings/developers")
+        print("  Then run: export DISCOGS_TOKEN=your_token_here")
+        print()
+
+    cache = None if args.no_cache or args.dry_run else ResponseCache()
+    if args.dump:
+        discogs_urls = [url for url in urls if source_name(url) == 'discogs']
+        sources.get('discogs').load_dump(args.dump, discogs_urls, cache)
+    # Imports of an album that is already in the collection (from any source) go to its entry
+    mirror.refresh()
+    matches = None if args.no_match else MatchIndex.from_mirror(mirror)
+    if args.timings:
+        timings.open_log(args.timings)
+    if len(urls) > 1:
+        print(f"Importing {len(urls)} URLs ({args.workers} workers)...")
+    try:
+        stats = run_import(
+            urls, sources, args.content_dir, cache, args.refresh, manifest, index,
+            options={'youtube_url': args.youtube, 'enrich': args.enrich}, fetch_workers=args.workers, write_workers=args.workers,
+            matches=matches,
+        )
+        if plan is not None:
+            manifest.flag_removed(plan['removed'])
+        with span('save'):
+            manifest.save()
+            index.save()
+    finally:
+        timings.close()
+        if cache is not None:
+            cache.close()
+
+    if len(urls) == 1 and stats['created']:
+        slug = stats['slugs'][0]
+        print(f"\nEntry created successfully!")
+        print(f"Location: {Path(args.content_dir) / slug}")
+        print(f"\nTo view:")
+        print(f"  hugo server -D")
+        print(f"  Visit: http://localhost:1313/collection/{slug}")
+    else:
+        print_summary(stats, len(urls))
+    if args.enrich and 'discogs' in sources.loaded:
+        lookups = sources.loaded['discogs'].entities.stats
+        print(f"ℹ Enrichment: {lookups['fetched']} artists/labels/masters fetched, {lookups['disk']} from the "
+              f"response cache, {lookups['memory']} shared between releases")
+    return 1 if stats['failed'] else 0
+
+
+def run_queue_command(args, parser):
+    from .importer import read_url_list
+    from .jobs import DEFAULT_QUEUE_PATH, JobQueue
+    from .sources import source_name
+
+    queue = JobQueue(args.queue or DEFAULT_QUEUE_PATH)
+    if args.action == 'add':
+        urls = list(args.urls)
+        if args.batch:
+            urls.extend(read_url_list(args.batch))
+        if not urls:
+            parser.error('provide at least one URL or --batch FILE')
+        sources = make_sources(args)
+        for url in urls:
+            try:
+                source_name(url)
+            except ValueError:
+                print(f"Error: URL must be a Discogs or Bandcamp page: {url}", file=sys.stderr)
+                return 1
+            # Only the adapter knows which of its pages it imports (a Discogs master page is not a release)
+            try:
+                sources.for_url(url).source_key(url)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+        added = queue.add(urls, {'enrich': True} if args.enrich else None)
+        print(f"✓ Queued {added} URLs ({len(urls) - added} already queued)")
+    elif args.action == 'retry':
+        print(f"✓ Queued {queue.retry_failed()} failed jobs again")
+
+    counts = queue.counts()
+    print(f"  {counts['pending']} pending, {counts['running']} running, {counts['done']} done, "
+          f"{counts['failed']} failed")
+    if args.action == 'status':
+        for url, status, attempts, error in queue.errors():
+            print(f"  {status:<8} {attempts} attempts  {url}\n           {error}")
+    return 0
+
+
+def run_work_command(args):
+    import time
+
+    from .cache import ResponseCache
+    from .index import CollectionIndex
+    from .jobs import DEFAULT_QUEUE_PATH, JobQueue, run_worker
+    from .manifest import Manifest
+    from .matching import MatchIndex
+    from .mirror import CollectionMirror
+
+    queue = JobQueue(args.queue or DEFAULT_QUEUE_PATH, max_attempts=args.max_attempts)
+    counts = queue.counts()
+    if not args.wait and not counts['pending'] and not counts['running']:
+        print(f"✓ Nothing to do ({counts['done']} done, {counts['failed']} failed)")
+        return 0
+    print(f"Working through {counts['pending'] + counts['running']} queued jobs ({args.workers} workers)...")
+    if args.dry_run:
+        print("ℹ Dry run - using offline fixture data")
+
+    started = time.monotonic()
+    manifest = Manifest(args.content_dir)
+    mirror = CollectionMirror(args.content_dir)
+    mirror.refresh()
+    index = CollectionIndex(args.content_dir, mirror)
+    cache = None if args.no_cache or args.dry_run else ResponseCache()
+    matches = None if args.no_match else MatchIndex.from_mirror(mirror)
+    stats = run_worker(
+        queue, make_sources(args), args.content_dir, cache, manifest, index, workers=args.workers,
+        matches=matches, checkpoint_every=args.checkpoint, wait_for_jobs=args.wait,
+    )
+    if cache is not None:
+        cache.close()
+    elapsed = time.monotonic() - started
+
+    counts = queue.counts()
+    print(f"\n✓ {stats['done']} imported in {elapsed:.1f}s, {stats['retried']} to retry, {stats['failed']} failed, "
+          f"{stats['parked']} parked for the rate limit")
+    print(f"  Queue: {counts['pending']} pending, {counts['done']} done, {counts['failed']} failed")
+    return 1 if counts['failed'] else 0
+
+
+def run_regenerate_command(args):
+    from .cache import ResponseCache
+    from .index import CollectionIndex
+    from .manifest import Manifest
+    from .mirror import CollectionMirror
+    from .regenerate import regenerate_entry
+
+    manifest = Manifest(args.content_dir)
+    if not manifest.entries:
+        print(f"No entries recorded in {manifest.path}")
+        return 0
+
+    # Regeneration should never refetch just because a cached response is old
+    cache = ResponseCache(ttl=float('inf'))
+    sources = make_sources(args)
+    index = CollectionIndex(args.content_dir, CollectionMirror(args.content_dir))
+    counts = {'unchanged': 0, 'rebuilt': 0}
+    failed = []
+
+    entries = [
+        (slug, entry) for slug, entry in sorted(manifest.entries.items())
+        if not args.slugs or slug in args.slugs
+    ]
+    if args.dump:
+        discogs_urls = [entry['url'] for _, entry in entries if entry['source'] == 'discogs']
+        sources.get('discogs').load_dump(args.dump, discogs_urls, None if args.dry_run else cache)
+
+    for slug, entry in entries:
+        try:
+            status = regenerate_entry(
+                slug, entry, manifest, args.content_dir, cache, args.refresh, sources,
+                force=args.force, dry_run=args.dry_run, index=index,
+            )
+            counts[status] += 1
+        except Exception as e:
+            print(f"Error: {slug}: {e}", file=sys.stderr)
+            failed.append(slug)
+
+    cache.close()
+    if not args.dry_run:
+        manifest.save()
+        index.save()
+
+    print(f"\n✓ {counts['rebuilt']} rebuilt, {counts['unchanged']} unchanged")
+    if failed:
+        print(f"  Failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def run_index_command(args):
+    from .index import rebuild_index
+    from .mirror import CollectionMirror
+
+    index = rebuild_index(args.content_dir, CollectionMirror(args.content_dir))
+    print(f"✓ Indexed {len(index.rows)} albums in {index.path} ({index.path.stat().st_size / 1024:.1f}KB)")
+    return 0
+
+
+def run_duplicates_command(args):
+    import time
+
+    from .matching import MatchIndex
+    from .mirror import CollectionMirror
+
+    started = time.perf_counter()
+    mirror = CollectionMirror(args.content_dir)
+    mirror.refresh()
+    matches = MatchIndex.from_mirror(mirror)
+    pairs = matches.duplicates()
+    elapsed = time.perf_counter() - started
+
+    for score, a, b, reasons in pairs:
+        print(f"{a} <-> {b}  ({', '.join(reasons)}, score {score:.2f})")
+    summary = f"{len(matches.records)} entries in {elapsed:.2f}s"
+    if pairs:
+        print(f"\nℹ {len(pairs)} possible duplicates among {summary}")
+    else:
+        print(f"✓ No duplicates among {summary}")
+    return 0
+
+
+def run_query_command(args):
+    import sqlite3
+    import time
+
+    from .mirror import CollectionMirror
+
+    started = time.perf_counter()
+    mirror = CollectionMirror(args.content_dir)
+    counts = mirror.refresh()
+    refreshed = time.perf_counter()
+    if counts['added'] or counts['updated'] or counts['removed']:
+        print(f"ℹ Mirror refreshed: {counts['added']} added, {counts['updated']} updated, "
+              f"{counts['removed']} removed ({refreshed - started:.2f}s)")
+
+    if args.sql:
+        try:
+            rows = mirror.execute(args.sql)
+        except sqlite3.Error as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        for row in rows:
+            print('\t'.join('' if value is None else str(value) for value in row))
+    else:
+        rows = mirror.find(args.text, args.artist, args.genre, args.label, args.decade, args.credit, args.limit)
+        for slug, artist, title, year, label in rows:
+            details = ', '.join(str(value) for value in (year, label) if value)
+            print(f"{artist} - {title}" + (f" ({details})" if details else '') + f"  [{slug}]")
+    print(f"\nℹ {len(rows)} rows in {(time.perf_counter() - refreshed) * 1000:.1f}ms")
+    return 0
+
+
+def run_tags_command(args):
+    from collections import Counter
+
+    from .entry import write_index
+    from .index import CollectionIndex
+    from .manifest import Manifest
+    from .mirror import CollectionMirror
+    from .tags import retag_entry
+
+    manifest = Manifest(args.content_dir)
+    index = CollectionIndex(args.content_dir, CollectionMirror(args.content_dir)) if args.write else None
+    unknown = Counter()
+    removed = Counter()
+    changed_entries = 0
+    failed = []
+
+    for index_path in sorted(Path(args.content_dir).glob('*/index.md')):
+        slug = index_path.parent.name
+        with open(index_path, encoding='utf-8') as f:
+            text = f.read()
+        try:
+            updated, changed, result = retag_entry(text)
+        except ValueError as e:
+            print(f"Error: {slug}: {e}", file=sys.stderr)
+            failed.append(slug)
+            continue
+        if result is None:
+            continue
+        unknown.update(result['unknown'])
+        for kind, what in (('labels', 'label'), ('places', 'place'), ('dropped', 'dropped')):
+            removed.update(f"{name} ({what})" for name in result[kind])
+        if not changed:
+            continue
+        changed_entries += 1
+        print(f"{slug}:")
+        for path, (old, new) in changed.items():
+            print(f"  {path}: {old} -> {new}")
+        if args.write:
+            write_index(index_path, updated)
+            manifest.record_edit(slug, text, updated, changed)
+            index.update(slug, updated)
+
+    if unknown:
+        print("\nℹ Tags not in the vocabulary (kept as genres; add them to praesens/tags.py):")
+        for name, count in sorted(unknown.items(), key=lambda item: (-item[1], item[0])):
+            print(f"  {count:>4}  {name}")
+    if removed:
+        print("\nℹ Taken out of genres:")
+        for name, count in sorted(removed.items(), key=lambda item: (-item[1], item[0])):
+            print(f"  {count:>4}  {name}")
+
+    if args.write and changed_entries:
+        if manifest.entries:
+            manifest.save()
+        index.save()
+        print(f"\n✓ Rewrote the genres of {changed_entries} entries")
+    elif changed_entries:
+        print(f"\nℹ {changed_entries} entries would change; --write rewrites them")
+    else:
+        print("\n✓ All genres are canonical")
+    return 1 if failed else 0
+
+
+def run_validate_command(args):
+    import time
+
+    from .validate import cache_path_for, validate_collection
+
+    started = time.perf_counter()
+    cache_path = None if args.no_cache else cache_path_for(args.content_dir)
+    problems, checked = validate_collection(args.content_dir, cache_path, args.workers)
+    total = len(list(Path(args.content_dir).glob('*/index.md')))
+    elapsed = time.perf_counter() - started
+
+    for slug in sorted(problems):
+        print(f"{slug}:")
+        for problem in problems[slug]:
+            print(f"  - {problem}")
+    summary = f"{total} entries ({checked} checked, {total - checked} unchanged) in {elapsed:.2f}s"
+    if problems:
+        print(f"\nError: {len(problems)} of {summary} have problems", file=sys.stderr)
+        return 1
+    print(f"✓ {summary}, no problems")
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'content_dir', None):
+        from .index import site_root
+
+        try:
+            site_root(args.content_dir)
+        except ValueError as e:
+            parser.error(str(e))
+        # Only imports create entries; anything else would rebuild the site's files from nothing
+        if args.command not in ('import', 'sync', 'work') and not Path(args.content_dir).is_dir():
+            parser.error(f"{args.content_dir} does not exist")
+
+    if args.command in ('import', 'sync'):
+        if args.profile:
+            from .timing import profiled
+
+            return profiled(lambda: run_import_command(args, parser))
+        return run_import_command(args, parser)
+    if args.command == 'queue':
+        return run_queue_command(args, parser)
+    if args.command == 'work':
+        return run_work_command(args)
+    if args.command == 'regenerate':
+        return run_regenerate_command(args)
+    if args.command == 'validate':
+        return run_validate_command(args)
+    if args.command == 'duplicates':
+        return run_duplicates_command(args)
+    if args.command == 'tags':
+        return run_tags_command(args)
+    if args.command == 'query':
+        return run_query_command(args)
+    return run_index_command(args)
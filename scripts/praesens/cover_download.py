@@ -0,0 +1,158 @@
+"""
+Conditional, resumable cover art downloads.
+
+fetch_cover() sends If-None-Match/If-Modified-Since using the validators
+recorded for the previous download, streams the body to a .part file next to
+the entry (resuming it with a Range request if an earlier run was
+interrupted), and only renames it over cover.* when the SHA-256 differs from
+the file already there. A killed run therefore never leaves a half-written
+cover.jpg behind, and refreshing an unchanged collection transfers almost
+nothing.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import requests
+
+from .http_session import default_client
+from .timing import span
+
+CHUNK_SIZE = 64 * 1024
+
+
+def cover_extension(url):
+    """File extension to store a cover under."""
+    return '.png' if '.png' in url else '.jpg'
+
+
+def sha256_file(path):
+    """SHA-256 of a file, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def cover_validators(result):
+    """The parts of a fetch_cover() result worth persisting for the next run (and the link checker)."""
+    return {key: result.get(key) for key in ('url', 'etag', 'last_modified', 'sha256') if result.get(key)}
+
+
+def _headers(cover_path, part_path, validators):
+    """Conditional and range headers for a cover request."""
+    headers = {}
+    if cover_path.exists():
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    if part_path.exists() and part_path.stat().st_size:
+        # Only resume if the remote file is still the one we started on;
+        # If-Range makes the server send the whole file otherwise
+        if_range = _read_partial_validator(part_path)
+        if if_range:
+            headers['Range'] = f"bytes={part_path.stat().st_size}-"
+            headers['If-Range'] = if_range
+    return headers
+
+
+def _validator_path(part_path):
+    return part_path.with_name(part_path.name + '.validator')
+
+
+def _read_partial_validator(part_path):
+    try:
+        return _validator_path(part_path).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+
+
+def _clear_partial(part_path):
+    for path in (part_path, _validator_path(part_path)):
+        if path.exists():
+            path.unlink()
+
+
+class TruncatedDownload(Exception):
+    """The connection closed before the whole cover was received."""
+
+
+def fetch_cover(url, entry_dir, validators=None, http=None, retries=3):
+    """Download a cover into entry_dir and return the result with fresh validators.
+
+    The result dict has 'status' ('downloaded', 'not-modified' or 'unchanged'),
+    'path', 'etag', 'last_modified' and 'sha256'; pass it back as `validators`
+    on the next run to make the request conditional.
+    """
+    http = http or default_client()
+    validators = dict(validators or {})
+    entry_dir = Path(entry_dir)
+    cover_path = entry_dir / f"cover{cover_extension(url)}"
+    part_path = entry_dir / f".{cover_path.name}.part"
+
+    # HttpClient retries failed requests; this loop resumes transfers that break mid-stream
+    for attempt in range(retries + 1):
+        try:
+            return _fetch_once(http, url, cover_path, part_path, validators)
+        except (TruncatedDownload, requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            if attempt == retries:
+                raise
+        # Keep the .part file so the next attempt resumes where this one stopped
+        time.sleep(http.backoff_delay(attempt))
+
+
+def _fetch_once(http, url, cover_path, part_path, validators):
+    response = http.get(url, headers=_headers(cover_path, part_path, validators), stream=True)
+    if response.status_code == 304:
+        response.close()
+        return {
+            'status': 'not-modified',
+            'path': str(cover_path),
+            'etag': validators.get('etag'),
+            'last_modified': validators.get('last_modified'),
+            'sha256': validators.get('sha256') or sha256_file(cover_path),
+        }
+    if response.status_code == 416:
+        # Stale partial download the server can't resume; start over
+        response.close()
+        _clear_partial(part_path)
+        response = http.get(url, headers=_headers(cover_path, part_path, validators), stream=True)
+    response.raise_for_status()
+
+    with response:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        resumed = response.status_code == 206
+        if not resumed and (etag or last_modified):
+            _validator_path(part_path).write_text(etag or last_modified, encoding='utf-8')
+        expected = response.headers.get('Content-Length')
+        received = 0
+        with open(part_path, 'ab' if resumed else 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                received += len(chunk)
+        if expected is not None and 'Content-Encoding' not in response.headers and received < int(expected):
+            raise TruncatedDownload(f"Cover download truncated ({received}/{expected} bytes)")
+
+    with span('cover_hash', url=url):
+        digest = sha256_file(part_path)
+        unchanged = digest == sha256_file(cover_path)
+    result = {
+        'path': str(cover_path),
+        'etag': etag,
+        'last_modified': last_modified,
+        'sha256': digest,
+    }
+    if unchanged:
+        _clear_partial(part_path)
+        return dict(result, status='unchanged')
+    os.replace(part_path, cover_path)
+    _clear_partial(part_path)
+    return dict(result, status='downloaded')
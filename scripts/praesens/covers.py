@@ -0,0 +1,353 @@
+"""
+Exact and perceptual hashes of collection covers.
+
+For every entry's original cover.* this keeps a SHA-256 of the file and a
+64-bit perceptual hash (pHash: the signs of the lowest 8x8 DCT frequencies
+of a 32x32 greyscale copy, against their median) in the site's
+.cache/covers.json, together with the image size and contrast. Files are re-read only when
+their size or mtime changed, and decoded only when their SHA-256 is new, so
+refreshing a large collection mostly stats files. New covers are decoded in
+a process pool, JPEGs at a reduced scale (Image.draft), since the hash only
+needs 32x32 pixels.
+
+From the index:
+
+    duplicates()   byte-identical covers, and covers whose perceptual hashes
+                   are within NEAR_DISTANCE bits (the same artwork, re-encoded
+                   or resized), compared in batches with numpy
+    suspicious()   covers that are nearly blank, small or far from square,
+                   and Discogs covers taken from a secondary image (a back
+                   cover or label scan) when the release has a primary one
+    dedupe()       keeps one copy of byte-identical covers of the same album
+                   (of different albums too, when asked): the other entries
+                   lose their cover files and name the entry that has it as
+                   [album.cover] from, which the templates follow
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .entry import write_index
+from .frontmatter import parse_entry, set_table_block, toml_string
+from .index import site_root
+from .slugs import entry_slug
+from .validate import cover_files, shared_from
+
+# Relative to the site root
+DEFAULT_INDEX_PATH = '.cache/covers.json'
+# Bump when the hash changes; the index is then rebuilt
+INDEX_VERSION = 1
+HASH_SIZE = 8
+DCT_SIZE = 32
+NEAR_DISTANCE = 8  # differing bits (of 64) for "the same artwork"
+BLANK_STDEV = 8.0  # grey levels
+LOW_RESOLUTION = 300  # pixels on the short side
+MAX_ASPECT = 1.25
+# Below this many covers to hash, starting worker processes costs more than it saves
+POOL_THRESHOLD = 50
+BATCH = 1024
+DERIVATIVE = re.compile(r'^cover-\d+\.(webp|avif)$')
+RELEASE_ID = re.compile(r'/release/(\d+)')
+
+
+def _dct_matrix(size):
+    """Orthonormal DCT-II matrix: dct_matrix @ x is the DCT of a column vector x."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+DCT = _dct_matrix(DCT_SIZE)
+
+
+def hash_image(data):
+    """(phash as 16 hex digits, width, height, grey level standard deviation) of image bytes."""
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        # JPEGs decode straight to a fraction of their size; no effect on other formats
+        image.draft('L', (DCT_SIZE * 2, DCT_SIZE * 2))
+        grey = image.convert('L').resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS)
+    pixels = np.asarray(grey, dtype=np.float64)
+    low = (DCT @ pixels @ DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # The DC term is the average brightness; leave it out of the median
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}", width, height, float(pixels.std())
+
+
+def hash_cover(path):
+    """Index record for one cover file, or the exception reading it; runs in a worker process."""
+    try:
+        with open(path, 'rb') as f:
+            phash, width, height, stdev = hash_image(f.read())
+    except Exception as e:
+        return e
+    return {'phash': phash, 'width': width, 'height': height, 'stdev': round(stdev, 2)}
+
+
+def hamming_pairs(hashes, max_distance=NEAR_DISTANCE):
+    """(i, j, distance) for i < j whose 64-bit hashes differ in at most max_distance bits."""
+    values = np.array([int(h, 16) for h in hashes], dtype=np.uint64)
+    pairs = []
+    for start in range(0, len(values), BATCH):
+        block = values[start:start + BATCH, None] ^ values[None, :]
+        if hasattr(np, 'bitwise_count'):
+            distances = np.bitwise_count(block)
+        else:
+            distances = np.unpackbits(block.view(np.uint8), axis=1).reshape(len(block), len(values), 64).sum(axis=2)
+        rows, cols = np.nonzero(distances <= max_distance)
+        for i, j in zip(rows + start, cols):
+            if i < j:
+                pairs.append((int(i), int(j), int(distances[i - start, j])))
+    return pairs
+
+
+def original_cover(entry_dir):
+    """The cover an entry was downloaded with (not a derivative), or None."""
+    covers = cover_files(entry_dir)
+    return covers[0] if covers else None
+
+
+class CoverIndex:
+    """The cover hashes of one content directory, kept in .cache/covers.json."""
+
+    def __init__(self, content_dir='content/collection', path=None):
+        self.content_dir = Path(content_dir)
+        self.path = Path(path) if path else site_root(content_dir) / DEFAULT_INDEX_PATH
+        # slug -> {'name', 'size', 'mtime_ns', 'sha256'}; sha256 -> hash_cover() record
+        self.files = {}
+        self.hashes = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION and data.get('content_dir') == str(self.content_dir.resolve()):
+            self.files = data.get('files', {})
+            self.hashes = data.get('hashes', {})
+
+    def refresh(self, workers=None):
+        """Hash covers added or changed since the last refresh; returns counts."""
+        counts = {'unchanged': 0, 'known': 0, 'hashed': 0, 'removed': 0, 'failed': 0}
+        todo = {}
+        on_disk = set()
+        for index_path in sorted(self.content_dir.glob('*/index.md')):
+            slug = index_path.parent.name
+            cover = original_cover(index_path.parent)
+            if cover is None:
+                continue
+            on_disk.add(slug)
+            stat = cover.stat()
+            previous = self.files.get(slug)
+            if previous and [previous['name'], previous['size'], previous['mtime_ns']] == \
+                    [cover.name, stat.st_size, stat.st_mtime_ns]:
+                counts['unchanged'] += 1
+                continue
+            with open(cover, 'rb') as f:
+                sha256 = hashlib.sha256(f.read()).hexdigest()
+            self.files[slug] = {'name': cover.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                'sha256': sha256}
+            if sha256 in self.hashes:
+                counts['known'] += 1
+            else:
+                todo.setdefault(sha256, []).append((slug, cover))
+
+        for slug in set(self.files) - on_disk:
+            del self.files[slug]
+            counts['removed'] += 1
+
+        paths = [str(covers[0][1]) for covers in todo.values()]
+        if len(paths) >= POOL_THRESHOLD and (workers or os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(hash_cover, paths, chunksize=8))
+        else:
+            results = [hash_cover(path) for path in paths]
+
+        for (sha256, covers), result in zip(todo.items(), results):
+            if isinstance(result, Exception):
+                for slug, cover in covers:
+                    print(f"Warning: {slug}: can't read {cover.name}: {result}", file=sys.stderr)
+                    del self.files[slug]
+                counts['failed'] += len(covers)
+                continue
+            self.hashes[sha256] = result
+            counts['hashed'] += len(covers)
+
+        # Forget hashes of covers no entry has any more
+        used = {record['sha256'] for record in self.files.values()}
+        self.hashes = {sha256: record for sha256, record in self.hashes.items() if sha256 in used}
+        return counts
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'version': INDEX_VERSION,
+                'content_dir': str(self.content_dir.resolve()),
+                'files': self.files,
+                'hashes': self.hashes,
+            }, separators=(',', ':')))
+        os.replace(tmp_path, self.path)
+
+    def record(self, slug):
+        """Hash record of an entry's cover, with its sha256, or None."""
+        entry = self.files.get(slug)
+        if entry is None:
+            return None
+        return dict(self.hashes[entry['sha256']], sha256=entry['sha256'])
+
+    def duplicates(self, albums, max_distance=NEAR_DISTANCE):
+        """(exact, near) duplicate covers.
+
+        albums maps slug -> (artist, title). exact is [([slug, ...], same
+        album)] of byte-identical covers; near is [(distance, slug, slug, same
+        album)] of different files showing (nearly) the same image.
+        """
+        by_sha = {}
+        for slug, entry in sorted(self.files.items()):
+            by_sha.setdefault(entry['sha256'], []).append(slug)
+        exact = [(slugs, len({_album_key(albums, slug) for slug in slugs}) == 1)
+                 for slugs in by_sha.values() if len(slugs) > 1]
+
+        # One representative per distinct file
+        shas = sorted(by_sha)
+        near = []
+        for i, j, distance in hamming_pairs([self.hashes[sha]['phash'] for sha in shas], max_distance):
+            a, b = by_sha[shas[i]][0], by_sha[shas[j]][0]
+            near.append((distance, a, b, _album_key(albums, a) == _album_key(albums, b)))
+        return exact, sorted(near)
+
+    def suspicious(self, manifest=None, cache=None):
+        """{slug: [reason, ...]} for covers that may not be the album's front cover."""
+        flagged = {}
+        for slug in sorted(self.files):
+            record = self.record(slug)
+            reasons = []
+            if record['stdev'] < BLANK_STDEV:
+                reasons.append('nearly blank image')
+            if min(record['width'], record['height']) < LOW_RESOLUTION:
+                reasons.append(f"only {record['width']}x{record['height']}")
+            aspect = max(record['width'], record['height']) / max(1, min(record['width'], record['height']))
+            if aspect > MAX_ASPECT:
+                reasons.append(f"not square ({record['width']}x{record['height']})")
+            if manifest is not None and cache is not None:
+                reason = secondary_image(manifest.get(slug), cache)
+                if reason:
+                    reasons.append(reason)
+            if reasons:
+                flagged[slug] = reasons
+        return flagged
+
+
+def _album_key(albums, slug):
+    artist, title = albums.get(slug, ('', ''))
+    return entry_slug({'artist': artist or '', 'title': title or ''})
+
+
+def secondary_image(entry, cache):
+    """Why a Discogs entry's cover is probably not the front cover, from the cached release, or None."""
+    if not entry or entry.get('source') != 'discogs':
+        return None
+    match = RELEASE_ID.search(entry.get('url', ''))
+    body = cache.get('discogs-release', match.group(1), max_age=float('inf')) if match else None
+    if body is None:
+        return None
+    images = [image for image in json.loads(body).get('images') or [] if image.get('uri')]
+    primary = [image for image in images if image.get('type') == 'primary']
+    if not primary:
+        return None
+    # Entries imported before cover URLs were recorded got the release's first image
+    url = (entry.get('cover') or {}).get('url') or images[0]['uri']
+    if any(image['uri'] == url for image in primary):
+        return None
+    return 'a secondary Discogs image (back cover, label or insert), the release has a primary one: re-import it'
+
+
+def _cover_table(text):
+    return (parse_entry(text)[0].get('album') or {}).get('cover') or {}
+
+
+def share_cover(content_dir, slug, keeper, record, manifest=None):
+    """Replace an entry's cover files by a reference to keeper's identical cover; returns the bytes freed."""
+    entry_dir = Path(content_dir) / slug
+    index_path = entry_dir / 'index.md'
+    with open(index_path, encoding='utf-8') as f:
+        text = f.read()
+    # Identical images have identical placeholders; take whichever entry has one
+    placeholder = (_cover_table(text).get('placeholder')
+                   or _cover_table((Path(content_dir) / keeper / 'index.md').read_text(encoding='utf-8')).get(
+                       'placeholder'))
+    block = (
+        "[album.cover]\n"
+        f"width = {record['width']}\n"
+        f"height = {record['height']}\n"
+        + (f"placeholder = {toml_string(placeholder)}\n" if placeholder else '')
+        + f"from = {toml_string(keeper)}\n"
+        f"sha256 = {toml_string(record['sha256'])}\n"
+    )
+    updated = set_table_block(text, 'album.cover', block)
+    write_index(index_path, updated)
+    # Generated entries stay "generated" rather than looking hand-edited
+    if manifest is not None:
+        manifest.record_edit(slug, text, updated, {})
+
+    freed = 0
+    originals = set(cover_files(entry_dir))
+    for path in sorted(entry_dir.iterdir()):
+        if path in originals or DERIVATIVE.match(path.name):
+            freed += path.stat().st_size
+            path.unlink()
+    return freed
+
+
+def dedupe(index, exact, manifest=None, different_albums=False):
+    """Keep one copy of each group of byte-identical covers; returns (entries changed, bytes freed).
+
+    The first entry of each group (by slug) keeps its files. Groups of
+    different albums sharing a cover are often a wrong cover on one of them,
+    so they are left alone unless different_albums is set.
+    """
+    changed, freed = 0, 0
+    for slugs, same_album in exact:
+        if not (same_album or different_albums):
+            continue
+        keeper, *others = slugs
+        record = index.record(keeper)
+        for slug in others:
+            freed += share_cover(index.content_dir, slug, keeper, record, manifest)
+            del index.files[slug]
+            changed += 1
+    return changed, freed
+
+
+def shared_problems(content_dir, index):
+    """{slug: problem} for entries showing another entry's cover that is gone or has changed since."""
+    problems = {}
+    for index_path in sorted(Path(content_dir).glob('*/index.md')):
+        slug = index_path.parent.name
+        if slug in index.files:
+            continue
+        try:
+            frontmatter, _ = parse_entry(index_path.read_text(encoding='utf-8'))
+        except ValueError:
+            continue
+        keeper = shared_from(frontmatter)
+        if keeper is None:
+            continue
+        record = index.record(keeper)
+        if record is None:
+            problems[slug] = f"shows the cover of {keeper}, which has none"
+        elif frontmatter['album']['cover'].get('sha256') not in (None, record['sha256']):
+            problems[slug] = f"shows the cover of {keeper}, which has changed since the covers were deduplicated"
+    return problems
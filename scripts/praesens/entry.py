@@ -0,0 +1,256 @@
+"""
+Building and writing collection entries, shared by every source adapter.
+
+Adapters turn a source page into a data dict with the keys below and decide
+on links; everything else about an entry (slug, frontmatter fields, tracklist
+sides, merging into an existing index.md, cover download, manifest and search
+index bookkeeping) is the same for every source.
+
+    artist, title, release_year, description, cover_url, genres,
+    tracklist, label, catalog_number (optional), credits_text
+
+and optionally, from Discogs enrichment: artists (all of them),
+credit_sections ([(section, lines)], replacing credits_text), parent_labels,
+pressing_year (when release_year is the original year) and artist_profile;
+from Bandcamp: location (the band's home town).
+
+genres are raw tags or styles; praesens.tags turns them into canonical
+genres, and takes out labels, places and the artist's name.
+
+tracklist holds {'position', 'title', 'duration'} dicts (plus Discogs
+headings); praesens.tracklist lays them out into sides.
+"""
+
+import os
+import tempfile
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from .cover_download import cover_validators, fetch_cover
+from .frontmatter import entry_fields, merge_entry, parse_entry, render_entry
+from .manifest import edited_fields, hash_text
+from .matching import record_from_data
+from .slugs import entry_slug
+from .tags import canonical_tags
+from .timing import span
+from .tracklist import layout_sides
+
+PLACEHOLDER_BODY = "Album description."
+
+
+def entry_document(data, date, links):
+    """Frontmatter dict and markdown body for an entry.
+
+    links maps [album.links] keys to URLs, in output order.
+    """
+    sides = layout_sides(data['tracklist'])
+    tags = canonical_tags(data['genres'], [data['label'], *data.get('parent_labels', [])], data['artist'],
+                          data.get('location', ''))
+    genres = tags['genres'][:5]
+    # Bandcamp pages without a label line often still tag the label ("... Records")
+    label = data['label'] or (tags['labels'][0] if tags['labels'] else '')
+    if data.get('credit_sections'):
+        credits = [{'section': section, 'people': lines} for section, lines in data['credit_sections'] if lines]
+    else:
+        credit_lines = [line.strip() for line in (data['credits_text'] or '').split('\n') if line.strip()]
+        credits = [{'section': 'Credits', 'people': credit_lines[:20]}] if credit_lines else []
+
+    document = {
+        'title': data['title'],
+        'date': datetime.strptime(date or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date(),
+        'draft': False,
+        'description': data['description'][:200] if data['description'] else '',
+        'genres': genres,
+        # Hugo taxonomy terms for the per-genre/label/decade/artist listing pages
+        'labels': ([label] if label else []) + data.get('parent_labels', []),
+        'decades': [f"{int(data['release_year']) // 10 * 10}s"],
+        'artists': data.get('artists') or ([data['artist']] if data['artist'] else []),
+        'album': {
+            'artist': data['artist'],
+            'releaseYear': int(data['release_year']),
+            'label': label,
+            'catalogNumber': data.get('catalog_number', ''),
+            'genres': genres,
+            'links': dict(links),
+        },
+    }
+    if data.get('pressing_year'):
+        document['album']['pressingYear'] = int(data['pressing_year'])
+    if data.get('artist_profile'):
+        document['album']['artistProfile'] = data['artist_profile']
+    if sides:
+        document['album']['tracklist'] = sides
+    if credits:
+        document['album']['credits'] = credits
+
+    # Add description as content
+    body = data['description'] if data['description'] else PLACEHOLDER_BODY
+    return document, body
+
+
+def updated_entry(index_path, document, body, entry=None, force=False):
+    """index.md text for a generated entry, merged into the file on disk if there is one.
+
+    entry is the manifest record for the slug (None for hand-made entries).
+    Fields edited by hand are kept unless force is set. Returns (text, kept
+    field paths).
+    """
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            text = f.read()
+    except FileNotFoundError:
+        return render_entry(document, body), set()
+
+    try:
+        existing, existing_body = parse_entry(text)
+    except ValueError:
+        # Generated before TOML strings were fully escaped: safe to replace if untouched since
+        if entry and entry.get('output_hash') == hash_text(text):
+            return render_entry(document, body), set()
+        raise ValueError(f"{index_path} has invalid frontmatter, fix it by hand before re-importing")
+
+    kept = set()
+    if not force:
+        generated = entry_fields(document, body)
+        kept = edited_fields(entry, entry_fields(existing, existing_body), text) & set(generated)
+    return merge_entry(existing, existing_body, document, body, kept), kept
+
+
+def download_cover(data, entry_dir, download=fetch_cover, validators=None):
+    """Download the cover image into the entry directory, skipping unchanged covers."""
+    if not data['cover_url']:
+        return None
+    try:
+        print(f"Downloading cover image...")
+        with span('cover_download', url=data['cover_url']):
+            result = dict(download(data['cover_url'], entry_dir, validators), url=data['cover_url'])
+        if result['status'] == 'downloaded':
+            print(f"✓ Cover image saved to {result['path']}")
+        else:
+            print("✓ Cover image unchanged")
+        return result
+    except Exception as e:
+        print(f"Warning: Failed to download cover image: {e}")
+        return None
+
+
+def filled_entry(index_path, document, body):
+    """index.md text for another source's data merged into an existing entry.
+
+    Only fields that are empty or missing in the entry are filled in, such as
+    the Bandcamp link of an album first imported from Discogs. Returns
+    (text, filled field paths).
+    """
+    with open(index_path, encoding='utf-8') as f:
+        existing, existing_body = parse_entry(f.read())
+    keep = {path for path, value in entry_fields(existing, existing_body).items() if not _is_empty(path, value)}
+    filled = {path for path, value in entry_fields(document, body).items()
+              if path not in keep and not _is_empty(path, value)}
+    return merge_entry(existing, existing_body, document, body, keep), filled
+
+
+def _is_empty(path, value):
+    return value in ('', [], None) or (path == 'body' and value == PLACEHOLDER_BODY)
+
+
+def write_index(index_path, text):
+    """Replace index.md atomically, so an interrupted import never leaves half an entry."""
+    # A temp file of its own, so concurrent writers of the same entry never share one
+    f = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=index_path.parent, prefix=f"{index_path.name}.",
+                                    suffix='.tmp', delete=False)
+    try:
+        with f:
+            f.write(text)
+        # mkstemp files are private (0600); keep the entry readable like the one it replaces
+        try:
+            mode = index_path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(f.name, mode)
+        os.replace(f.name, index_path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+def write_entry(source, data, content_dir='content/collection', manifest=None, index=None, options=None,
+                matches=None):
+    """Create (or update) the collection entry for a source's data; returns the slug.
+
+    With a MatchIndex, data that duplicates an existing entry is written to
+    that entry; if the entry came from another source (or another release),
+    only its empty fields are filled in.
+    """
+    # Only keep the options this source renders, e.g. a --youtube override for Discogs
+    options = {key: value for key, value in (options or {}).items() if key in source.options and value}
+
+    # Create slug for directory
+    slug = entry_slug(data)
+    reasons = []
+    if matches is not None:
+        slug, reasons = matches.claim(record_from_data(data), slug)
+    with matches.slug_lock(slug) if matches is not None else nullcontext():
+        entry = manifest.get(slug) if manifest is not None else None
+        url = source.url_for(data)
+        if entry and (entry['source'] != source.name or source.source_key(entry['url']) != source.source_key(url)):
+            print(f"ℹ {url} matches {slug} from {entry['source']} ({', '.join(reasons) or 'same slug'})")
+            return _fill_entry(source, data, content_dir, slug, manifest, index, options)
+        if reasons:
+            print(f"ℹ {url} matches {slug} ({', '.join(reasons)})")
+        return _write_entry(source, data, content_dir, slug, entry, manifest, index, options)
+
+
+def _write_entry(source, data, content_dir, slug, entry, manifest, index, options):
+    entry_dir = Path(content_dir) / slug
+    entry_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Creating entry in {entry_dir}...")
+
+    # Download cover image
+    validators = manifest.cover_validators(slug) if manifest is not None else None
+    cover = download_cover(data, entry_dir, source.download, validators)
+
+    # Keep the original entry date when re-importing
+    date = (entry or {}).get('date') or datetime.now().strftime('%Y-%m-%d')
+    index_path = entry_dir / 'index.md'
+    with span('render', slug=slug):
+        document, body = source.document(data, date, options)
+        # Keep fields edited by hand
+        output, kept = updated_entry(index_path, document, body, entry)
+    if kept:
+        print(f"ℹ Keeping hand-edited {', '.join(sorted(kept))}")
+
+    with span('write', slug=slug):
+        write_index(index_path, output)
+        if index is not None:
+            index.update(slug, output)
+    if manifest is not None:
+        manifest.record(slug, source.name, source.url_for(data), data, output, source.template_version, date,
+                        options, cover_validators(cover) if cover else None, entry_fields(document, body))
+
+    print(f"✓ Created {index_path}")
+    return slug
+
+
+def _fill_entry(source, data, content_dir, slug, manifest, index, options):
+    entry_dir = Path(content_dir) / slug
+    index_path = entry_dir / 'index.md'
+    # The entry's own source owns its cover
+    if not any(entry_dir.glob('cover.*')):
+        download_cover(data, entry_dir, source.download)
+
+    with span('render', slug=slug):
+        document, body = source.document(data, manifest.get(slug).get('date'), options)
+        output, filled = filled_entry(index_path, document, body)
+    with span('write', slug=slug):
+        write_index(index_path, output)
+        if index is not None:
+            index.update(slug, output)
+    manifest.record_merge(slug, source.name, source.url_for(data), data)
+
+    if filled:
+        print(f"✓ Filled in {', '.join(sorted(filled))} in {index_path}")
+    else:
+        print(f"✓ Nothing to add to {index_path}")
+    return slug
@@ -0,0 +1,214 @@
+"""
+Reading, writing and merging the TOML frontmatter of collection entries.
+
+Entries are written as:
+
+    +++
+    <toml>
+    +++
+
+    <description>
+
+dumps() serializes the subset of TOML entries use (strings, numbers, booleans,
+dates, arrays and tables) with full string escaping, so notes with newlines
+or control characters always produce valid TOML. merge_entry() folds freshly
+generated fields into an existing index.md without touching fields that were
+edited by hand or that the importers don't generate (such as [album.cover]).
+"""
+
+import re
+from datetime import date, datetime
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+DELIMITER = '+++'
+
+# Lists that read better with one item per line
+MULTILINE_ARRAYS = {'tracks', 'people'}
+BARE_KEY = re.compile(r'^[A-Za-z0-9_-]+$')
+ESCAPES = {'"': '\\"', '\\': '\\\\', '\b': '\\b', '\t': '\\t', '\n': '\\n', '\f': '\\f', '\r': '\\r'}
+NEEDS_ESCAPE = re.compile(r'["\\\x00-\x1f\x7f]')
+
+
+def split_entry(text):
+    """Split index.md text into (frontmatter, body)."""
+    if not text.startswith(DELIMITER):
+        raise ValueError('Entry has no +++ frontmatter block')
+    end = text.find(f"\n{DELIMITER}", len(DELIMITER))
+    if end == -1:
+        raise ValueError('Entry has no closing +++ line')
+    frontmatter = text[len(DELIMITER) + 1:end + 1]
+    body = text[end + len(DELIMITER) + 1:]
+    return frontmatter, body
+
+
+def parse_entry(text):
+    """Parse index.md text into (frontmatter dict, body)."""
+    frontmatter, body = split_entry(text)
+    return tomllib.loads(frontmatter), body
+
+
+def join_entry(frontmatter, body):
+    """Inverse of split_entry()."""
+    return f"{DELIMITER}\n{frontmatter}{DELIMITER}{body}"
+
+
+def _table_pattern(header):
+    # A table runs from its [header] line up to the next table header or the end
+    return re.compile(
+        rf"^\[{re.escape(header)}\]\n.*?(?=^\[|\Z)",
+        re.MULTILINE | re.DOTALL,
+    )
+
+
+def get_table_block(text, header):
+    """Return the raw `[header]` table block from an entry, or None."""
+    frontmatter, _ = split_entry(text)
+    match = _table_pattern(header).search(frontmatter)
+    return match.group(0) if match else None
+
+
+def set_table_block(text, header, block):
+    """Replace (or append) the `[header]` table block in an entry's frontmatter."""
+    frontmatter, body = split_entry(text)
+    block = block.rstrip('\n') + '\n'
+    pattern = _table_pattern(header)
+    if pattern.search(frontmatter):
+        frontmatter = pattern.sub(lambda _: block + '\n', frontmatter, count=1)
+        frontmatter = frontmatter.rstrip('\n') + '\n'
+    else:
+        frontmatter = frontmatter.rstrip('\n') + '\n\n' + block
+    return join_entry(frontmatter, body)
+
+
+def set_value(text, header, key, value):
+    """Replace `key = ...` in the `[header]` table (the top level when header is None), leaving the rest as is.
+
+    Values spanning several lines (arrays) are replaced whole. Raises
+    KeyError when the table has no such key.
+    """
+    frontmatter, body = split_entry(text)
+    if header is None:
+        table = re.match(r".*?(?=^\[|\Z)", frontmatter, re.MULTILINE | re.DOTALL)
+    else:
+        table = _table_pattern(header).search(frontmatter)
+    line = re.compile(rf"^{re.escape(toml_key(key))}[ \t]*=[ \t]*(?:\[[^\]]*\]|[^\n]*)", re.MULTILINE)
+    match = line.search(frontmatter, *table.span()) if table else None
+    if match is None:
+        raise KeyError(f"{header + '.' if header else ''}{key}")
+    frontmatter = f"{frontmatter[:match.start()]}{toml_key(key)} = {toml_value(value)}{frontmatter[match.end():]}"
+    return join_entry(frontmatter, body)
+
+
+def _escape_char(match):
+    char = match.group(0)
+    return ESCAPES.get(char) or f"\\u{ord(char):04x}"
+
+
+def toml_string(text):
+    """A TOML basic string, escaping quotes, backslashes and control characters."""
+    return '"' + NEEDS_ESCAPE.sub(_escape_char, text) + '"'
+
+
+def toml_key(key):
+    return key if BARE_KEY.match(key) else toml_string(key)
+
+
+def toml_value(value):
+    """Inline TOML for a scalar or an array of scalars."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return toml_string(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return '[' + ', '.join(toml_value(item) for item in value) + ']'
+    raise TypeError(f"Cannot serialize {type(value).__name__} to TOML")
+
+
+def _is_table_array(value):
+    return isinstance(value, list) and value and all(isinstance(item, dict) for item in value)
+
+
+def _dump_table(table, path, lines):
+    # Plain keys first: anything after a [header] belongs to that table
+    for key, value in table.items():
+        if isinstance(value, dict) or _is_table_array(value):
+            continue
+        if key in MULTILINE_ARRAYS and isinstance(value, list) and value:
+            lines.append(f"{toml_key(key)} = [")
+            lines.append(',\n'.join(f"  {toml_value(item)}" for item in value))
+            lines.append(']')
+        else:
+            lines.append(f"{toml_key(key)} = {toml_value(value)}")
+
+    for key, value in table.items():
+        name = f"{path}.{toml_key(key)}" if path else toml_key(key)
+        if isinstance(value, dict):
+            # Tables with only sub-tables still get a header so key order survives a round trip
+            lines.extend(['', f"[{name}]"])
+            _dump_table(value, name, lines)
+        elif _is_table_array(value):
+            for item in value:
+                lines.extend(['', f"[[{name}]]"])
+                _dump_table(item, name, lines)
+
+
+def dumps(document):
+    """Serialize a frontmatter dict to TOML text (ending with a newline)."""
+    lines = []
+    _dump_table(document, '', lines)
+    return '\n'.join(lines).lstrip('\n') + '\n'
+
+
+def render_entry(document, body):
+    """Full index.md text for a frontmatter dict and a markdown body."""
+    return join_entry(dumps(document), f"\n\n{body}")
+
+
+def entry_fields(document, body):
+    """Flatten an entry into {dotted path: value}; tables recurse, everything else is one field.
+
+    Arrays of tables such as album.tracklist count as a single field, and the
+    markdown body is the field 'body'.
+    """
+    fields = {}
+
+    def walk(table, prefix):
+        for key, value in table.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                walk(value, path + '.')
+            else:
+                fields[path] = value
+
+    walk(document, '')
+    fields['body'] = body.strip('\n')
+    return fields
+
+
+def merge_entry(existing, existing_body, document, body, keep=()):
+    """Merge a generated frontmatter dict and body into a parsed existing entry.
+
+    Generated fields overwrite the existing ones except for the paths in keep
+    (hand-edited fields); fields the importers don't generate are left as they
+    are. Returns the new index.md text.
+    """
+    for path, value in entry_fields(document, body).items():
+        if path in keep:
+            continue
+        if path == 'body':
+            existing_body = value
+            continue
+        *tables, key = path.split('.')
+        table = existing
+        for name in tables:
+            table = table.setdefault(name, {})
+        table[key] = value
+    return render_entry(existing, existing_body.strip('\n'))
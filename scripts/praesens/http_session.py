@@ -0,0 +1,109 @@
+"""
+Shared HTTP layer for the importers.
+
+HttpClient wraps one pooled keep-alive requests.Session, so metadata requests
+(Discogs API, Bandcamp pages) and cover downloads (i.discogs.com, bcbits.com)
+reuse TLS connections across a whole batch instead of handshaking per release.
+Requests that fail with 429/5xx or a connection error are retried with
+exponential backoff and full jitter, honoring Retry-After when the server
+sends one.
+
+Usage:
+    http = HttpClient()
+    response = http.get(url)
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'PraesensCollectionScript/1.0'
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(response):
+    """Seconds to wait according to a Retry-After header, or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HttpClient:
+    """Pooled session with timeouts and retry/backoff on transient failures."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=4, backoff=1.0, max_backoff=60.0,
+                 pool_size=16, sleep=time.sleep):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        # One adapter for every host: connections are kept alive per host up to pool_size
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff_delay(self, attempt, response=None):
+        """Full-jitter exponential backoff, or the server's Retry-After if given."""
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, **kwargs):
+        """Send a request, retrying transient failures.
+
+        Returns the final response; a response that is still 429/5xx after
+        all retries is returned as-is for the caller to handle.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                self.sleep(self.backoff_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            delay = self.backoff_delay(attempt, response)
+            response.close()
+            self.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Process-wide shared client, created on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
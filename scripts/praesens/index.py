@@ -0,0 +1,150 @@
+"""
+Precomputed search index for the collection.
+
+The importers keep static/collection-index.json up to date as they write
+entries, and static/js/collection-search.js loads it lazily on the collection
+page to search artist, title, year, label, genres and track titles without
+Hugo rendering any filter pages. The file stores one row per album under a
+shared field list to stay compact:
+
+    {"version": 1, "fields": ["slug", "artist", ...], "albums": [[...], ...]}
+
+Rebuild it from every entry (including hand-made ones) with:
+    uv run scripts/collection.py index
+
+A rebuild reads the entries from the SQLite mirror (see praesens.mirror)
+after refreshing it, so only entries changed since the last refresh are
+parsed. CollectionIndex writes entries through to the mirror as well.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from .frontmatter import parse_entry
+
+INDEX_VERSION = 1
+# Files that mark a Hugo site's root directory
+SITE_CONFIGS = ('hugo.toml', 'config.toml', 'hugo.yaml', 'hugo.yml', 'hugo.json', 'config.yaml', 'config.yml',
+                'config.json')
+FIELDS = ['slug', 'artist', 'title', 'year', 'label', 'genres', 'tracks']
+# "A1. ", "B5.a. " (sub-tracks); group 1 is the position
+TRACK_POSITION = re.compile(r'^\s*([\w-]+(?:\.[\w-]+)*)\.\s+')
+
+
+def site_root(content_dir):
+    """Hugo site root for a content/collection directory: the nearest directory above it with a site config.
+
+    Raises ValueError when the content directory is not inside a Hugo site.
+    """
+    content_dir = Path(content_dir).resolve()
+    for directory in content_dir.parents:
+        if any((directory / name).is_file() for name in SITE_CONFIGS) or (directory / 'config' / '_default').is_dir():
+            return directory
+    raise ValueError(f"{content_dir} is not inside a Hugo site (no {' or '.join(SITE_CONFIGS[:2])} above it)")
+
+
+def index_path_for(content_dir):
+    return site_root(content_dir) / 'static' / 'collection-index.json'
+
+
+def album_row(slug, frontmatter):
+    """Index row for an entry, in FIELDS order."""
+    album = frontmatter.get('album', {})
+    tracks = []
+    for side in album.get('tracklist', []):
+        # "A1. Title" -> "Title"
+        tracks.extend(TRACK_POSITION.sub('', track) for track in side.get('tracks', []))
+    return [
+        slug,
+        album.get('artist', ''),
+        frontmatter.get('title', ''),
+        album.get('releaseYear', ''),
+        album.get('label', ''),
+        album.get('genres', []),
+        tracks,
+    ]
+
+
+class CollectionIndex:
+    """In-memory view of collection-index.json; safe to update from worker threads.
+
+    With a CollectionMirror, updates are written through to it too.
+    """
+
+    def __init__(self, content_dir='content/collection', mirror=None):
+        self.path = index_path_for(content_dir)
+        self.mirror = mirror
+        self.lock = threading.Lock()
+        self.rows = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION and index.get('fields') == FIELDS:
+                self.rows = {row[0]: row for row in index['albums']}
+
+    def update(self, slug, text):
+        """Index (or re-index) an entry from its index.md text."""
+        frontmatter, _ = parse_entry(text)
+        with self.lock:
+            if frontmatter.get('draft'):
+                self.rows.pop(slug, None)
+            else:
+                self.rows[slug] = album_row(slug, frontmatter)
+        if self.mirror is not None:
+            self.mirror.update(slug, text)
+
+    def remove(self, slug):
+        with self.lock:
+            self.rows.pop(slug, None)
+        if self.mirror is not None:
+            self.mirror.remove(slug)
+
+    def save(self):
+        """Write the index atomically, sorted by slug for stable diffs."""
+        with self.lock:
+            index = {
+                'version': INDEX_VERSION,
+                'fields': FIELDS,
+                'albums': [self.rows[slug] for slug in sorted(self.rows)],
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+                f.write('\n')
+            os.replace(tmp_path, self.path)
+
+
+def mirror_rows(mirror):
+    """Index rows for every published entry in a CollectionMirror."""
+    rows = {
+        slug: [slug, artist, title, '' if year is None else year, label, [], []]
+        for slug, artist, title, year, label in mirror.execute(
+            'SELECT slug, artist, title, release_year, label FROM albums WHERE draft = 0'
+        )
+    }
+    for slug, genre in mirror.execute('SELECT slug, genre FROM genres ORDER BY slug, seq'):
+        if slug in rows:
+            rows[slug][5].append(genre)
+    for slug, title in mirror.execute('SELECT slug, title FROM tracks ORDER BY slug, seq'):
+        if slug in rows:
+            rows[slug][6].append(title)
+    return rows
+
+
+def rebuild_index(content_dir='content/collection', mirror=None):
+    """Re-index every entry from scratch, from the mirror when one is given."""
+    index = CollectionIndex(content_dir)
+    if mirror is not None:
+        mirror.refresh()
+        index.rows = mirror_rows(mirror)
+    else:
+        index.rows = {}
+        for index_path in sorted(Path(content_dir).glob('*/index.md')):
+            index.update(index_path.parent.name, index_path.read_text(encoding='utf-8'))
+    index.save()
+    return index
+
@@ -0,0 +1,313 @@
+"""
+Persistent import job queue and the worker that drains it.
+
+URLs queued with `collection.py queue add` are rows in a SQLite file under
+.cache/ (URL, source, options, status, attempts, last error, the time the
+job may next run). `collection.py work` runs them through the same
+fetch/write path as an import:
+
+    pending -> running -> done
+                       -> pending again after a failure, with exponential
+                          backoff, until max_attempts -> failed
+
+Progress is checkpointed every few jobs: the manifest and search index are
+saved first, then the jobs written since the last checkpoint are marked
+done in one transaction. A worker that is killed therefore loses at most
+the jobs since its last checkpoint; on the next start, jobs left 'running'
+go back to 'pending' and are imported again, which rewrites the same
+entries.
+
+Jobs whose source is out of rate-limit tokens are not started: they are
+parked (put back with a not-before time) and the worker takes jobs of other
+sources, or cached ones, until the slot opens. A 429 that survived the HTTP
+layer's retries parks the job for its Retry-After without counting an
+attempt.
+
+Only one worker should drain a queue file at a time.
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .entry import write_entry
+from .http_session import retry_after_seconds
+from .sources import source_name
+
+DEFAULT_QUEUE_PATH = '.cache/jobs.sqlite'
+MAX_ATTEMPTS = 5
+RETRY_BASE = 30  # seconds before the first retry, doubled per attempt
+RETRY_MAX = 3600
+# Longest a worker sleeps before looking at the queue again
+IDLE_POLL = 5
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+
+def retry_delay(attempts):
+    return min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1))
+
+
+class JobQueue:
+    """SQLite-backed queue of import jobs; safe to use from worker threads."""
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                source TEXT NOT NULL,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                slug TEXT,
+                not_before REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.execute('CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, not_before)')
+        self.db.commit()
+
+    def add(self, urls, options=None):
+        """Queue URLs that are not queued yet; returns how many were added."""
+        now = time.time()
+        options = json.dumps(options or {}, sort_keys=True)
+        with self.lock:
+            before = self.db.total_changes
+            self.db.executemany(
+                'INSERT OR IGNORE INTO jobs (url, source, options, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(url, source_name(url), options, now, now) for url in urls],
+            )
+            self.db.commit()
+            return self.db.total_changes - before
+
+    def recover(self):
+        """Put jobs a killed worker left running back in the queue; returns how many."""
+        with self.lock:
+            count = self.db.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'", (time.time(),)
+            ).rowcount
+            self.db.commit()
+            return count
+
+    def claim(self, skip_sources=()):
+        """Next job that may run now (as a dict, marked running), or None."""
+        now = time.time()
+        skip = list(skip_sources)
+        query = "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ?"
+        if skip:
+            query += f" AND source NOT IN ({', '.join('?' * len(skip))})"
+        query += ' ORDER BY not_before, id LIMIT 1'
+        with self.lock:
+            row = self.db.execute(query, [now, *skip]).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (now, row['id']))
+            self.db.commit()
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        return job
+
+    def park(self, job_id, until):
+        """Put a job back without counting an attempt, to run no earlier than until."""
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET status = 'pending', not_before = ?, updated_at = ? WHERE id = ?",
+                (until, time.time(), job_id),
+            )
+            self.db.commit()
+
+    def fail(self, job_id, error, permanent=False):
+        """Record a failed attempt; returns 'pending' if the job will be retried, else 'failed'.
+
+        permanent fails the job right away, for errors retrying can't fix.
+        """
+        now = time.time()
+        with self.lock:
+            attempts = self.db.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()[0] + 1
+            status = 'failed' if permanent or attempts >= self.max_attempts else 'pending'
+            self.db.execute(
+                'UPDATE jobs SET status = ?, attempts = ?, last_error = ?, not_before = ?, updated_at = ? WHERE id = ?',
+                (status, attempts, str(error), now + retry_delay(attempts), now, job_id),
+            )
+            self.db.commit()
+        return status
+
+    def complete(self, written):
+        """Mark [(job id, slug)] done in one transaction."""
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "UPDATE jobs SET status = 'done', slug = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                [(slug, now, job_id) for job_id, slug in written],
+            )
+            self.db.commit()
+
+    def retry_failed(self):
+        """Give failed jobs a fresh set of attempts; returns how many."""
+        with self.lock:
+            count = self.db.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, not_before = 0, updated_at = ? "
+                "WHERE status = 'failed'", (time.time(),)
+            ).rowcount
+            self.db.commit()
+            return count
+
+    def next_ready_at(self, skip_sources=()):
+        """Earliest time a pending job may run, or None when nothing is pending."""
+        skip = list(skip_sources)
+        query = "SELECT MIN(not_before) FROM jobs WHERE status = 'pending'"
+        if skip:
+            query += f" AND source NOT IN ({', '.join('?' * len(skip))})"
+        with self.lock:
+            return self.db.execute(query, skip).fetchone()[0]
+
+    def counts(self):
+        with self.lock:
+            rows = self.db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def errors(self, limit=20):
+        """(url, status, attempts, last error) of jobs that failed at least once, most recent first."""
+        with self.lock:
+            return self.db.execute(
+                "SELECT url, status, attempts, last_error FROM jobs WHERE last_error IS NOT NULL "
+                "ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def retry_after(error):
+    """Seconds a 429 asked us to wait, or None if error is not a 429.
+
+    requests' HTTPError carries the response and its Retry-After header;
+    discogs_client's HTTPError only has a status_code, so RETRY_BASE it is.
+    """
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        delay = retry_after_seconds(response)
+        return RETRY_BASE if delay is None else delay
+    if getattr(error, 'status_code', None) == 429:
+        return RETRY_BASE
+    return None
+
+
+def run_worker(queue, sources, content_dir='content/collection', cache=None, manifest=None, index=None,
+               workers=4, matches=None, checkpoint_every=25, checkpoint_seconds=30, wait_for_jobs=False):
+    """Import queued jobs until the queue is drained (or forever with wait_for_jobs); returns stats.
+
+    sources only needs for_url(); each source is used through the
+    SourceAdapter interface, so a fake adapter can stand in for the real
+    ones. Ctrl-C lets running jobs finish and checkpoints before returning.
+    """
+    stats = {'done': 0, 'retried': 0, 'failed': 0, 'parked': 0, 'recovered': queue.recover()}
+    written = []
+    last_checkpoint = time.monotonic()
+    # source name -> time.time() its rate limiter has a token again
+    blocked = {}
+    running = {}
+
+    def run_job(source, job):
+        data = source.fetch(job['url'], cache, False, job['options'])
+        return write_entry(source, data, content_dir, manifest, index, job['options'], matches)
+
+    def checkpoint():
+        nonlocal last_checkpoint
+        if manifest is not None:
+            manifest.save()
+        if index is not None:
+            index.save()
+        queue.complete(written)
+        written.clear()
+        last_checkpoint = time.monotonic()
+
+    def finish(future, job):
+        try:
+            slug = future.result()
+        except Exception as e:
+            delay = retry_after(e)
+            if delay is not None:
+                queue.park(job['id'], time.time() + delay)
+                stats['parked'] += 1
+                return
+            status = queue.fail(job['id'], e)
+            stats['retried' if status == 'pending' else 'failed'] += 1
+            print(f"Error: {job['url']}: {e}" + (' (will retry)' if status == 'pending' else ''), file=sys.stderr)
+            return
+        written.append((job['id'], slug))
+        stats['done'] += 1
+
+    if stats['recovered']:
+        print(f"ℹ Resuming {stats['recovered']} jobs left running by an interrupted worker")
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job') as pool:
+            while True:
+                now = time.time()
+                for name in [name for name, until in blocked.items() if until <= now]:
+                    del blocked[name]
+
+                while len(running) < workers:
+                    job = queue.claim(skip_sources=blocked)
+                    if job is None:
+                        break
+                    try:
+                        source = sources.for_url(job['url'])
+                        source.source_key(job['url'])
+                        needs_request = source.needs_request(job['url'], cache)
+                    except Exception as e:
+                        # A URL no adapter can import, or a source without a dry-run mode: retrying won't help
+                        status = queue.fail(job['id'], e, permanent=isinstance(e, ValueError))
+                        stats['retried' if status == 'pending' else 'failed'] += 1
+                        print(f"Error: {job['url']}: {e}" + (' (will retry)' if status == 'pending' else ''),
+                              file=sys.stderr)
+                        continue
+                    if needs_request:
+                        delay = source.bucket.try_acquire()
+                        if delay:
+                            # Out of tokens: park it and take jobs from other sources until the slot opens
+                            blocked[job['source']] = time.time() + delay
+                            queue.park(job['id'], blocked[job['source']])
+                            stats['parked'] += 1
+                            continue
+                    running[pool.submit(run_job, source, job)] = job
+
+                if running:
+                    finished, _ = wait(running, timeout=IDLE_POLL, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        finish(future, running.pop(future))
+                else:
+                    ready_at = queue.next_ready_at(skip_sources=blocked)
+                    if ready_at is None and not blocked and not wait_for_jobs:
+                        break
+                    wake = min([ready_at or float('inf'), *blocked.values()])
+                    time.sleep(min(IDLE_POLL, max(0.05, wake - time.time())))
+
+                if written and (len(written) >= checkpoint_every
+                                or time.monotonic() - last_checkpoint >= checkpoint_seconds):
+                    checkpoint()
+    except KeyboardInterrupt:
+        # Leaving the with block waited for the running jobs
+        print("\nℹ Interrupted, saving progress...")
+        for future, job in running.items():
+            if future.done():
+                finish(future, job)
+    finally:
+        checkpoint()
+    return stats
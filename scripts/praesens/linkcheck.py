@@ -0,0 +1,229 @@
+"""
+Link health checks for collection entries.
+
+Every [album.links] URL (Spotify, Bandcamp, Apple Music, YouTube, ...) and
+the cover URL each entry was downloaded from (recorded in .sources.json) is
+requested concurrently on one asyncio event loop:
+
+    - HEAD first; when that fails with an HTTP error, GET, since plenty of
+      servers answer HEAD with 403/405 (or 404) for pages that exist
+    - at most `per_host` requests in flight per host, and request starts to
+      one host spaced `delay` seconds apart
+    - 429/503 pause the whole host for Retry-After (or a backoff) and retry
+    - YouTube videos are checked through the oEmbed endpoint, because a
+      watch page answers 200 for removed videos too
+
+A link is 'dead' on 404/410, 'error' for anything else that didn't work
+(403, 5xx, timeouts, hosts that don't resolve; often temporary, bot
+blocking or being offline), and 'ok' otherwise. Results are kept in .cache/links.json
+with a time to recheck: OK links after RECHECK_OK, failing ones sooner, each
+spread by a random share so links checked together don't all go stale on
+the same day. A re-run only requests links that are due.
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+
+from .http_session import USER_AGENT, retry_after_seconds
+
+# Relative to the site root
+DEFAULT_CACHE_PATH = '.cache/links.json'
+CACHE_VERSION = 1
+DAY = 24 * 3600
+RECHECK_OK = 14 * DAY
+RECHECK_FAILED = 1 * DAY
+RECHECK_JITTER = 0.3
+PER_HOST = 4
+HOST_DELAY = 0.1  # seconds between request starts to one host
+CONNECTIONS = 100
+TIMEOUT = 20  # seconds per request
+RETRIES = 2  # for 429/503
+RETRY_BASE = 2.0
+RETRY_MAX = 60.0
+RETRY_STATUSES = {429, 503}
+DEAD_STATUSES = {404, 410}
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtu.be'}
+
+
+def collection_links(mirror, manifest):
+    """{url: [(slug, service), ...]} for every album link and recorded cover URL of current entries."""
+    links = {}
+    for slug, service, url in mirror.execute('SELECT slug, service, url FROM links ORDER BY slug, service'):
+        links.setdefault(url, []).append((slug, service))
+    slugs = {slug for (slug,) in mirror.execute('SELECT slug FROM albums')}
+    for slug in sorted(slugs & manifest.entries.keys()):
+        url = (manifest.get(slug).get('cover') or {}).get('url')
+        if url:
+            links.setdefault(url, []).append((slug, 'cover'))
+    return {url: used_by for url, used_by in links.items() if urlsplit(url).scheme in ('http', 'https')}
+
+
+def check_target(url):
+    """URL to request to find out whether url works."""
+    parts = urlsplit(url)
+    if parts.hostname in YOUTUBE_HOSTS and (parts.path == '/watch' or parts.hostname == 'youtu.be'):
+        return f"https://www.youtube.com/oembed?format=json&url={quote(url, safe='')}"
+    return url
+
+
+def verdict(result):
+    status = result.get('status')
+    if status is not None and status < 400:
+        return 'ok'
+    if status in DEAD_STATUSES:
+        return 'dead'
+    return 'error'
+
+
+class LinkCache:
+    """Check results by URL in .cache/links.json."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.links = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.links = data.get('links', {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, url):
+        return self.links.get(url)
+
+    def due(self, urls, now=None):
+        """The urls never checked or due for a recheck."""
+        now = time.time() if now is None else now
+        return [url for url in urls if url not in self.links or self.links[url]['recheck_at'] <= now]
+
+    def record(self, url, result):
+        previous = self.links.get(url) or {}
+        result = dict(result, verdict=verdict(result))
+        interval = RECHECK_OK if result['verdict'] == 'ok' else RECHECK_FAILED
+        result['recheck_at'] = result['checked_at'] + interval * (1 - RECHECK_JITTER * random.random())
+        if result['verdict'] != 'ok':
+            result['failing_since'] = previous.get('failing_since') or result['checked_at']
+        self.links[url] = result
+        return result
+
+    def prune(self, urls):
+        """Forget links no longer used by any entry."""
+        keep = set(urls)
+        self.links = {url: result for url, result in self.links.items() if url in keep}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': CACHE_VERSION, 'links': self.links}, separators=(',', ':')))
+        os.replace(tmp_path, self.path)
+
+
+class HostGate:
+    """Request slots and start spacing for one host."""
+
+    def __init__(self, per_host, delay):
+        self.slots = asyncio.Semaphore(per_host)
+        self.starting = asyncio.Lock()
+        self.delay = delay
+        self.last_start = 0.0
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        """Start nothing on this host for the next seconds (after a 429/503)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def __aenter__(self):
+        await self.slots.acquire()
+        # Requests take turns waiting out the spacing since the previous start (and any pause)
+        async with self.starting:
+            while True:
+                wait = max(self.last_start + self.delay, self.paused_until) - time.monotonic()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.last_start = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.slots.release()
+
+
+async def _request(session, gate, method, url):
+    """Status of one request (after 429/503 retries), or the error that prevented one."""
+    for attempt in range(RETRIES + 1):
+        try:
+            async with gate:
+                async with session.request(method, url, allow_redirects=True) as response:
+                    status = response.status
+                    final_url = str(response.url)
+                    delay = retry_after_seconds(response)
+        except asyncio.TimeoutError:
+            return {'status': None, 'error': 'timed out'}
+        except aiohttp.ClientConnectorError as e:
+            if isinstance(e.os_error, socket.gaierror):
+                return {'status': None, 'error': 'host not found'}
+            return {'status': None, 'error': str(e)}
+        except aiohttp.ClientError as e:
+            return {'status': None, 'error': str(e) or type(e).__name__}
+        if status in RETRY_STATUSES and attempt < RETRIES:
+            gate.pause(min(RETRY_MAX, delay if delay is not None else RETRY_BASE * 2 ** attempt))
+            continue
+        result = {'status': status}
+        if final_url != url:
+            result['final_url'] = final_url
+        return result
+
+
+async def check_url(session, gate, url):
+    """Check one link: HEAD, then GET if the HEAD got an HTTP error."""
+    target = check_target(url)
+    result = None
+    for method in ('HEAD', 'GET') if target == url else ('GET',):
+        result = await _request(session, gate, method, target)
+        if result['status'] is None or result['status'] < 400:
+            break
+    return dict(result, checked_at=time.time())
+
+
+async def _check_all(urls, on_result, per_host, delay, timeout, connections):
+    gates = {}
+    connector = aiohttp.TCPConnector(limit=connections, limit_per_host=per_host, ttl_dns_cache=300)
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={'User-Agent': USER_AGENT},
+    )
+
+    async def check(url):
+        host = urlsplit(check_target(url)).netloc.lower()
+        if host not in gates:
+            gates[host] = HostGate(per_host, delay)
+        on_result(url, await check_url(session, gates[host], url))
+
+    async with session:
+        await asyncio.gather(*(check(url) for url in urls))
+
+
+def check_links(urls, cache, per_host=PER_HOST, delay=HOST_DELAY, timeout=TIMEOUT, connections=CONNECTIONS,
+                progress=None):
+    """Check urls concurrently, recording each result into cache as it arrives.
+
+    progress, if given, is called with (url, result) after each link. An
+    interrupted run keeps the results recorded so far.
+    """
+    def on_result(url, result):
+        result = cache.record(url, result)
+        if progress is not None:
+            progress(url, result)
+
+    asyncio.run(_check_all(urls, on_result, per_host, delay, timeout, connections))
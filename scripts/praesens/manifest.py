@@ -0,0 +1,154 @@
+"""
+Source manifest for generated collection entries.
+
+content/collection/.sources.json maps each entry slug to where it came from
+(source, URL), when it was fetched, a hash of the source data the entry was
+rendered from, the template version used, a hash of the written index.md and
+per-field hashes of the generated frontmatter. The regenerate command uses it
+to rebuild only the entries whose source data or template changed, and to
+keep the fields that were edited by hand. Other sources whose data filled in
+an entry's empty fields are listed under 'merged'.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+MANIFEST_NAME = '.sources.json'
+
+
+def hash_data(data):
+    """Stable hash of a JSON-serializable source data dict."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def hash_text(text):
+    """Hash of rendered entry text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(path):
+    """Hash of a file on disk, or None if it does not exist."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return hash_text(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def field_hashes(fields):
+    """Short per-field hashes of an entry_fields() dict, used to spot hand edits field by field."""
+    return {path: hash_data(value)[:16] for path, value in fields.items()}
+
+
+def edited_fields(entry, fields, text):
+    """Paths in fields (read from an entry on disk) whose value was changed by hand.
+
+    entry is the entry's manifest record, or None for hand-made entries.
+    """
+    if entry and entry.get('fields'):
+        recorded = entry['fields']
+        current = field_hashes(fields)
+        return {path for path, value in current.items() if path in recorded and recorded[path] != value}
+    if entry and entry.get('output_hash') == hash_text(text):
+        return set()
+    # Hand-made entry, or recorded before per-field hashes and edited since: keep whatever is filled in
+    return {path for path, value in fields.items() if value not in ('', [], None)}
+
+
+class Manifest:
+    """In-memory view of .sources.json; safe to record into from worker threads."""
+
+    def __init__(self, content_dir='content/collection'):
+        self.path = Path(content_dir) / MANIFEST_NAME
+        self.lock = threading.Lock()
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+
+    def get(self, slug):
+        return self.entries.get(slug)
+
+    def cover_validators(self, slug):
+        """ETag/Last-Modified/SHA-256 recorded for an entry's last cover download."""
+        return (self.entries.get(slug) or {}).get('cover') or {}
+
+    def record(self, slug, source, url, data, output, template_version, date, options=None, cover=None,
+               fields=None):
+        """Record a freshly written entry.
+
+        cover holds the cover download validators and fields the generated
+        entry_fields() (before any hand edits were merged back in).
+        """
+        source_hash = hash_data(data)
+        with self.lock:
+            previous = self.entries.get(slug, {})
+            # Keep the original fetch time while the source data is unchanged
+            fetched_at = previous.get('fetched_at')
+            if previous.get('source_hash') != source_hash or not fetched_at:
+                fetched_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            self.entries[slug] = {
+                'source': source,
+                'url': url,
+                'fetched_at': fetched_at,
+                'source_hash': source_hash,
+                'output_hash': hash_text(output),
+                'template_version': template_version,
+                'date': date,
+                'options': options or {},
+                'cover': cover or previous.get('cover') or {},
+                'fields': field_hashes(fields) if fields else previous.get('fields') or {},
+            }
+            if previous.get('merged'):
+                self.entries[slug]['merged'] = previous['merged']
+
+    def record_edit(self, slug, text, updated, changed):
+        """Record a scripted rewrite of an entry, so the rewritten fields don't count as edited by hand.
+
+        changed maps field paths to their (old, new) values. Fields that were
+        already edited by hand stay that way.
+        """
+        with self.lock:
+            entry = self.entries.get(slug)
+            if entry is None:
+                return
+            if entry.get('output_hash') == hash_text(text):
+                entry['output_hash'] = hash_text(updated)
+            recorded = entry.get('fields') or {}
+            for path, (old, new) in changed.items():
+                if recorded.get(path) == field_hashes({path: old})[path]:
+                    recorded[path] = field_hashes({path: new})[path]
+
+    def record_merge(self, slug, source, url, data):
+        """Record another source (or release) whose data was merged into an existing entry."""
+        with self.lock:
+            merged = [item for item in self.entries[slug].get('merged', []) if item['url'] != url]
+            merged.append({
+                'source': source,
+                'url': url,
+                'source_hash': hash_data(data),
+                'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            })
+            self.entries[slug]['merged'] = merged
+
+    def flag_removed(self, slugs):
+        """Mark entries whose source item disappeared from a synced library."""
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.lock:
+            for slug in slugs:
+                self.entries[slug].setdefault('removed_at', now)
+
+    def save(self):
+        """Write the manifest atomically with stable ordering for small git diffs."""
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, indent=2, sort_keys=True, ensure_ascii=False)
+                f.write('\n')
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,221 @@
+"""
+Duplicate detection across the collection and across sources.
+
+Entry slugs come from slugify(artist-title), so the same album imported from
+Bandcamp and from Discogs can land in one directory or in two near-identical
+ones ("the-band-album" vs "band-album-remastered"). A MatchIndex keeps a
+normalized record per entry (artist and title without accents, punctuation,
+a leading "The" or "(Remastered)"-style suffixes, the catalog number and the
+set of track titles) and files it under a few blocking keys:
+
+    at:<artist>|<title>        exact normalized artist and title
+    tok:<sorted words>         same words in any order
+    ft:<first artist word>|<title>   "Miles Davis Quintet" vs "Miles Davis"
+    cat:<catalog number>       same pressing
+    mh:<band>:<minhash band>   similar tracklists (MinHash LSH)
+
+Looking up a record only compares it with the entries that share one of its
+keys, so finding candidates costs about the same for 50 albums as for 5,000.
+Keys shared by more than MAX_BLOCK entries (a generic title such as
+"Greatest Hits") are ignored when listing duplicates.
+"""
+
+import re
+import threading
+import unicodedata
+
+MAX_BLOCK = 50
+# Tracklists shorter than this are too generic to fingerprint
+MIN_FINGERPRINT_TRACKS = 4
+MINHASH_BANDS = 4
+MINHASH_ROWS = 3
+# Matches an import may be merged on; a similar tracklist alone is only reported
+AUTO_MERGE_REASONS = ('artist and title', 'catalog number')
+DISAMBIGUATION = re.compile(r'\s+\(\d+\)$')
+TRAILING_THE = re.compile(r'^(.*),\s*the$', re.IGNORECASE)
+EDITION = re.compile(
+    r'[\(\[][^\)\]]*\b(?:remaster(?:ed)?|edition|deluxe|reissue|expanded|anniversary|mono|stereo|version|bonus)'
+    r'\b[^\)\]]*[\)\]]',
+    re.IGNORECASE,
+)
+NON_WORD = re.compile(r'[^a-z0-9]+')
+CATALOG_NONE = {'', 'NONE', 'NA', 'N/A'}
+
+
+def normalize(text):
+    """Lowercase ASCII words of a string: accents, punctuation and '&'/'and' differences removed."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = NON_WORD.sub(' ', text.replace('&', ' and '))
+    return ' '.join(text.split())
+
+
+def normalize_artist(artist):
+    # "Beatles, The" and "The Beatles" -> "beatles"
+    artist = TRAILING_THE.sub(r'\1', DISAMBIGUATION.sub('', (artist or '').strip()))
+    artist = normalize(artist)
+    return artist[4:] if artist.startswith('the ') else artist
+
+
+def normalize_title(title):
+    return normalize(EDITION.sub(' ', title or ''))
+
+
+def normalize_catalog(catalog_number):
+    catalog = (catalog_number or '').upper().strip()
+    return '' if catalog in CATALOG_NONE else re.sub(r'[^A-Z0-9]', '', catalog)
+
+
+def match_record(artist, title, catalog_number='', tracks=()):
+    """Normalized record for matching."""
+    return {
+        'artist': normalize_artist(artist),
+        'title': normalize_title(title),
+        'catalog': normalize_catalog(catalog_number),
+        'tracks': frozenset(filter(None, (normalize_title(track) for track in tracks))),
+    }
+
+
+def record_from_data(data):
+    """Record for a source data dict (see praesens.entry)."""
+    tracks = [track['title'] for track in data['tracklist'] if not track.get('heading')]
+    return match_record(data['artist'], data['title'], data.get('catalog_number', ''), tracks)
+
+
+def minhash(tracks):
+    """MINHASH_BANDS * MINHASH_ROWS minimum hashes of a track title set.
+
+    Python's string hashing is salted per process, which is fine for an
+    index that only lives for one run.
+    """
+    return [min(hash((seed, track)) for track in tracks) for seed in range(MINHASH_BANDS * MINHASH_ROWS)]
+
+
+def blocking_keys(record):
+    keys = []
+    artist, title = record['artist'], record['title']
+    if artist and title:
+        keys.append(f"at:{artist}|{title}")
+        keys.append(f"tok:{' '.join(sorted(set(artist.split() + title.split())))}")
+        keys.append(f"ft:{artist.split()[0]}|{title}")
+    if len(record['catalog']) >= 3:
+        keys.append(f"cat:{record['catalog']}")
+    if len(record['tracks']) >= MIN_FINGERPRINT_TRACKS:
+        hashes = minhash(record['tracks'])
+        for band in range(MINHASH_BANDS):
+            keys.append(f"mh:{band}:{hash(tuple(hashes[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))}")
+    return keys
+
+
+def _overlap(a, b):
+    """Jaccard similarity of two word strings or sets."""
+    a = set(a.split()) if isinstance(a, str) else a
+    b = set(b.split()) if isinstance(b, str) else b
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def compare(a, b):
+    """(is duplicate, score, reasons) for two records."""
+    artist = _overlap(a['artist'], b['artist'])
+    title = 1.0 if a['title'] == b['title'] else _overlap(a['title'], b['title'])
+    catalog = bool(a['catalog']) and a['catalog'] == b['catalog']
+    tracks = _overlap(a['tracks'], b['tracks']) if a['tracks'] and b['tracks'] else None
+
+    reasons = []
+    if artist >= 0.5 and title >= 0.8:
+        reasons.append('artist and title')
+    if catalog and max(artist, title) >= 0.5:
+        reasons.append('catalog number')
+    if tracks is not None and tracks >= 0.6 and artist >= 0.5:
+        reasons.append(f"{tracks:.0%} of tracks")
+    signals = [artist, title] + ([1.0] if catalog else []) + ([tracks] if tracks is not None else [])
+    return bool(reasons), sum(signals) / len(signals), reasons
+
+
+class MatchIndex:
+    """Blocking index of entry records; safe to claim from worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+        self.blocks = {}
+        self.slug_locks = {}
+
+    @classmethod
+    def from_mirror(cls, mirror):
+        """Index every parsed entry of a refreshed CollectionMirror."""
+        tracks = {}
+        for slug, title in mirror.execute('SELECT slug, title FROM tracks'):
+            tracks.setdefault(slug, []).append(title)
+        index = cls()
+        for slug, artist, title, catalog_number in mirror.execute(
+                'SELECT slug, artist, title, catalog_number FROM albums'):
+            index.add(slug, match_record(artist, title, catalog_number, tracks.get(slug, ())))
+        return index
+
+    def add(self, slug, record):
+        with self.lock:
+            self._add(slug, record)
+
+    def _add(self, slug, record):
+        self.records[slug] = record
+        for key in blocking_keys(record):
+            self.blocks.setdefault(key, set()).add(slug)
+
+    def _matches(self, record, exclude=None):
+        candidates = set()
+        for key in blocking_keys(record):
+            candidates.update(self.blocks.get(key, ()))
+        candidates.discard(exclude)
+        matches = []
+        for slug in candidates:
+            duplicate, score, reasons = compare(record, self.records[slug])
+            if duplicate:
+                matches.append((score, slug, reasons))
+        return sorted(matches, key=lambda match: (-match[0], match[1]))
+
+    def find(self, record):
+        """[(score, slug, reasons)] of the entries a record duplicates, best first."""
+        with self.lock:
+            return self._matches(record)
+
+    def claim(self, record, slug):
+        """Slug to write a new record to: slug itself, or the existing entry it duplicates.
+
+        Returns (slug, reasons); reasons is empty unless an existing entry
+        under another slug matched on artist and title or catalog number. A
+        record that matches nothing is added under slug, so later records in
+        the same run can match it.
+        """
+        with self.lock:
+            if slug in self.records and compare(record, self.records[slug])[0]:
+                return slug, []
+            for _, match, reasons in self._matches(record, exclude=slug):
+                if any(reason in AUTO_MERGE_REASONS for reason in reasons):
+                    return match, reasons
+            self._add(slug, record)
+            return slug, []
+
+    def slug_lock(self, slug):
+        """Lock serializing writes to one entry directory."""
+        with self.lock:
+            return self.slug_locks.setdefault(slug, threading.Lock())
+
+    def duplicates(self):
+        """Every duplicate pair in the index: [(score, slug, slug, reasons)], best first.
+
+        Only pairs sharing a blocking key are compared, and keys shared by
+        more than MAX_BLOCK entries are skipped.
+        """
+        with self.lock:
+            pairs = set()
+            for slugs in self.blocks.values():
+                if 1 < len(slugs) <= MAX_BLOCK:
+                    ordered = sorted(slugs)
+                    pairs.update((a, b) for i, a in enumerate(ordered) for b in ordered[i + 1:])
+            found = []
+            for a, b in pairs:
+                duplicate, score, reasons = compare(self.records[a], self.records[b])
+                if duplicate:
+                    found.append((score, a, b, reasons))
+        return sorted(found, key=lambda pair: (-pair[0], pair[1], pair[2]))
@@ -0,0 +1,295 @@
+"""
+SQLite mirror of the collection for querying and reporting.
+
+The entries' index.md files stay the store of record; .cache/collection.sqlite
+(under the Hugo site root) holds a normalized copy of their frontmatter:
+
+    albums   one row per entry (title, artist, years, label, catalog number,
+             description, date, draft)
+    tracks   side, position and title, in order
+    credits  section, person, role and the tracks a credit is limited to
+    genres   album.genres, in order
+    terms    the genres/labels/decades/artists taxonomy terms
+    links    [album.links] service -> URL
+    search   FTS5 index over artist, title, label, tracks and credits
+    files    size, mtime and hash of each index.md (and its parse error)
+
+refresh() brings the mirror up to date by stat()ing every index.md and only
+re-reading files whose size or mtime changed, and only re-parsing those
+whose content hash changed. The importers also write through to it as they
+write entries (see CollectionIndex), so a refresh after an import finds
+nothing to do. Commands that read the mirror refresh it first.
+
+Query it with `collection.py query`, or directly with sqlite3.
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from .frontmatter import parse_entry
+from .index import TRACK_POSITION, site_root
+from .manifest import hash_text
+
+# Relative to the site root
+DEFAULT_MIRROR_PATH = '.cache/collection.sqlite'
+DECADE = re.compile(r'^(\d{2}|\d{4})s?$')
+# Bump when the schema or what is extracted changes; the mirror is then rebuilt
+MIRROR_VERSION = 1
+CREDIT_TRACKS = re.compile(r'\s+\(([^()]*)\)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    slug TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, hash TEXT NOT NULL, error TEXT
+);
+CREATE TABLE IF NOT EXISTS albums (
+    slug TEXT PRIMARY KEY, title TEXT, artist TEXT, release_year INTEGER, pressing_year INTEGER, label TEXT,
+    catalog_number TEXT, description TEXT, date TEXT, draft INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tracks (slug TEXT NOT NULL, seq INTEGER NOT NULL, side TEXT, position TEXT, title TEXT);
+CREATE TABLE IF NOT EXISTS credits (
+    slug TEXT NOT NULL, seq INTEGER NOT NULL, section TEXT, person TEXT, role TEXT, tracks TEXT
+);
+CREATE TABLE IF NOT EXISTS genres (slug TEXT NOT NULL, seq INTEGER NOT NULL, genre TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS terms (slug TEXT NOT NULL, taxonomy TEXT NOT NULL, term TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS links (slug TEXT NOT NULL, service TEXT NOT NULL, url TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS tracks_slug ON tracks (slug);
+CREATE INDEX IF NOT EXISTS credits_slug ON credits (slug);
+CREATE INDEX IF NOT EXISTS credits_person ON credits (person);
+CREATE INDEX IF NOT EXISTS genres_genre ON genres (genre, slug);
+CREATE INDEX IF NOT EXISTS genres_slug ON genres (slug);
+CREATE INDEX IF NOT EXISTS terms_term ON terms (taxonomy, term, slug);
+CREATE INDEX IF NOT EXISTS terms_slug ON terms (slug);
+CREATE INDEX IF NOT EXISTS links_slug ON links (slug);
+CREATE INDEX IF NOT EXISTS albums_year ON albums (release_year);
+CREATE INDEX IF NOT EXISTS albums_label ON albums (label);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    slug UNINDEXED, artist, title, label, tracks, credits, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+TABLES = ('files', 'albums', 'tracks', 'credits', 'genres', 'terms', 'links')
+
+
+def _strings(value):
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
+
+
+def _year(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def split_credit(line):
+    """"Name - Role (A1, B2)" -> (name, role, tracks)."""
+    tracks = ''
+    match = CREDIT_TRACKS.search(line)
+    if match:
+        tracks = match.group(1)
+        line = line[:match.start()]
+    person, _, role = line.partition(' - ')
+    return person.strip(), role.strip(), tracks
+
+
+def entry_rows(frontmatter):
+    """Rows for one entry: {table: [row tuple without the slug, ...]}."""
+    album = frontmatter.get('album')
+    album = album if isinstance(album, dict) else {}
+    date = frontmatter.get('date')
+    rows = {
+        'albums': [(
+            str(frontmatter.get('title', '')),
+            str(album.get('artist', '')),
+            _year(album.get('releaseYear')),
+            _year(album.get('pressingYear')),
+            str(album.get('label', '')),
+            str(album.get('catalogNumber', '')),
+            str(frontmatter.get('description', '')),
+            str(date) if date else None,
+            1 if frontmatter.get('draft') else 0,
+        )],
+        'tracks': [],
+        'credits': [],
+        'genres': [(seq, genre) for seq, genre in enumerate(_strings(album.get('genres')))],
+        'terms': [
+            (taxonomy, term)
+            for taxonomy in ('genres', 'labels', 'decades', 'artists')
+            for term in dict.fromkeys(_strings(frontmatter.get(taxonomy)))
+        ],
+        'links': [],
+    }
+    for side in album.get('tracklist') or []:
+        if isinstance(side, dict):
+            for track in _strings(side.get('tracks')):
+                match = TRACK_POSITION.match(track)
+                position, title = (match.group(1), track[match.end():]) if match else ('', track)
+                rows['tracks'].append((len(rows['tracks']), str(side.get('side', '')), position, title))
+    for section in album.get('credits') or []:
+        if isinstance(section, dict):
+            for line in _strings(section.get('people')):
+                rows['credits'].append((len(rows['credits']), str(section.get('section', '')), *split_credit(line)))
+    links = album.get('links')
+    if isinstance(links, dict):
+        rows['links'] = [(service, url) for service, url in links.items() if isinstance(url, str) and url]
+    return rows
+
+
+def decade_start(decade):
+    """First year of a decade written as "1970s", "1970" or "70s"; raises ValueError otherwise."""
+    match = DECADE.match(decade.strip())
+    if not match:
+        raise ValueError(f"not a decade: {decade!r} (expected e.g. 1970s or 70s)")
+    start = int(match.group(1)) // 10 * 10
+    # "70s"
+    return start + 1900 if start < 100 else start
+
+
+class CollectionMirror:
+    """The SQLite mirror of one content directory; safe to write through from worker threads."""
+
+    def __init__(self, content_dir='content/collection', path=None):
+        self.content_dir = Path(content_dir)
+        self.path = Path(path) if path else site_root(content_dir) / DEFAULT_MIRROR_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        # One mirror per content directory: start over if it was built for another one or an older version
+        meta = dict(self.db.execute('SELECT key, value FROM meta'))
+        identity = {'version': str(MIRROR_VERSION), 'content_dir': str(self.content_dir.resolve())}
+        if any(meta.get(key) != value for key, value in identity.items()):
+            for table in (*TABLES, 'search'):
+                self.db.execute(f'DELETE FROM {table}')
+            self.db.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', identity.items())
+        self.db.commit()
+
+    def _delete(self, slug):
+        # search rows share their album's rowid; looking them up by slug would scan the FTS table
+        self.db.execute('DELETE FROM search WHERE rowid IN (SELECT rowid FROM albums WHERE slug = ?)', (slug,))
+        for table in TABLES:
+            self.db.execute(f'DELETE FROM {table} WHERE slug = ?', (slug,))
+
+    def _store(self, slug, text, stat):
+        """Replace an entry's rows (caller holds the lock and commits)."""
+        self._delete(slug)
+        error = None
+        try:
+            frontmatter, _ = parse_entry(text)
+            rows = entry_rows(frontmatter)
+        except ValueError as e:
+            error = str(e)
+        self.db.execute(
+            'INSERT INTO files VALUES (?, ?, ?, ?, ?)', (slug, stat.st_mtime_ns, stat.st_size, hash_text(text), error)
+        )
+        if error:
+            return
+        rowid = self.db.execute(
+            'INSERT INTO albums VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (slug, *rows['albums'][0])
+        ).lastrowid
+        for table in ('tracks', 'credits', 'genres', 'terms', 'links'):
+            if rows[table]:
+                self.db.executemany(
+                    f"INSERT INTO {table} VALUES ({', '.join('?' * (len(rows[table][0]) + 1))})",
+                    [(slug, *row) for row in rows[table]],
+                )
+        title, artist, _, _, label = rows['albums'][0][:5]
+        tracks = '\n'.join(row[3] for row in rows['tracks'])
+        credits = '\n'.join(f"{row[2]} {row[3]}".strip() for row in rows['credits'])
+        self.db.execute(
+            'INSERT INTO search (rowid, slug, artist, title, label, tracks, credits) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (rowid, slug, artist, title, label, tracks, credits),
+        )
+
+    def update(self, slug, text):
+        """Write an entry through to the mirror after its index.md was written."""
+        stat = (self.content_dir / slug / 'index.md').stat()
+        with self.lock:
+            self._store(slug, text, stat)
+            self.db.commit()
+
+    def remove(self, slug):
+        with self.lock:
+            self._delete(slug)
+            self.db.commit()
+
+    def refresh(self):
+        """Re-read entries added or changed on disk since the last refresh; returns counts."""
+        on_disk = {}
+        for index_path in self.content_dir.glob('*/index.md'):
+            on_disk[index_path.parent.name] = (index_path, index_path.stat())
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        with self.lock:
+            known = {
+                slug: (mtime_ns, size, digest)
+                for slug, mtime_ns, size, digest in self.db.execute('SELECT slug, mtime_ns, size, hash FROM files')
+            }
+            for slug in known.keys() - on_disk.keys():
+                self._delete(slug)
+                counts['removed'] += 1
+            for slug, (index_path, stat) in on_disk.items():
+                previous = known.get(slug)
+                if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    counts['unchanged'] += 1
+                    continue
+                text = index_path.read_text(encoding='utf-8')
+                if previous and previous[2] == hash_text(text):
+                    # Touched but not changed
+                    self.db.execute(
+                        'UPDATE files SET mtime_ns = ?, size = ? WHERE slug = ?', (stat.st_mtime_ns, stat.st_size, slug)
+                    )
+                    counts['unchanged'] += 1
+                    continue
+                self._store(slug, text, stat)
+                counts['updated' if previous else 'added'] += 1
+            self.db.commit()
+        return counts
+
+    def find(self, text=None, artist=None, genre=None, label=None, decade=None, credit=None, limit=50):
+        """(slug, artist, title, year, label) of published albums matching every given filter.
+
+        text is matched word by word (as prefixes) against artist, title,
+        label, tracks and credits, best matches first; decade is like
+        "1970s"; label also matches parent labels.
+        """
+        joins, where, params = [], ['a.draft = 0'], []
+        order = 'a.artist, a.release_year, a.title'
+        if text:
+            words = re.findall(r'\w+', text)
+            if words:
+                joins.append('JOIN search ON search.rowid = a.rowid')
+                where.append('search MATCH ?')
+                params.append(' '.join(f'"{word}"*' for word in words))
+                order = 'bm25(search), ' + order
+        if artist:
+            where.append('a.artist LIKE ?')
+            params.append(f"%{artist}%")
+        if genre:
+            where.append('EXISTS (SELECT 1 FROM genres g WHERE g.slug = a.slug AND g.genre = ? COLLATE NOCASE)')
+            params.append(genre)
+        if label:
+            where.append("(a.label = ? COLLATE NOCASE OR EXISTS (SELECT 1 FROM terms t WHERE t.slug = a.slug "
+                         "AND t.taxonomy = 'labels' AND t.term = ? COLLATE NOCASE))")
+            params.extend([label, label])
+        if decade:
+            start = decade_start(decade)
+            where.append('a.release_year BETWEEN ? AND ?')
+            params.extend([start, start + 9])
+        if credit:
+            where.append('EXISTS (SELECT 1 FROM credits c WHERE c.slug = a.slug AND c.person LIKE ?)')
+            params.append(f"%{credit}%")
+        sql = (f"SELECT a.slug, a.artist, a.title, a.release_year, a.label FROM albums a {' '.join(joins)} "
+               f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?")
+        return self.execute(sql, [*params, limit])
+
+    def execute(self, sql, params=()):
+        """Rows of a read query."""
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,64 @@
+"""
+Rebuild collection entries whose source data or template version changed.
+
+Reads content/collection/.sources.json (written by the importers),
+re-parses each entry's source from the response cache and rewrites index.md
+only when the source data hash or template version differ from the manifest.
+Unchanged entries are not touched, and fields edited by hand since an entry
+was generated are merged back in unless force is set.
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+from .cover_download import cover_validators
+from .entry import download_cover, updated_entry, write_index
+from .frontmatter import entry_fields, parse_entry
+from .manifest import hash_data, hash_file, hash_text
+from .timing import timings
+from .validate import shared_from
+
+
+def regenerate_entry(slug, entry, manifest, content_dir, cache, refresh, sources, force=False, dry_run=False,
+                     index=None):
+    """Rebuild one entry if needed; returns 'unchanged' or 'rebuilt'."""
+    entry_dir = Path(content_dir) / slug
+    index_path = entry_dir / 'index.md'
+    on_disk = hash_file(index_path)
+
+    source = sources.get(entry['source'])
+    # Cached responses cost no request, so they skip the rate limiter
+    if source.needs_request(entry['url'], cache, refresh):
+        timings.record('rate_limit_wait', source.bucket.acquire(), url=entry['url'])
+    data = source.fetch(entry['url'], cache, refresh, entry.get('options'))
+    if (not force and on_disk is not None
+            and entry['source_hash'] == hash_data(data)
+            and entry['template_version'] == source.template_version):
+        return 'unchanged'
+
+    date = entry.get('date') or datetime.now().strftime('%Y-%m-%d')
+    document, body = source.document(data, date, entry.get('options'))
+
+    # Hand-edited fields and fields we don't generate (such as [album.cover]) are kept
+    output, kept = updated_entry(index_path, document, body, entry, force)
+    if kept:
+        print(f"ℹ {slug}: keeping hand-edited {', '.join(sorted(kept))} (use --force to overwrite)")
+    if dry_run:
+        print(f"Would rebuild {slug}")
+        return 'rebuilt'
+
+    if on_disk != hash_text(output):
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        write_index(index_path, output)
+        print(f"✓ Rebuilt {index_path}")
+        if index is not None:
+            index.update(slug, output)
+
+    # Covers are only fetched for entries that lost theirs (not for ones showing another entry's identical cover)
+    cover = None
+    if not any(entry_dir.glob('cover.*')) and not shared_from(parse_entry(output)[0]):
+        cover = download_cover(data, entry_dir, source.download)
+
+    manifest.record(slug, entry['source'], entry['url'], data, output, source.template_version, date,
+                    entry.get('options'), cover_validators(cover) if cover else None, entry_fields(document, body))
+    return 'rebuilt'
@@ -0,0 +1,297 @@
+"""
+Related albums for the album pages.
+
+For every published entry this finds the TOP_K most similar other entries
+and writes them to data/related.json ({slug: [slug, ...]}, leaving out
+entries with none), which layouts/collection/single.html reads. Similarity
+is the cosine of weighted feature vectors built from what the importers
+write, read from the SQLite mirror (praesens.mirror):
+
+    genre    album.genres (genres and styles), TF-IDF weighted
+    label    album.label and the labels taxonomy (parent labels)
+    person   credited personnel
+    year     release year, spread over neighbouring 5-year bins
+
+Each block is normalized on its own and scaled by its WEIGHTS share, so the
+score is a weighted sum of per-block cosines. Genres and years have small
+vocabularies and go into a dense matrix compared with one matrix product per
+batch of albums; labels and personnel are large and sparse (most people are
+credited on a handful of albums), so their part of the score is summed over
+posting lists with np.bincount instead. The few on more than DENSE_DF
+albums (a prolific engineer, a big label) have long posting lists and join
+the dense matrix. Features that only one album has can't relate it to
+anything and are dropped.
+
+The neighbours (KEEP of them, more than are published) and a signature of
+every album's features are kept in the site's .cache/related.json. The next run only
+recomputes the rows of albums whose features changed, merges those albums
+into the other albums' lists, and only falls back to a full run when more
+than FULL_REBUILD_SHARE of the collection changed. Scores between unchanged
+albums are not recomputed, so their IDF weights can drift slightly from a
+full run as the collection grows; pass full=True to start over.
+"""
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .index import site_root
+
+# Relative to the site root
+STATE_PATH = '.cache/related.json'
+STATE_VERSION = 1
+TOP_K = 6
+# Neighbours kept in the state, so that a few changed albums rarely empty a list
+KEEP = 3 * TOP_K
+WEIGHTS = {'genre': 0.45, 'person': 0.3, 'label': 0.15, 'year': 0.1}
+YEAR_BIN = 5
+FULL_REBUILD_SHARE = 0.1
+BATCH = 256
+# Labels and people on more albums than this are compared densely
+DENSE_DF = 64
+
+
+def related_path_for(content_dir):
+    return site_root(content_dir) / 'data' / 'related.json'
+
+
+def state_path_for(content_dir):
+    return site_root(content_dir) / STATE_PATH
+
+
+def album_features(mirror):
+    """{slug: {'genre': set, 'label': set, 'person': set, 'year': int or None}} for published entries."""
+    features = {
+        slug: {'genre': set(), 'label': {label.lower()} if label else set(), 'person': set(), 'year': year}
+        for slug, label, year in mirror.execute('SELECT slug, label, release_year FROM albums WHERE draft = 0')
+    }
+    queries = {
+        'genre': 'SELECT slug, genre FROM genres',
+        'label': "SELECT slug, term FROM terms WHERE taxonomy = 'labels'",
+        'person': "SELECT slug, person FROM credits WHERE person != ''",
+    }
+    for kind, sql in queries.items():
+        for slug, value in mirror.execute(sql):
+            if slug in features:
+                features[slug][kind].add(value.lower())
+    return features
+
+
+def signature(feature):
+    payload = json.dumps({kind: sorted(value) if isinstance(value, set) else value
+                          for kind, value in feature.items()}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _block(slugs, features, kind, min_df=2):
+    """(album index, feature index, weight) arrays of one TF-IDF block, rows normalized to unit length."""
+    df = {}
+    for slug in slugs:
+        for value in features[slug][kind]:
+            df[value] = df.get(value, 0) + 1
+    vocabulary = {value: i for i, value in enumerate(sorted(value for value, count in df.items() if count >= min_df))}
+    rows, cols, weights = [], [], []
+    n = len(slugs)
+    for row, slug in enumerate(slugs):
+        for value in features[slug][kind]:
+            if value in vocabulary:
+                rows.append(row)
+                cols.append(vocabulary[value])
+                # Smoothed IDF: a feature every album has still counts a little
+                weights.append(math.log((1 + n) / (1 + df[value])) + 1)
+    rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+    weights = np.array(weights, dtype=np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n)).astype(np.float32)
+    if len(rows):
+        weights /= norms[rows]
+    return rows, cols, weights * np.float32(math.sqrt(WEIGHTS[kind])), len(vocabulary)
+
+
+class Similarity:
+    """Feature matrices of a collection and batched top-k neighbour search over them."""
+
+    def __init__(self, slugs, features):
+        self.slugs = slugs
+        self.position = {slug: i for i, slug in enumerate(slugs)}
+        n = len(slugs)
+
+        # Dense part: genres, and years as soft one-hot bins
+        rows, cols, weights, size = _block(slugs, features, 'genre')
+        years = [features[slug]['year'] for slug in slugs]
+        known = [year for year in years if year]
+        first = min(known) // YEAR_BIN if known else 0
+        bins = (max(known) // YEAR_BIN - first + 1) if known else 0
+        self.dense = np.zeros((n, size + bins), dtype=np.float32)
+        self.dense[rows, cols] = weights
+        spread = np.array([0.5, 1.0, 0.5], dtype=np.float32)
+        spread *= math.sqrt(WEIGHTS['year']) / np.linalg.norm(spread)
+        for row, year in enumerate(years):
+            if year:
+                b = year // YEAR_BIN - first
+                for offset, value in zip((-1, 0, 1), spread):
+                    if 0 <= b + offset < bins:
+                        self.dense[row, size + b + offset] = value
+
+        # Labels and personnel: frequent ones join the dense part, where a matrix product is cheaper than
+        # walking long posting lists; the long tail stays sparse
+        label_rows, label_cols, label_weights, label_size = _block(slugs, features, 'label')
+        person_rows, person_cols, person_weights, _ = _block(slugs, features, 'person')
+        rows = np.concatenate([label_rows, person_rows])
+        cols = np.concatenate([label_cols, person_cols + label_size])
+        weights = np.concatenate([label_weights, person_weights])
+        df = np.bincount(cols) if len(cols) else np.zeros(0, dtype=np.int64)
+        frequent = np.flatnonzero(df > DENSE_DF)
+        if len(frequent):
+            dense = np.isin(cols, frequent)
+            extra = np.zeros((n, len(frequent)), dtype=np.float32)
+            extra[rows[dense], np.searchsorted(frequent, cols[dense])] = weights[dense]
+            self.dense = np.hstack([self.dense, extra])
+            rows, cols, weights = rows[~dense], cols[~dense], weights[~dense]
+
+        # Rows of each album (CSR) and albums of each feature (posting lists)
+        order = np.argsort(rows, kind='stable')
+        self.row_ptr = np.searchsorted(rows[order], np.arange(n + 1))
+        self.row_cols, self.row_weights = cols[order], weights[order]
+        order = np.argsort(cols, kind='stable')
+        self.col_ptr = np.searchsorted(cols[order], np.arange(len(df) + 1))
+        self.col_rows, self.col_weights = rows[order], weights[order]
+
+    def scores(self, rows):
+        """(len(rows), n) similarity of the given albums to every album, self excluded."""
+        rows = np.asarray(rows, dtype=np.int64)
+        n = len(self.slugs)
+        scores = self.dense[rows] @ self.dense.T
+
+        # Sparse part: expand every feature of the batch into its posting list and add up per (row, album)
+        starts, ends = self.row_ptr[rows], self.row_ptr[rows + 1]
+        counts = ends - starts
+        entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        entry_rows = np.repeat(np.arange(len(rows)), counts)
+        features = self.row_cols[entries]
+        lengths = self.col_ptr[features + 1] - self.col_ptr[features]
+        postings = np.repeat(self.col_ptr[features] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        pair_rows = np.repeat(entry_rows, lengths)
+        pair_weights = np.repeat(self.row_weights[entries], lengths) * self.col_weights[postings]
+        scores += np.bincount(
+            pair_rows * n + self.col_rows[postings], weights=pair_weights, minlength=len(rows) * n
+        ).reshape(len(rows), n).astype(np.float32)
+
+        scores[np.arange(len(rows)), rows] = 0
+        return scores
+
+    def neighbours(self, rows, keep=KEEP):
+        """{slug: [[slug, score], ...]} for the given albums, best first, only albums sharing something."""
+        result = {}
+        for start in range(0, len(rows), BATCH):
+            batch = rows[start:start + BATCH]
+            scores = self.scores(batch)
+            keep_n = min(keep, scores.shape[1] - 1)
+            if keep_n <= 0:
+                result.update({self.slugs[row]: [] for row in batch})
+                continue
+            top = np.argpartition(-scores, keep_n - 1, axis=1)[:, :keep_n]
+            for i, row in enumerate(batch):
+                best = sorted(((float(scores[i, j]), self.slugs[j]) for j in top[i] if scores[i, j] > 0),
+                              key=lambda pair: (-pair[0], pair[1]))
+                result[self.slugs[row]] = [[slug, round(score, 4)] for score, slug in best]
+        return result
+
+
+def load_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if state.get('version') != STATE_VERSION or state.get('keep') != KEEP:
+        return None
+    return state
+
+
+def update_related(mirror, state_path=None, full=False):
+    """Bring the neighbour lists up to date; returns (state, counts).
+
+    state_path defaults to the site's .cache/related.json.
+
+    counts has 'albums', 'computed' (rows scored against the whole
+    collection) and 'mode' ('full', 'incremental' or 'unchanged').
+    """
+    features = album_features(mirror)
+    slugs = sorted(features)
+    signatures = {slug: signature(features[slug]) for slug in slugs}
+    state_path = state_path or state_path_for(mirror.content_dir)
+    state = None if full else load_state(state_path)
+
+    changed, removed = set(slugs), set()
+    if state is not None:
+        changed = {slug for slug in slugs if state['signatures'].get(slug) != signatures[slug]}
+        removed = set(state['signatures']) - set(signatures)
+        if not changed and not removed:
+            return state, {'albums': len(slugs), 'computed': 0, 'mode': 'unchanged'}
+        if len(changed) + len(removed) > FULL_REBUILD_SHARE * max(len(slugs), 1):
+            state = None
+
+    similarity = Similarity(slugs, features)
+    if state is None:
+        neighbours = similarity.neighbours(list(range(len(slugs))))
+        mode, computed = 'full', len(slugs)
+    else:
+        neighbours = {slug: state['neighbours'].get(slug, []) for slug in slugs}
+        changed_rows = [similarity.position[slug] for slug in sorted(changed)]
+        fresh = similarity.neighbours(changed_rows)
+        # Scores are symmetric: column j of the changed rows is album j's score with each changed album.
+        # Only scores that beat the last of a full list that keeps all its members can get into it.
+        gone = changed | removed
+        floor = np.array([
+            pairs[-1][1] if len(pairs) >= KEEP and not any(pair[0] in gone for pair in pairs) else 0
+            for pairs in neighbours.values()
+        ], dtype=np.float32)
+        columns = {}
+        for start in range(0, len(changed_rows), BATCH):
+            batch = changed_rows[start:start + BATCH]
+            scores = similarity.scores(batch)
+            for i, j in zip(*np.nonzero(scores > floor)):
+                columns.setdefault(slugs[j], []).append([slugs[batch[i]], round(float(scores[i, j]), 4)])
+
+        stale = []
+        for slug in slugs:
+            if slug in changed:
+                continue
+            kept = [pair for pair in neighbours[slug] if pair[0] not in gone]
+            if len(kept) == len(neighbours[slug]) and slug not in columns:
+                continue
+            # A full list that lost too many members may have had better albums just past its end
+            if len(neighbours[slug]) >= KEEP and len(kept) < TOP_K:
+                stale.append(similarity.position[slug])
+                continue
+            merged = sorted(kept + columns.get(slug, []), key=lambda pair: (-pair[1], pair[0]))
+            neighbours[slug] = merged[:KEEP]
+        fresh.update(similarity.neighbours(stale))
+        neighbours.update(fresh)
+        mode, computed = 'incremental', len(changed_rows) + len(stale)
+
+    state = {'version': STATE_VERSION, 'keep': KEEP, 'signatures': signatures, 'neighbours': neighbours}
+    Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+    # dumps() rather than dump(): only the former uses the C encoder
+    with open(state_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(state, separators=(',', ':')))
+    return state, {'albums': len(slugs), 'computed': computed, 'mode': mode}
+
+
+def write_related(state, path, top_k=TOP_K):
+    """Write {slug: [related slug, ...]} for the templates; returns True if the file changed."""
+    related = {slug: [pair[0] for pair in pairs[:top_k]] for slug, pairs in state['neighbours'].items() if pairs}
+    text = json.dumps(related, ensure_ascii=False, sort_keys=True, separators=(',', ':')) + '\n'
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
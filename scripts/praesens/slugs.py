@@ -0,0 +1,18 @@
+"""
+Entry slugs, kept free of the HTTP stack so validation can import them cheaply.
+"""
+
+import re
+
+
+def slugify(text):
+    """Convert text to URL-friendly slug."""
+    text = text.lower()
+    text = re.sub(r'[^\w\s-]', '', text)
+    text = re.sub(r'[-\s]+', '-', text)
+    return text.strip('-')
+
+
+def entry_slug(data):
+    """Directory name for an entry."""
+    return slugify(f"{data['artist']}-{data['title']}")
@@ -0,0 +1,115 @@
+"""
+Source adapters.
+
+An adapter turns a source URL into the collection data dict described in
+praesens.entry and renders it into an entry. Each adapter module defines a
+`Source` subclass of SourceAdapter. Modules are only imported when a URL or
+manifest entry for their source first comes up, so a run over Bandcamp pages
+never imports discogs_client and vice versa.
+
+Adding a source means adding a module here and a line to ADAPTERS.
+"""
+
+import importlib
+import threading
+from urllib.parse import urlparse
+
+from ..cache import canonical_url
+from ..cover_download import fetch_cover
+from ..frontmatter import render_entry
+
+# name -> (module, hostnames its URLs live on)
+ADAPTERS = {
+    'discogs': ('praesens.sources.discogs', ('discogs.com',)),
+    'bandcamp': ('praesens.sources.bandcamp', ('bandcamp.com',)),
+}
+
+
+class SourceAdapter:
+    """Base class for source adapters."""
+
+    name = None
+    # Bump when document() output changes so the regenerate command rebuilds entries
+    template_version = 1
+    # Per-run options the adapter renders (recorded in the manifest)
+    options = ()
+    # TokenBucket pacing network fetches, or None when the source has no rate limit
+    bucket = None
+    supports_dry_run = False
+
+    def __init__(self, dry_run=False, **settings):
+        self.dry_run = dry_run
+        self.download = fetch_cover
+
+    def source_key(self, url):
+        """Identity used to match a URL to an existing entry."""
+        return canonical_url(url)
+
+    def url_for(self, data):
+        """Source URL recorded in the manifest for an entry's data."""
+        raise NotImplementedError
+
+    def is_cached(self, url, cache):
+        """Whether fetch() can be answered from the response cache."""
+        return False
+
+    def needs_request(self, url, cache=None, refresh=False):
+        """Whether fetch() will make a rate-limited request for a URL."""
+        return self.bucket is not None and (cache is None or refresh or not self.is_cached(url, cache))
+
+    def fetch(self, url, cache=None, refresh=False, options=None):
+        """Fetch and parse a source page into a data dict.
+
+        options are the entry's options (see `options`), for sources whose
+        fetching depends on them.
+        """
+        raise NotImplementedError
+
+    def document(self, data, date, options=None):
+        """(frontmatter dict, markdown body) for an entry; see praesens.entry.entry_document()."""
+        raise NotImplementedError
+
+    def render(self, data, date, options=None):
+        """index.md text for an entry."""
+        return render_entry(*self.document(data, date, options))
+
+    def list_library(self, ref, content_dir='content/collection', **kwargs):
+        """(remote, linked) for a whole-library sync; see praesens.sync.plan_sync()."""
+        raise NotImplementedError(f"{self.name} does not support library sync")
+
+
+def source_name(url):
+    """Name of the adapter that handles a URL."""
+    host = urlparse(url).netloc.lower()
+    for name, (_, hosts) in ADAPTERS.items():
+        if any(host == h or host.endswith('.' + h) for h in hosts):
+            return name
+    raise ValueError(f"No source adapter for URL: {url}")
+
+
+class Sources:
+    """The adapters for one run, imported and set up on first use.
+
+    settings maps an adapter name to keyword arguments for its constructor;
+    dry_run is passed to every adapter.
+    """
+
+    def __init__(self, settings=None, dry_run=False):
+        self.settings = settings or {}
+        self.dry_run = dry_run
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.loaded:
+                if name not in ADAPTERS:
+                    raise ValueError(f"Unknown source: {name}")
+                module = importlib.import_module(ADAPTERS[name][0])
+                if self.dry_run and not module.Source.supports_dry_run:
+                    raise ValueError(f"{name} has no offline dry-run mode")
+                self.loaded[name] = module.Source(dry_run=self.dry_run, **self.settings.get(name, {}))
+            return self.loaded[name]
+
+    def for_url(self, url):
+        return self.get(source_name(url))
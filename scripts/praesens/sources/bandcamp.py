@@ -0,0 +1,234 @@
+"""
+Bandcamp source adapter: album pages scraped from *.bandcamp.com.
+
+Pages are parsed with the fast scanner in bandcamp_parser; BeautifulSoup
+is only imported when that scan misses a required field.
+"""
+
+import json
+import re
+from datetime import datetime
+
+from ..cache import canonical_url
+from ..entry import entry_document
+from ..http_session import default_client
+from ..sync import linked_entries
+from ..timing import span
+from . import SourceAdapter
+from .bandcamp_parser import empty_pieces, scan_page
+
+ALBUM_URL = re.compile(r'https?://[\w.-]+\.bandcamp\.com/album/[\w-]+')
+
+
+def fetch_bandcamp_html(url, cache=None, refresh=False, http=None):
+    """Fetch album page HTML, going through the response cache when given."""
+    key = canonical_url(url)
+    if cache is not None and not refresh:
+        html = cache.get('bandcamp-html', key)
+        if html is not None:
+            print(f"✓ Using cached page for {url}")
+            return html
+
+    print(f"Fetching {url}...")
+    with span('http_fetch', url=url):
+        response = (http or default_client()).get(url)
+        response.raise_for_status()
+    if cache is not None:
+        cache.set('bandcamp-html', key, response.text)
+    return response.text
+
+
+def soup_page_pieces(html):
+    """Collect the page pieces with a full BeautifulSoup tree (slow fallback path)."""
+    # Imported here so runs that never hit the fallback don't pay for bs4
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    pieces = empty_pieces()
+
+    # Extract JSON-LD data (contains structured data)
+    script_tag = soup.find('script', type='application/ld+json')
+    if script_tag:
+        pieces['json_ld'] = json.loads(script_tag.string)
+
+    # Extract embedded data from JavaScript
+    for script in soup.find_all('script'):
+        if script.get('data-tralbum'):
+            try:
+                pieces['tralbum'] = json.loads(script['data-tralbum'])
+            except json.JSONDecodeError:
+                pass
+        elif script.string and 'var TralbumData' in script.string:
+            # Extract TralbumData object
+            match = re.search(r'var TralbumData = ({.*?});', script.string, re.DOTALL)
+            if match:
+                try:
+                    pieces['tralbum'] = json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    pass
+
+    for prop in ('og:site_name', 'og:title', 'og:image'):
+        meta = soup.find('meta', property=prop)
+        if meta:
+            pieces['meta'][prop] = meta.get('content', '')
+
+    about_elem = soup.find('div', class_='tralbumData tralbum-about')
+    if about_elem:
+        pieces['about'] = about_elem.get_text(strip=True)
+
+    tags_elem = soup.find('div', class_='tralbum-tags')
+    if tags_elem:
+        pieces['tags'] = [tag.get_text(strip=True) for tag in tags_elem.find_all('a', class_='tag')]
+
+    track_table = soup.find('table', id='track_table')
+    if track_table:
+        for row in track_table.find_all('tr', class_='track_row_view'):
+            track_num_elem = row.find('div', class_='track_number')
+            track_title_elem = row.find('span', class_='track-title')
+            if track_num_elem and track_title_elem:
+                track_num = track_num_elem.get_text(strip=True).rstrip('.')
+                pieces['track_rows'].append((track_num, track_title_elem.get_text(strip=True)))
+
+    label_elem = soup.find('span', class_='label')
+    if label_elem:
+        pieces['label'] = label_elem.get_text(strip=True)
+
+    credits_elem = soup.find('div', class_='tralbumData tralbum-credits')
+    if credits_elem:
+        # Replace <br> tags with newlines before extracting text
+        for br in credits_elem.find_all('br'):
+            br.replace_with('\n')
+        pieces['credits'] = credits_elem.get_text()
+
+    return pieces
+
+
+def build_bandcamp_data(pieces, url):
+    """Build the collection data dict from the extracted page pieces."""
+    json_data = pieces['json_ld']
+    embedded_data = pieces['tralbum']
+    meta = pieces['meta']
+
+    # Extract artist
+    artist = json_data.get('byArtist', {}).get('name', '') or meta.get('og:site_name', '')
+
+    # Extract title
+    title = json_data.get('name', '') or meta.get('og:title', '').split(' | ')[0]
+
+    # Extract release date/year
+    release_date = json_data.get('datePublished', '')
+    release_year = datetime.now().year
+    if release_date:
+        try:
+            release_year = datetime.fromisoformat(release_date.replace('Z', '+00:00')).year
+        except ValueError:
+            try:
+                # Bandcamp's JSON-LD uses dates like "01 Apr 1999 00:00:00 GMT"
+                release_year = datetime.strptime(release_date, '%d %b %Y %H:%M:%S %Z').year
+            except ValueError:
+                pass
+
+    # Extract description
+    description = json_data.get('description', '') or pieces['about']
+
+    # Extract cover image
+    cover_url = json_data.get('image', '') or meta.get('og:image', '')
+    if isinstance(cover_url, list):
+        cover_url = cover_url[0] if cover_url else ''
+
+    # Extract genres/keywords, falling back to the tag links
+    genres = json_data.get('keywords', [])
+    if isinstance(genres, str):
+        genres = [g.strip() for g in genres.split(',')]
+    if not genres:
+        genres = pieces['tags']
+
+    # The band's (or label's) home town, which Bandcamp also adds to the tags
+    location = ''
+    for key in ('byArtist', 'publisher'):
+        place = (json_data.get(key) or {}).get('foundingLocation') or {}
+        if isinstance(place, dict) and place.get('name'):
+            location = place['name']
+            break
+
+    # Extract tracklist (durations in seconds), falling back to the track table
+    tracklist = []
+    for track in embedded_data.get('trackinfo') or []:
+        track_title = track.get('title', '')
+        if track_title:
+            tracklist.append({
+                'position': str(track.get('track_num', 0)),
+                'title': track_title,
+                'duration': track.get('duration') or None,
+            })
+    if not tracklist:
+        tracklist = [
+            {'position': str(num), 'title': track_title, 'duration': None}
+            for num, track_title in pieces['track_rows']
+        ]
+
+    return {
+        'artist': artist,
+        'title': title,
+        'release_year': release_year,
+        'description': description,
+        'cover_url': cover_url,
+        'genres': genres,
+        'tracklist': tracklist,
+        'label': pieces['label'],
+        'location': location,
+        'credits_text': pieces['credits'],
+        'bandcamp_url': url,
+    }
+
+
+def parse_bandcamp_html(html, url):
+    """Parse an album page, using the fast scanner and soup only as a fallback."""
+    pieces = scan_page(html)
+    data = build_bandcamp_data(pieces, url)
+    if data['artist'] and data['title'] and data['tracklist']:
+        return data
+
+    # Fill whatever the fast scan could not find from the full tree
+    soup_pieces = soup_page_pieces(html)
+    for key, value in soup_pieces.items():
+        if not pieces[key]:
+            pieces[key] = value
+    return build_bandcamp_data(pieces, url)
+
+
+def extract_bandcamp_data(url, cache=None, refresh=False):
+    """Scrape album data from Bandcamp page."""
+    html = fetch_bandcamp_html(url, cache, refresh)
+    with span('parse', url=url):
+        return parse_bandcamp_html(html, url)
+
+
+def read_collection_export(path):
+    """Album URLs from a fan collection export (any text, CSV or JSON file), in order."""
+    with open(path, encoding='utf-8') as f:
+        urls = ALBUM_URL.findall(f.read())
+    return list(dict.fromkeys(canonical_url(url) for url in urls))
+
+
+class Source(SourceAdapter):
+    name = 'bandcamp'
+    template_version = 5
+
+    def url_for(self, data):
+        return data['bandcamp_url']
+
+    def is_cached(self, url, cache):
+        return cache.get('bandcamp-html', canonical_url(url)) is not None
+
+    def fetch(self, url, cache=None, refresh=False, options=None):
+        return extract_bandcamp_data(url, cache, refresh)
+
+    def document(self, data, date, options=None):
+        links = {'spotify': '', 'bandcamp': data['bandcamp_url'], 'appleMusic': ''}
+        return entry_document(data, date, links)
+
+    def list_library(self, ref, content_dir='content/collection', **kwargs):
+        """Albums in a fan collection export file, plus hand-made entries linking to them."""
+        remote = {url: None for url in read_collection_export(ref)}
+        return remote, linked_entries(content_dir, 'bandcamp', canonical_url)
@@ -0,0 +1,204 @@
+"""
+Fast extraction of the data blocks on a Bandcamp album page.
+
+scan_page() never tokenizes the whole page, most of which is player, fan and
+recommendation markup the importer doesn't read. The JSON payloads and the
+meta tags are found with regular expressions, and only the few elements with
+text the importer needs are fed to the standard library tokenizer. It
+collects:
+
+    json_ld   - the application/ld+json block
+    tralbum   - the data-tralbum attribute or `var TralbumData = {...};` payload
+    meta      - og:* / meta property values
+    label     - text of span.label
+    about     - text of div.tralbum-about
+    credits   - text of div.tralbum-credits, with <br> turned into newlines
+    tags      - text of a.tag links inside div.tralbum-tags
+
+Pieces that are not on the page are left empty; the importer falls back to
+the BeautifulSoup path only when required fields are still missing.
+"""
+
+import html
+import json
+import re
+from html.parser import HTMLParser
+
+TRALBUM_VAR = re.compile(r'var TralbumData = ({.*?});', re.DOTALL)
+# A start tag's attributes, allowing '>' inside quoted values
+_ATTRS = r"""(?:[^>"']|"[^"]*"|'[^']*')*"""
+LD_JSON = re.compile(rf"""<script\b(?=[^>]*\btype=["']?application/ld\+json){_ATTRS}>(.*?)</script\s*>""",
+                     re.DOTALL | re.IGNORECASE)
+DATA_TRALBUM = re.compile(r"""<script\b[^>]*?\sdata-tralbum=(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE)
+META_TAG = re.compile(rf'<meta\b{_ATTRS}>', re.IGNORECASE)
+# Start tags of the elements that hold text pieces; the scanner checks their classes exactly
+TEXT_ELEMENT = re.compile(
+    rf"""<(div|span)\b(?=[^>]*\bclass=["']?[^"'>]*\b(?:tralbum-about|tralbum-credits|tralbum-tags|label)\b){_ATTRS}>""",
+    re.IGNORECASE,
+)
+END_TAGS = {tag: re.compile(rf'<(/?){tag}\b[^>]*>', re.IGNORECASE) for tag in ('div', 'span')}
+
+# div class -> piece name for the text blocks we capture
+TEXT_BLOCKS = {
+    'tralbum-about': 'about',
+    'tralbum-credits': 'credits',
+}
+
+
+def empty_pieces():
+    return {
+        'json_ld': {},
+        'tralbum': {},
+        'meta': {},
+        'label': '',
+        'about': '',
+        'credits': '',
+        'tags': [],
+        'track_rows': [],
+    }
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return {}
+
+
+class BandcampPageScanner(HTMLParser):
+    """Tokenizer callbacks that pick the importer's data out of one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces = empty_pieces()
+        self.script_type = None
+        self.script_text = []
+        self.in_script = False
+        # (piece name, open div count) while inside a captured text block
+        self.block = None
+        self.block_depth = 0
+        self.block_text = []
+        self.tags_depth = 0
+        self.tag_text = None
+        self.label_text = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            self.in_script = True
+            self.script_type = attrs.get('type')
+            self.script_text = []
+            if 'data-tralbum' in attrs and not self.pieces['tralbum']:
+                self.pieces['tralbum'] = _loads(attrs['data-tralbum'])
+        elif tag == 'meta':
+            key = attrs.get('property') or attrs.get('name')
+            if key and key not in self.pieces['meta']:
+                self.pieces['meta'][key] = attrs.get('content', '')
+        elif tag == 'div':
+            classes = (attrs.get('class') or '').split()
+            if self.block:
+                self.block_depth += 1
+            elif 'tralbumData' in classes:
+                for css_class, piece in TEXT_BLOCKS.items():
+                    if css_class in classes and not self.pieces[piece]:
+                        self.block, self.block_depth, self.block_text = piece, 1, []
+            if self.tags_depth:
+                self.tags_depth += 1
+            elif 'tralbum-tags' in classes:
+                self.tags_depth = 1
+        elif tag == 'br' and self.block:
+            self.block_text.append('\n')
+        elif tag == 'a' and self.tags_depth and 'tag' in (attrs.get('class') or '').split():
+            self.tag_text = []
+        elif tag == 'span' and 'label' in (attrs.get('class') or '').split() and not self.pieces['label']:
+            self.label_text = []
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag == 'script':
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self.in_script:
+            self.in_script = False
+            text = ''.join(self.script_text)
+            if self.script_type == 'application/ld+json' and not self.pieces['json_ld']:
+                self.pieces['json_ld'] = _loads(text)
+            elif 'var TralbumData' in text and not self.pieces['tralbum']:
+                match = TRALBUM_VAR.search(text)
+                if match:
+                    self.pieces['tralbum'] = _loads(match.group(1))
+        elif tag == 'div':
+            if self.block:
+                self.block_depth -= 1
+                if self.block_depth == 0:
+                    self._close_block()
+            if self.tags_depth:
+                self.tags_depth -= 1
+        elif tag == 'a' and self.tag_text is not None:
+            self.pieces['tags'].append(''.join(self.tag_text).strip())
+            self.tag_text = None
+        elif tag == 'span' and self.label_text is not None:
+            self.pieces['label'] = ''.join(self.label_text).strip()
+            self.label_text = None
+
+    def handle_data(self, data):
+        if self.in_script:
+            self.script_text.append(data)
+            return
+        if self.block:
+            self.block_text.append(data)
+        if self.tag_text is not None:
+            self.tag_text.append(data)
+        if self.label_text is not None:
+            self.label_text.append(data)
+
+    def _close_block(self):
+        text = ''.join(self.block_text)
+        if self.block == 'about':
+            # Same as BeautifulSoup's get_text(strip=True)
+            text = ''.join(part.strip() for part in self.block_text)
+        self.pieces[self.block] = text
+        self.block = None
+
+
+def _first_json(texts):
+    """The first of texts that parses to a non-empty JSON object."""
+    for text in texts:
+        value = _loads(text)
+        if value:
+            return value
+    return {}
+
+
+def _element_end(page, start, tag):
+    """Index just past the end tag closing the <tag> element starting at start."""
+    depth = 0
+    for match in END_TAGS[tag.lower()].finditer(page, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(page)
+
+
+def scan_page(page):
+    """Collect the Bandcamp page pieces without tokenizing the whole page."""
+    scanner = BandcampPageScanner()
+    pieces = scanner.pieces
+    pieces['json_ld'] = _first_json(match.group(1) for match in LD_JSON.finditer(page))
+    # Whichever payload comes first, as the browser would see it
+    payloads = [(match.start(), html.unescape(match.group(1) or match.group(2) or ''))
+                for match in DATA_TRALBUM.finditer(page)]
+    payloads.extend((match.start(), match.group(1)) for match in TRALBUM_VAR.finditer(page))
+    pieces['tralbum'] = _first_json(text for _, text in sorted(payloads))
+
+    scanner.feed(''.join(META_TAG.findall(page)))
+    # Elements nested in one already fed (a label inside the about text) were scanned with it
+    fed_to = 0
+    for match in TEXT_ELEMENT.finditer(page):
+        if match.start() < fed_to:
+            continue
+        fed_to = _element_end(page, match.start(), match.group(1))
+        scanner.feed(page[match.start():fed_to])
+    scanner.close()
+    return pieces
@@ -0,0 +1,614 @@
+"""
+Discogs source adapter: releases fetched from the Discogs API.
+
+Without DISCOGS_TOKEN the API allows 25 requests/min, with it 60/min; batch
+imports are paced by a token bucket to stay under the limit. A dry-run mode
+serves deterministic fixture releases for offline throughput testing.
+
+With the enrich option, the artists, labels and master release a release
+refers to are fetched too (all artists, full release and track credits,
+parent labels, the original year and the artist's profile). They go through
+an EntityCache, so an artist or label shared by many releases in a batch
+costs one request per run, and none at all once it is in the response cache.
+
+load_dump() reads releases from a Discogs monthly XML data dump instead (see
+praesens.sources.discogs_dump); those are served without any API request.
+
+Get a Discogs token at: https://www.discogs.com/settings/developers
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import discogs_client
+from discogs_client.fetchers import Fetcher
+
+from ..cache import EntityCache
+from ..entry import entry_document
+from ..http_session import USER_AGENT, default_client
+from ..slugs import slugify
+from ..sync import iter_pages
+from ..timing import span, timings
+from . import SourceAdapter
+
+COLLECTION_URL = 'https://api.discogs.com/users/{username}/collection/folders/{folder}/releases'
+COLLECTION_PAGE_SIZE = 100
+
+# Discogs' "Various" artist on compilations, not worth a lookup
+VARIOUS_ARTIST_ID = 194
+DISAMBIGUATION = re.compile(r'\s+\(\d+\)$')
+PROFILE_LENGTH = 600
+# Discogs profile markup -> plain text
+PROFILE_MARKUP = [
+    (re.compile(r'\[url=[^\]]*\](.*?)\[/url\]'), r'\1'),
+    (re.compile(r'\[[almr]=([^\]]+)\]'), r'\1'),
+    (re.compile(r'\[[almr]\d+\]'), ''),
+    (re.compile(r'\[/?[biu]\]'), ''),
+]
+
+
+def extract_release_id_from_url(url):
+    """Extract release ID from Discogs URL."""
+    # URLs are like: https://www.discogs.com/release/1152173-Artist-Album
+    match = re.search(r'/release/(\d+)', url)
+    if match:
+        return int(match.group(1))
+    raise ValueError(f"Could not extract release ID from URL: {url}")
+
+
+class SessionFetcher(Fetcher):
+    """discogs_client fetcher that goes through the shared pooled HTTP client.
+
+    Retries and 429 backoff are handled by HttpClient, so the library's own
+    backoff loop is disabled.
+    """
+    backoff_enabled = False
+
+    def __init__(self, http, user_token=None):
+        self.http = http
+        self.user_token = user_token
+
+    def fetch(self, client, method, url, data=None, headers=None, json_format=True):
+        data = json.dumps(data) if json_format and data else data
+        params = {'token': self.user_token} if self.user_token else None
+        resp = self.http.request(method, url, data=data, headers=headers, params=params)
+        self.rate_limit = resp.headers.get('X-Discogs-Ratelimit')
+        self.rate_limit_used = resp.headers.get('X-Discogs-Ratelimit-Used')
+        self.rate_limit_remaining = resp.headers.get('X-Discogs-Ratelimit-Remaining')
+        return resp.content, resp.status_code
+
+
+def create_client(token=None, http=None):
+    """Create a Discogs API client (with or without token)."""
+    client = discogs_client.Client(USER_AGENT)
+    client._fetcher = SessionFetcher(http or default_client(), token)
+    if token:
+        print("✓ Using authenticated API (60 requests/min)")
+    else:
+        print("ℹ Using unauthenticated API (25 requests/min limit)")
+    return client
+
+
+def fetch_release(client, release_id):
+    """Fetch the raw release JSON from the Discogs API."""
+    release = client.release(release_id)
+    # Releases are fetched lazily, refresh() performs the actual request
+    release.refresh()
+    return release.data
+
+
+def fetch_entity(client, kind, entity_id):
+    """Fetch the raw JSON of an artist, label or master release ('artist', 'label', 'master')."""
+    entity = getattr(client, kind)(entity_id)
+    entity.refresh()
+    return entity.data
+
+
+def discogs_name(name):
+    """Artist or label name without Discogs' " (2)" disambiguation suffix."""
+    return DISAMBIGUATION.sub('', name or '')
+
+
+def profile_text(profile):
+    """Plain text of the first paragraph of a Discogs profile, without its [a=...] markup."""
+    text = (profile or '').strip().split('\n')[0].strip()
+    for pattern, replacement in PROFILE_MARKUP:
+        text = pattern.sub(replacement, text)
+    if len(text) > PROFILE_LENGTH:
+        text = text[:PROFILE_LENGTH].rsplit(' ', 1)[0] + '…'
+    return text
+
+
+def release_entities(release, lookup):
+    """Artist, label and master release JSON for a release.
+
+    lookup(kind, entity_id) returns an entity's JSON, or None when it could
+    not be fetched; each distinct entity of the release is looked up once.
+    """
+    artist_ids = [artist.get('id') for artist in release.get('artists') or []]
+    label_ids = [label.get('id') for label in release.get('labels') or []]
+    artists = [lookup('artist', i) for i in dict.fromkeys(artist_ids) if i and i != VARIOUS_ARTIST_ID]
+    labels = [lookup('label', i) for i in dict.fromkeys(label_ids) if i]
+    master_id = release.get('master_id')
+    return {
+        'artists': [artist for artist in artists if artist],
+        'labels': [label for label in labels if label],
+        'master': lookup('master', master_id) if master_id else None,
+    }
+
+
+def credit_sections(release):
+    """All release and track credits as [(section, lines)], one line per person and role."""
+    release_lines = []
+    for credit in release.get('extraartists') or []:
+        name = discogs_name(credit.get('name'))
+        role = credit.get('role', '')
+        if name:
+            line = f"{name} - {role}" if role else name
+            release_lines.append(f"{line} ({credit['tracks']})" if credit.get('tracks') else line)
+
+    # Track credits are listed per track; collect each person/role once with all its tracks
+    track_credits = {}
+    for track in release.get('tracklist') or []:
+        for part in [track, *(track.get('sub_tracks') or [])]:
+            for credit in part.get('extraartists') or []:
+                name = discogs_name(credit.get('name'))
+                if name:
+                    positions = track_credits.setdefault((name, credit.get('role', '')), [])
+                    position = part.get('position') or track.get('position')
+                    if position and position not in positions:
+                        positions.append(position)
+    track_lines = []
+    for (name, role), positions in track_credits.items():
+        line = f"{name} - {role}" if role else name
+        track_lines.append(f"{line} ({', '.join(positions)})" if positions else line)
+    return [('Credits', release_lines), ('Track Credits', track_lines)]
+
+
+def enriched_fields(release, entities, release_year):
+    """Data dict fields added by enrichment: all artists, full credits, parent labels,
+    original year from the master release and the artist's profile."""
+    fields = {
+        'artists': list(dict.fromkeys(
+            discogs_name(artist.get('name')) for artist in release.get('artists') or [] if artist.get('name')
+        )),
+        'credit_sections': credit_sections(release),
+    }
+    fields['credits_text'] = '\n'.join(line for _, lines in fields['credit_sections'] for line in lines)
+
+    # The master release carries the original release year; the release itself may be a reissue
+    master_year = (entities.get('master') or {}).get('year')
+    if master_year and master_year < release_year:
+        fields['release_year'] = master_year
+        fields['pressing_year'] = release_year
+
+    parents = [
+        discogs_name((label.get('parent_label') or {}).get('name'))
+        for label in entities.get('labels') or []
+    ]
+    fields['parent_labels'] = [parent for parent in dict.fromkeys(parents) if parent]
+
+    for artist in entities.get('artists') or []:
+        profile = profile_text(artist.get('profile'))
+        if profile:
+            fields['artist_profile'] = profile
+            break
+    return fields
+
+
+def parse_discogs_release(release, url, entities=None):
+    """Build the collection data dict from raw Discogs release JSON.
+
+    entities are the release's artist/label/master JSON from
+    release_entities(); when given, the data is enriched with them.
+    """
+    # Extract artist
+    artists = release.get('artists') or []
+    artist = artists[0].get('name', '') if artists else ''
+
+    # Extract title
+    title = release.get('title', '')
+
+    # Extract year
+    release_year = release.get('year') or datetime.now().year
+
+    # Extract label and catalog number
+    label = ''
+    catalog_number = ''
+    labels = release.get('labels') or []
+    if labels:
+        label = labels[0].get('name', '')
+        catalog_number = labels[0].get('catno', '')
+
+    # Extract genres and styles
+    genres = []
+    genres.extend((release.get('genres') or [])[:3])
+    for style in (release.get('styles') or [])[:3]:
+        if style not in genres and len(genres) < 5:
+            genres.append(style)
+
+    # Extract tracklist (headings name the sides/discs after them, index tracks group sub-tracks)
+    tracklist = []
+    for track in release.get('tracklist') or []:
+        kind = track.get('type_', 'track')
+        if kind == 'heading':
+            if track.get('title'):
+                tracklist.append({'heading': True, 'title': track['title']})
+            continue
+        parts = (track.get('sub_tracks') if kind == 'index' else None) or [track]
+        for part in parts:
+            track_title = part.get('title')
+            if part is not track and track.get('title'):
+                track_title = f"{track['title']}: {track_title}"
+            if track_title:
+                tracklist.append({
+                    'position': (part.get('position') or track.get('position') or '').strip(),
+                    'title': track_title,
+                    'duration': part.get('duration') or None,
+                })
+
+    # Extract notes/description
+    description = (release.get('notes') or '')[:500]
+
+    # Extract credits
+    credit_lines = []
+    for credit in (release.get('extraartists') or [])[:20]:
+        name = credit.get('name', '')
+        role = credit.get('role', '')
+        if name and role:
+            credit_lines.append(f"{name} - {role}")
+        elif name:
+            credit_lines.append(name)
+    credits_text = '\n'.join(credit_lines)
+
+    # Extract cover image: the one Discogs marks primary, since the first is sometimes a back cover or label scan
+    cover_url = ''
+    images = [image for image in release.get('images') or [] if image.get('uri')]
+    primary = [image for image in images if image.get('type') == 'primary']
+    if primary or images:
+        cover_url = (primary or images)[0]['uri']
+
+    # Extract YouTube link from videos
+    youtube_url = ''
+    for video in release.get('videos') or []:
+        video_url = video.get('uri', '')
+        # Check if it's a YouTube video
+        if 'youtube.com' in video_url.lower() or 'youtu.be' in video_url.lower():
+            youtube_url = video_url
+            break  # Use the first YouTube video found
+
+    data = {
+        'artist': artist,
+        'title': title,
+        'release_year': release_year,
+        'description': description,
+        'cover_url': cover_url,
+        'genres': genres,
+        'tracklist': tracklist,
+        'label': label,
+        'catalog_number': catalog_number,
+        'credits_text': credits_text,
+        'discogs_url': url,
+        'youtube_url': youtube_url,
+    }
+    if entities is not None:
+        data.update(enriched_fields(release, entities, release_year))
+    return data
+
+
+def load_release(url, token=None, client=None, cache=None, refresh=False):
+    """Raw release JSON from the Discogs API (or the response cache)."""
+    release_id = extract_release_id_from_url(url)
+
+    release = None
+    if cache is not None and not refresh:
+        cached = cache.get('discogs-release', str(release_id))
+        if cached is not None:
+            print(f"✓ Using cached release {release_id}")
+            release = json.loads(cached)
+
+    if release is None:
+        print(f"Fetching release {release_id} from Discogs API...")
+        if client is None:
+            client = create_client(token)
+        with span('http_fetch', url=url):
+            release = fetch_release(client, release_id)
+        if cache is not None:
+            cache.set('discogs-release', str(release_id), json.dumps(release))
+    return release
+
+
+def extract_discogs_data(url, token=None, client=None, cache=None, refresh=False):
+    """Fetch album data from Discogs API (or the response cache)."""
+    release = load_release(url, token, client, cache, refresh)
+    with span('parse', url=url):
+        return parse_discogs_release(release, url)
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace Discogs API requests."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit, burst=5):
+        """Bucket that never exceeds `limit` requests in any 60 second window."""
+        burst = max(1, min(burst, limit // 2))
+        return cls((limit - burst) / 60.0, burst)
+
+    def try_acquire(self):
+        """Take a token if one is available; returns 0.0, or the seconds until there is one."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class DryRunResource:
+    """Stand-in for a lazily fetched discogs_client Release, Artist, Label or Master."""
+
+    def __init__(self, kind, resource_id, latency):
+        self.kind = kind
+        self.resource_id = resource_id
+        self.latency = latency
+        self.data = {'id': resource_id}
+
+    def refresh(self):
+        time.sleep(self.latency)
+        if self.kind == 'release':
+            self.data = dry_run_release_data(self.resource_id)
+        else:
+            self.data = dry_run_entity_data(self.kind, self.resource_id)
+
+
+class DryRunClient:
+    """Offline Discogs client returning fixture data with simulated latency."""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+
+    def release(self, release_id):
+        return DryRunResource('release', release_id, self.latency)
+
+    def artist(self, artist_id):
+        return DryRunResource('artist', artist_id, self.latency)
+
+    def label(self, label_id):
+        return DryRunResource('label', label_id, self.latency)
+
+    def master(self, master_id):
+        return DryRunResource('master', master_id, self.latency)
+
+
+def dry_run_release_data(release_id):
+    """Deterministic fixture release JSON for offline runs."""
+    sides = 'AB' if release_id % 3 else 'ABCD'
+    tracklist = [
+        {'position': f"{side}{n}", 'title': f"Track {side}{n}", 'duration': f"{3 + n}:{n * 7:02d}", 'type_': 'track'}
+        for side in sides
+        for n in range(1, 4)
+    ]
+    return {
+        'id': release_id,
+        'title': f"Fixture Release {release_id}",
+        'year': 1970 + release_id % 50,
+        'artists': [{'id': 1000 + release_id % 97, 'name': f"Fixture Artist {release_id % 97}"}],
+        'labels': [{'id': 500, 'name': 'Fixture Records', 'catno': f"FIX-{release_id}"}],
+        # Pairs of fixture releases are pressings of the same master
+        'master_id': 20000 + release_id // 2,
+        'genres': ['Jazz'],
+        'styles': ['Fusion', 'Jazz-Funk'],
+        'tracklist': tracklist,
+        'notes': f"Offline fixture for release {release_id}.",
+        'extraartists': [{'name': 'Fixture Player', 'role': 'Drums'}],
+        'images': [{'type': 'primary', 'uri': f"dryrun://covers/{release_id}.jpg"}],
+        'videos': [],
+    }
+
+
+def dry_run_entity_data(kind, entity_id):
+    """Deterministic fixture artist, label or master JSON for offline runs."""
+    if kind == 'artist':
+        name = f"Fixture Artist {entity_id - 1000}"
+        return {'id': entity_id, 'name': name,
+                'profile': f"[b]{name}[/b] recorded for [l=Fixture Records] with [a=Fixture Player]."}
+    if kind == 'label':
+        return {'id': entity_id, 'name': 'Fixture Records', 'parent_label': {'id': 501, 'name': 'Fixture Group'}}
+    return {'id': entity_id, 'year': 1960 + entity_id % 10}
+
+
+def dry_run_download(latency):
+    """Cover downloader for dry runs that only simulates transfer time."""
+    def download(url, entry_dir, validators=None):
+        time.sleep(latency)
+        return {'status': 'not-modified', 'path': str(Path(entry_dir) / 'cover.jpg')}
+    return download
+
+
+def release_url(release_id):
+    """Canonical Discogs release page URL."""
+    return f"https://www.discogs.com/release/{release_id}"
+
+
+def collection_page_fetcher(username, folder=0, token=None, bucket=None, http=None):
+    """fetch_page(page) for a user's collection folder, paced by the rate limiter."""
+    http = http or default_client()
+    url = COLLECTION_URL.format(username=username, folder=folder)
+
+    def fetch_page(page):
+        if bucket is not None:
+            timings.record('rate_limit_wait', bucket.acquire(), url=url)
+        params = {'page': page, 'per_page': COLLECTION_PAGE_SIZE}
+        if token:
+            params['token'] = token
+        print(f"Fetching collection page {page}...")
+        with span('http_fetch', url=url, page=page):
+            response = http.get(url, params=params)
+            response.raise_for_status()
+        return response.json()
+
+    return fetch_page
+
+
+def dry_run_collection_page(page, pages=3):
+    """Offline collection listing page with fixture releases."""
+    ids = range((page - 1) * 5 + 1, page * 5 + 1)
+    return {
+        'pagination': {'page': page, 'pages': pages, 'per_page': 5},
+        'releases': [
+            {'id': release_id, 'basic_information': dry_run_release_data(release_id)}
+            for release_id in ids
+        ],
+    }
+
+
+def list_collection(fetch_page):
+    """Map release URL -> expected entry slug for every release in a collection."""
+    remote = {}
+    for item in iter_pages(fetch_page, 'releases'):
+        info = item.get('basic_information') or {}
+        artists = info.get('artists') or []
+        artist = artists[0].get('name', '') if artists else ''
+        remote[release_url(item['id'])] = slugify(f"{artist}-{info.get('title', '')}")
+    return remote
+
+
+class Source(SourceAdapter):
+    name = 'discogs'
+    template_version = 5
+    options = ('youtube_url', 'enrich')
+    supports_dry_run = True
+
+    def __init__(self, dry_run=False, token=None, rate_limit=None):
+        super().__init__(dry_run)
+        self.token = token
+        self.rate_limit = rate_limit or (60 if token else 25)
+        self.bucket = TokenBucket.per_minute(self.rate_limit)
+        self.client = None
+        self.client_lock = threading.Lock()
+        # Artists, labels and masters shared by the run's releases are fetched once
+        self.entities = EntityCache()
+        # Release ID -> release JSON read from a data dump
+        self.dump_releases = {}
+        if dry_run:
+            self.client = DryRunClient()
+            self.download = dry_run_download(0.5)
+
+    def get_client(self):
+        """API client, created on the first request that misses the cache."""
+        with self.client_lock:
+            if self.client is None:
+                self.client = create_client(self.token)
+            return self.client
+
+    def source_key(self, url):
+        return extract_release_id_from_url(url)
+
+    def url_for(self, data):
+        return data['discogs_url']
+
+    def is_cached(self, url, cache):
+        return cache.get('discogs-release', str(extract_release_id_from_url(url))) is not None
+
+    def needs_request(self, url, cache=None, refresh=False):
+        if extract_release_id_from_url(url) in self.dump_releases:
+            return False
+        return super().needs_request(url, cache, refresh)
+
+    def load_dump(self, path, urls, cache=None):
+        """Read the releases of urls from a data dump in one pass; returns the number found.
+
+        Found releases are also stored in the response cache, so regenerate
+        rebuilds their entries from the dump data later.
+        """
+        from .discogs_dump import iter_dump_releases
+
+        ids = {extract_release_id_from_url(url) for url in urls}
+        stats = {}
+        started = time.perf_counter()
+        with span('dump_scan', url=str(path)):
+            for release in iter_dump_releases(path, ids, stats):
+                self.dump_releases[release['id']] = release
+        elapsed = time.perf_counter() - started
+        found = [release_id for release_id in ids if release_id in self.dump_releases]
+        if cache is not None and found:
+            cache.set_many('discogs-release', [
+                (str(release_id), json.dumps(self.dump_releases[release_id])) for release_id in found
+            ])
+        print(f"✓ Found {len(found)}/{len(ids)} releases in {path} "
+              f"({stats['scanned']} read in {elapsed:.1f}s, {stats['scanned'] / elapsed if elapsed else 0:.0f}/s)")
+        if len(found) < len(ids):
+            print(f"ℹ {len(ids) - len(found)} releases not in the dump will be fetched from the API")
+        return len(found)
+
+    def lookup(self, kind, entity_id, cache=None, refresh=False):
+        """Artist, label or master JSON through the entity cache, or None if it can't be fetched."""
+        def fetch():
+            name = f"{kind}/{entity_id}"
+            timings.record('rate_limit_wait', self.bucket.acquire(), url=name)
+            with span('entity_fetch', url=name):
+                return fetch_entity(self.get_client(), kind, entity_id)
+
+        try:
+            return self.entities.get(f"discogs-{kind}", entity_id, fetch, cache, refresh)
+        except Exception as e:
+            print(f"Warning: Could not fetch Discogs {kind} {entity_id}: {e}")
+            return None
+
+    def fetch(self, url, cache=None, refresh=False, options=None):
+        release = self.dump_releases.get(extract_release_id_from_url(url))
+        if release is None:
+            client = self.client
+            if client is None and (cache is None or refresh or not self.is_cached(url, cache)):
+                client = self.get_client()
+            release = load_release(url, client=client, cache=cache, refresh=refresh)
+
+        entities = None
+        if (options or {}).get('enrich'):
+            entities = release_entities(release, lambda kind, i: self.lookup(kind, i, cache, refresh))
+        with span('parse', url=url):
+            return parse_discogs_release(release, url, entities)
+
+    def document(self, data, date, options=None):
+        # A --youtube override wins over the first video in the release metadata
+        youtube_url = (options or {}).get('youtube_url') or data.get('youtube_url', '')
+        links = {'spotify': '', 'bandcamp': '', 'appleMusic': ''}
+        if youtube_url:
+            links['youtube'] = youtube_url
+        return entry_document(data, date, links)
+
+    def list_library(self, ref, content_dir='content/collection', folder=0, **kwargs):
+        """Releases in a user's collection folder (ref is the Discogs username)."""
+        if self.dry_run:
+            fetch_page = dry_run_collection_page
+        else:
+            fetch_page = collection_page_fetcher(ref, folder, self.token, self.bucket)
+        return list_collection(fetch_page), {}
@@ -0,0 +1,167 @@
+"""
+Releases read from the Discogs monthly data dump instead of the API.
+
+Discogs publishes every release as one XML file each month
+(discogs_YYYYMMDD_releases.xml.gz, several GB compressed).
+iter_dump_releases() streams it one <release> at a time, so memory stays
+flat however large the dump is, and turns the releases asked for into the
+same JSON the API returns for /releases/{id}. Releases are cut out of the
+byte stream at their closing tag and only the wanted ones are parsed: an
+iterparse over the whole tree spends most of its time handing the ~400
+elements of every release to Python, and an import needs a few thousand
+releases out of millions. parse_discogs_release() then builds entries from them as
+usual, without a single API request.
+
+The dump lacks a few things the API has: image URLs (Discogs blanks them,
+so entries come without a cover), release-level `year` (taken from
+`released`) and track types (a track with sub-tracks is an index track, one
+without position and duration a heading).
+"""
+
+import gzip
+import re
+import xml.etree.ElementTree as ET
+
+BLOCK_SIZE = 1024 * 1024
+RELEASE_END = b'</release>'
+RELEASE_ID = re.compile(rb'<release\b[^>]*?\sid="(\d+)"')
+
+
+def open_dump(path):
+    """Binary stream of a dump, gzipped or not."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _artists(element):
+    """<artists>/<extraartists> children as API artist dicts."""
+    if element is None:
+        return []
+    return [
+        {
+            'id': _int(artist.findtext('id')),
+            'name': artist.findtext('name') or '',
+            'anv': artist.findtext('anv') or '',
+            'join': artist.findtext('join') or '',
+            'role': artist.findtext('role') or '',
+            'tracks': artist.findtext('tracks') or '',
+        }
+        for artist in element
+    ]
+
+
+def _track(element):
+    track = {
+        'position': element.findtext('position') or '',
+        'title': element.findtext('title') or '',
+        'duration': element.findtext('duration') or '',
+        'extraartists': _artists(element.find('extraartists')),
+    }
+    sub_tracks = element.find('sub_tracks')
+    if sub_tracks is not None and len(sub_tracks):
+        track['type_'] = 'index'
+        track['sub_tracks'] = [_track(sub_track) for sub_track in sub_tracks]
+    elif not track['position'] and not track['duration']:
+        track['type_'] = 'heading'
+    else:
+        track['type_'] = 'track'
+    return track
+
+
+def release_json(element):
+    """API-shaped release JSON for a <release> element of the dump."""
+    released = element.findtext('released') or ''
+    release = {
+        'id': int(element.get('id')),
+        'status': element.get('status', ''),
+        'title': element.findtext('title') or '',
+        'year': _int(released[:4]) or 0,
+        'released': released,
+        'country': element.findtext('country') or '',
+        'notes': element.findtext('notes') or '',
+        'artists': _artists(element.find('artists')),
+        'extraartists': _artists(element.find('extraartists')),
+        'labels': [
+            {'id': _int(label.get('id')), 'name': label.get('name', ''), 'catno': label.get('catno', '')}
+            for label in element.iterfind('labels/label')
+        ],
+        'genres': [genre.text for genre in element.iterfind('genres/genre') if genre.text],
+        'styles': [style.text for style in element.iterfind('styles/style') if style.text],
+        'tracklist': [_track(track) for track in element.iterfind('tracklist/track')],
+        # Image URIs are blank in the dumps since 2018
+        'images': [
+            {'type': image.get('type', ''), 'uri': image.get('uri')}
+            for image in element.iterfind('images/image') if image.get('uri')
+        ],
+        'videos': [
+            {'uri': video.get('src', ''), 'title': video.findtext('title') or ''}
+            for video in element.iterfind('videos/video')
+        ],
+    }
+    master_id = _int(element.findtext('master_id'))
+    if master_id:
+        release['master_id'] = master_id
+    return release
+
+
+def iter_release_chunks(stream, block_size=BLOCK_SIZE):
+    """Yield the bytes of each <release>...</release> in a dump stream.
+
+    Markup can't contain a literal "</release>" anywhere but at the end of a
+    release (text has "<" escaped), so the stream is split on it without
+    parsing; only the current block and an unfinished release are held.
+    """
+    buffer = b''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            return
+        buffer += block
+        start = 0
+        while True:
+            end = buffer.find(RELEASE_END, start)
+            if end < 0:
+                break
+            end += len(RELEASE_END)
+            chunk = buffer[start:end]
+            begin = chunk.find(b'<release ')
+            if begin >= 0:
+                yield chunk[begin:]
+            start = end
+        buffer = buffer[start:]
+
+
+def iter_dump_releases(path, ids=None, stats=None):
+    """Yield release JSON for every release in a dump, or only those whose id is in ids.
+
+    Releases that aren't wanted are skipped by their id attribute without
+    being parsed, and reading stops as soon as every id has been found.
+    stats, if given, is a dict that gets the number of releases read as
+    'scanned'.
+    """
+    remaining = set(ids) if ids is not None else None
+    if stats is not None:
+        stats['scanned'] = 0
+    if remaining is not None and not remaining:
+        return
+    with open_dump(path) as stream:
+        for chunk in iter_release_chunks(stream):
+            if stats is not None:
+                stats['scanned'] += 1
+            if remaining is not None:
+                match = RELEASE_ID.match(chunk)
+                release_id = int(match.group(1)) if match else None
+                if release_id not in remaining:
+                    continue
+                remaining.discard(release_id)
+            yield release_json(ET.fromstring(chunk))
+            if remaining is not None and not remaining:
+                return
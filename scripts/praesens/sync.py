@@ -0,0 +1,98 @@
+"""
+Library-wide sync helpers shared by the importers.
+
+A sync lists a whole remote library (a Discogs user collection folder or a
+Bandcamp fan collection export), diffs it against the entries already in
+content/collection and returns a plan:
+
+    create   - remote items with no entry yet
+    update   - remote items with a generated entry; fields edited by hand are
+               kept when it is rewritten (see entry.updated_entry)
+    existing - remote items whose entry exists but is not managed by the
+               importers (hand-made, or merged into another source's
+               entry), left alone
+    removed  - managed entries of this source no longer in the library;
+               they are flagged in the manifest, never deleted
+
+Paging and diffing only depend on the callables passed in;
+scripts/check_sync_plan.py runs both over the recorded listings in
+scripts/fixtures/.
+"""
+
+import re
+from pathlib import Path
+
+
+def linked_entries(content_dir, link_name, source_key):
+    """Map source identity -> slug for entries that link to a source in album.links.
+
+    Lets a sync recognize hand-made entries (not in the manifest) by their
+    bandcamp = "..." link even though their slug is unknown up front.
+    """
+    pattern = re.compile(rf'^{re.escape(link_name)} = "(.+)"$', re.MULTILINE)
+    linked = {}
+    for index_path in Path(content_dir).glob('*/index.md'):
+        match = pattern.search(index_path.read_text(encoding='utf-8'))
+        if match:
+            linked[source_key(match.group(1))] = index_path.parent.name
+    return linked
+
+
+def iter_pages(fetch_page, items_key):
+    """Yield every item of a paginated Discogs-style listing.
+
+    fetch_page(page) returns the decoded JSON for a 1-based page, with
+    {'pagination': {'page': n, 'pages': total}, items_key: [...]}.
+    """
+    page = 1
+    while True:
+        body = fetch_page(page)
+        yield from body.get(items_key) or []
+        pages = (body.get('pagination') or {}).get('pages', 1)
+        if page >= pages:
+            return
+        page += 1
+
+
+def plan_sync(remote, manifest, source, source_key, content_dir='content/collection', linked=None):
+    """Diff remote items against existing entries.
+
+    remote maps url -> expected slug (or None if unknown before fetching);
+    source_key(url) normalizes a URL to the identity used for matching, such
+    as a Discogs release ID. linked optionally maps identities to unmanaged
+    entries found by linked_entries().
+    """
+    linked = linked or {}
+    content_dir = Path(content_dir)
+    managed = {}
+    merged = set()
+    for slug, entry in manifest.entries.items():
+        if entry.get('source') == source:
+            managed[source_key(entry['url'])] = slug
+        # Items merged into another source's entry are already in the collection
+        merged.update(source_key(item['url']) for item in entry.get('merged', []) if item['source'] == source)
+
+    plan = {'create': [], 'update': [], 'existing': [], 'removed': []}
+    seen = set()
+    for url, expected_slug in remote.items():
+        key = source_key(url)
+        seen.add(key)
+        if key in managed:
+            # Hand edits don't make an entry unmanaged; the update keeps the edited fields
+            plan['update'].append(url)
+        elif key in linked or key in merged or (expected_slug and (content_dir / expected_slug / 'index.md').exists()):
+            plan['existing'].append(url)
+        else:
+            plan['create'].append(url)
+
+    for key, slug in sorted(managed.items(), key=lambda item: item[1]):
+        if key not in seen:
+            plan['removed'].append(slug)
+    return plan
+
+
+def print_plan(plan):
+    print(f"Sync plan: {len(plan['create'])} to create, {len(plan['update'])} to update, "
+          f"{len(plan['existing'])} unmanaged, {len(plan['removed'])} no longer in library")
+    for slug in plan['removed']:
+        print(f"  ℹ {slug} is no longer in the library (flagged in manifest)")
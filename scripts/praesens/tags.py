@@ -0,0 +1,276 @@
+"""
+Canonical genres for collection entries.
+
+Bandcamp keywords are free-form tags: besides genres they hold the band's
+city, its label and case or spelling variants of the same tag
+("Dischord", "dischord records", "Washington DC", "punk", "Punk"). Discogs
+genres and styles come from a fixed vocabulary. canonical_tags() sorts a
+raw tag list from either source into:
+
+    genres    canonical names (Discogs spellings where Discogs has the genre
+              or style), each once, in the order they first appeared
+    labels    tags naming the entry's label ("... Records" tags, and the
+              label or sub-label the source page gave)
+    places    cities, regions and countries
+    dropped   the artist's name and format tags ("vinyl", "lp")
+    unknown   genres not in the vocabulary; kept, but worth an alias
+
+Tags are compared by key: lowercase ASCII letters and digits only, so
+"Hip-Hop", "hip hop" and "HIPHOP" are one tag. The vocabulary below is
+turned into a single {key: (kind, name)} dict once, so each tag costs one
+normalization and one lookup. Labels, the artist and the source's location
+are added per entry on top of it.
+
+Adding a genre, style, alias or place to the lists below and running
+`collection.py tags --write` applies it to the entries already written.
+"""
+
+import re
+
+from .frontmatter import parse_entry, set_value
+from .matching import normalize
+
+# Discogs genres and (most) styles, in Discogs spelling
+GENRES = [
+    'Blues', 'Brass & Military', "Children's", 'Classical', 'Electronic', 'Folk, World, & Country', 'Funk / Soul',
+    'Hip Hop', 'Jazz', 'Latin', 'Non-Music', 'Pop', 'Reggae', 'Rock', 'Stage & Screen',
+]
+STYLES = [
+    # Jazz
+    'Afro-Cuban Jazz', 'Avant-garde Jazz', 'Big Band', 'Bop', 'Bossa Nova', 'Contemporary Jazz', 'Cool Jazz',
+    'Dixieland', 'Free Improvisation', 'Free Jazz', 'Fusion', 'Hard Bop', 'Jazz-Funk', 'Jazz-Rock', 'Latin Jazz',
+    'Modal', 'Post Bop', 'Smooth Jazz', 'Soul-Jazz', 'Spiritual Jazz', 'Swing', 'Third Stream',
+    # Funk / Soul, Blues
+    'Afrobeat', 'Boogie', 'Disco', 'Funk', 'Gospel', 'Neo Soul', 'New Jack Swing', 'Northern Soul', 'P.Funk',
+    'Rhythm & Blues', 'Soul', 'Chicago Blues', 'Country Blues', 'Delta Blues', 'Electric Blues',
+    # Rock
+    'Alternative Rock', 'Art Rock', 'Avantgarde', 'Black Metal', 'Blues Rock', 'Classic Rock', 'Country Rock',
+    'Death Metal', 'Doom Metal', 'Dream Pop', 'Emo', 'Experimental', 'Folk Rock', 'Garage Rock', 'Glam',
+    'Goth Rock', 'Grunge', 'Hard Rock', 'Hardcore', 'Heavy Metal', 'Indie Rock', 'Krautrock', 'Lo-Fi',
+    'Math Rock', 'New Wave', 'Noise', 'Pop Rock', 'Post Rock', 'Post-Hardcore', 'Post-Punk', 'Power Pop',
+    'Prog Rock', 'Psychedelic Rock', 'Punk', 'Rock & Roll', 'Rockabilly', 'Shoegaze', 'Ska', 'Sludge Metal',
+    'Southern Rock', 'Space Rock', 'Stoner Rock', 'Surf', 'Thrash',
+    # Electronic
+    'Abstract', 'Acid', 'Acid House', 'Ambient', 'Berlin-School', 'Breakbeat', 'Breaks', 'Broken Beat',
+    'Chiptune', 'Coldwave', 'Dark Ambient', 'Darkwave', 'Deep House', 'Downtempo', 'Drone', 'Drum n Bass',
+    'Dub', 'Dub Techno', 'Dubstep', 'EBM', 'Electro', 'Electroclash', 'Footwork', 'Glitch', 'Grime', 'House',
+    'IDM', 'Industrial', 'Italo-Disco', 'Jungle', 'Leftfield', 'Minimal', 'Minimal Techno', 'Musique Concrète',
+    'Nu-Disco', 'Power Electronics', 'Synth-pop', 'Tech House', 'Techno', 'Trance', 'Trip Hop', 'UK Garage',
+    'Vaporwave',
+    # Hip Hop, Reggae, Latin
+    'Boom Bap', 'Cloud Rap', 'Conscious', 'Gangsta', 'Instrumental', 'Jazzy Hip-Hop', 'Trap', 'Turntablism',
+    'Dancehall', 'Lovers Rock', 'Rocksteady', 'Roots Reggae', 'Bolero', 'Boogaloo', 'Cumbia', 'MPB', 'Salsa',
+    'Samba', 'Son', 'Tango',
+    # Folk, World, & Country; Classical; Pop; Stage & Screen; Non-Music
+    'African', 'Americana', 'Bluegrass', 'Celtic', 'Country', 'Fado', 'Flamenco', 'Folk', 'Gypsy Jazz',
+    'Highlife', 'Klezmer', 'Soukous', 'Baroque', 'Contemporary', 'Modern', 'Neo-Classical', 'Romantic',
+    'Ballad', 'Chanson', 'City Pop', 'Europop', 'Indie Pop', 'J-pop', 'K-pop', 'Soft Rock', 'Vocal',
+    'Musical', 'Score', 'Soundtrack', 'Field Recording', 'Poetry', 'Spoken Word',
+]
+# Other spellings of the names above
+GENRE_ALIASES = {
+    'Hip Hop': ['rap', 'hip-hop/rap', 'hip hop rap'],
+    'Rhythm & Blues': ['r&b', 'rnb', 'r and b'],
+    'Rock & Roll': ["rock 'n' roll", 'rock n roll', 'rocknroll'],
+    'Drum n Bass': ['drum & bass', 'dnb', 'd&b', "drum'n'bass"],
+    'Electronic': ['electronica', 'electronic music'],
+    'Folk, World, & Country': ['world', 'world music'],
+    'Folk': ['folk music'],
+    'Country': ['country music'],
+    'Classical': ['classical music'],
+    'Neo-Classical': ['modern classical', 'contemporary classical'],
+    'Avantgarde': ['avant-garde', 'avant garde'],
+    'Avant-garde Jazz': ['avant-jazz', 'avant jazz'],
+    'Free Improvisation': ['improvisation', 'improv', 'free improv', 'improvised music'],
+    'Fusion': ['jazz fusion'],
+    'Bop': ['bebop'],
+    'Spiritual Jazz': ['cosmic jazz'],
+    'Funk / Soul': ['funk soul'],
+    'Hardcore': ['hardcore punk'],
+    'Punk': ['punk rock'],
+    'Indie Rock': ['indie'],
+    'Alternative Rock': ['alternative', 'alt rock', 'alt-rock'],
+    'Heavy Metal': ['metal'],
+    'Doom Metal': ['doom'],
+    'Sludge Metal': ['sludge'],
+    'Shoegaze': ['shoegazer', 'shoegazing'],
+    'Prog Rock': ['prog', 'progressive rock'],
+    'Psychedelic Rock': ['psych', 'psych rock', 'psychedelic'],
+    'Synth-pop': ['synthpop', 'synth pop'],
+    'Field Recording': ['field recordings'],
+    'Soundtrack': ['ost', 'film music', 'film score', 'original soundtrack'],
+    'Musique Concrète': ['musique concrete'],
+}
+# Places, with other spellings; Bandcamp adds the band's location to its tags
+PLACES = {
+    'Washington DC': ['dc', 'washington, d.c.'],
+    'New York': ['nyc', 'new york city', 'ny'],
+    'Brooklyn': [],
+    'Los Angeles': ['la'],
+    'San Francisco': ['sf'],
+    'New Orleans': ['nola'],
+    'Chicago': [], 'Detroit': [], 'Seattle': [], 'Portland': [], 'Oakland': [], 'Austin': [], 'Boston': [],
+    'Philadelphia': ['philly'], 'Minneapolis': [], 'Atlanta': [], 'Nashville': [], 'Memphis': [],
+    'London': [], 'Manchester': [], 'Bristol': [], 'Leeds': [], 'Glasgow': [], 'Dublin': [], 'Berlin': [],
+    'Paris': [], 'Amsterdam': [], 'Brussels': [], 'Stockholm': [], 'Oslo': [], 'Copenhagen': [], 'Helsinki': [],
+    'Reykjavik': [], 'Tokyo': [], 'Osaka': [], 'Montreal': [], 'Toronto': [], 'Melbourne': [], 'Sydney': [],
+    'Lagos': [], 'Accra': [], 'Kingston': [], 'Havana': [], 'Mexico City': [], 'Rio de Janeiro': [],
+    'São Paulo': [],
+    'United States': ['us', 'usa', 'america'], 'United Kingdom': ['uk', 'england'], 'Scotland': [],
+    'Ireland': [], 'Canada': [], 'Germany': [], 'France': [], 'Italy': [], 'Spain': [], 'Portugal': [],
+    'Netherlands': [], 'Belgium': [], 'Sweden': [], 'Norway': [], 'Denmark': [], 'Finland': [], 'Iceland': [],
+    'Poland': [], 'Austria': [], 'Switzerland': [], 'Greece': [], 'Estonia': [], 'Latvia': [], 'Lithuania': [],
+    'Russia': [], 'Ukraine': [], 'Turkey': [], 'Israel': [], 'India': [], 'China': [], 'Japan': [],
+    'South Korea': ['korea'], 'Indonesia': [], 'Brazil': [], 'Mexico': [], 'Colombia': [], 'Peru': [],
+    'Chile': [], 'Argentina': [], 'Cuba': [], 'Jamaica': [], 'Nigeria': [], 'Ghana': [], 'Senegal': [],
+    'Ethiopia': [], 'Mali': [], 'Kenya': [], 'Egypt': [], 'Morocco': [], 'South Africa': [], 'Australia': [],
+    'New Zealand': [],
+}
+# Formats and other tags that say nothing about the music
+DROP = ['album', 'music', 'lp', 'ep', 'vinyl', 'cd', 'cassette', 'tape', 'digital', 'reissue', 'remastered',
+        'bandcamp']
+# A tag ending in one of these words names a label
+LABEL_WORDS = ('records', 'recordings')
+CAPITALIZE = re.compile(r'(^|[\s/-])([a-z])')
+
+
+def tag_key(tag):
+    """Lookup key of a tag: lowercase ASCII letters and digits, '&' read as 'and'."""
+    return normalize(tag).replace(' ', '')
+
+
+def _build_index():
+    index = {}
+
+    def add(kind, name, spellings):
+        for spelling in [name, *spellings]:
+            index.setdefault(tag_key(spelling), (kind, name))
+
+    for name in GENRES + STYLES:
+        add('genre', name, GENRE_ALIASES.get(name, []))
+    for name, spellings in GENRE_ALIASES.items():
+        add('genre', name, spellings)
+    for name, spellings in PLACES.items():
+        add('place', name, spellings)
+    for tag in DROP:
+        add('drop', tag, [])
+    return index
+
+
+INDEX = _build_index()
+
+
+def display_name(tag):
+    """A tag as written, or with its words capitalized when it is all lowercase."""
+    tag = ' '.join(tag.split())
+    if tag != tag.lower():
+        return tag
+    return CAPITALIZE.sub(lambda match: match.group(1) + match.group(2).upper(), tag)
+
+
+def _is_genre(key):
+    return INDEX.get(key, ('',))[0] == 'genre'
+
+
+def _add_label(hints, label):
+    """Make a label's name, and its name without "Records" unless that is a genre, mean the label."""
+    words = normalize(label).split()
+    hints.setdefault(''.join(words), ('label', label))
+    if len(words) > 1 and words[-1] in LABEL_WORDS and not _is_genre(''.join(words[:-1])):
+        hints.setdefault(''.join(words[:-1]), ('label', label))
+
+
+def entry_hints(labels=(), artist='', location=''):
+    """{key: (kind, name)} for one entry's own labels, artist and location, checked before INDEX."""
+    hints = {}
+    for label in labels:
+        if label:
+            _add_label(hints, label)
+    if artist and not _is_genre(tag_key(artist)):
+        hints.setdefault(tag_key(artist), ('drop', artist))
+    # "Washington, D.C." and "Brooklyn, New York" as a whole and by part
+    for part in [location, *location.split(',')] if location else []:
+        key = tag_key(part)
+        if key and key not in hints and not _is_genre(key):
+            known = INDEX.get(key)
+            hints[key] = known if known and known[0] == 'place' else ('place', part.strip())
+    return hints
+
+
+def canonical_tags(tags, labels=(), artist='', location=''):
+    """Sort raw genre tags into {'genres', 'labels', 'places', 'dropped', 'unknown'} lists.
+
+    labels, artist and location are what the source page says about the
+    entry; tags matching them are labels, dropped and places.
+    """
+    hints = entry_hints(labels, artist, location)
+    tags = [tag for tag in tags if isinstance(tag, str) and tag.strip()]
+    # A "Dischord Records" tag makes a plain "Dischord" tag a label too
+    for tag in tags:
+        words = normalize(tag).split()
+        if len(words) > 1 and words[-1] in LABEL_WORDS and not _is_genre(''.join(words)):
+            _add_label(hints, display_name(tag))
+
+    result = {'genres': [], 'labels': [], 'places': [], 'dropped': [], 'unknown': []}
+    seen = set()
+    for tag in tags:
+        key = tag_key(tag)
+        kind, name = hints.get(key) or INDEX.get(key) or ('unknown', display_name(tag))
+        if (kind, tag_key(name)) in seen:
+            continue
+        seen.add((kind, tag_key(name)))
+        if kind in ('genre', 'unknown'):
+            result['genres'].append(name)
+            if kind == 'unknown':
+                result['unknown'].append(name)
+        elif kind == 'label':
+            result['labels'].append(name)
+        elif kind == 'place':
+            result['places'].append(name)
+        else:
+            result['dropped'].append(tag)
+    return result
+
+
+def retag_entry(text):
+    """(updated index.md text, {field path: (old, new)}, canonical_tags() result) for an entry on disk.
+
+    Rewrites genres and album.genres to the canonical genres of album.genres
+    (or genres), and fills an empty album.label from a label tag. Only those
+    lines change; entries without genres come back unchanged.
+    """
+    frontmatter, _ = parse_entry(text)
+    album = frontmatter.get('album') if isinstance(frontmatter.get('album'), dict) else {}
+    raw = album.get('genres', frontmatter.get('genres'))
+    if not isinstance(raw, list):
+        return text, {}, None
+    labels = frontmatter.get('labels') if isinstance(frontmatter.get('labels'), list) else []
+    label = album.get('label') if isinstance(album.get('label'), str) else ''
+    artist = album.get('artist') if isinstance(album.get('artist'), str) else ''
+    result = canonical_tags(raw, [label, *labels], artist)
+
+    values = {('genres',): result['genres'], ('album', 'genres'): result['genres']}
+    if not label and result['labels'] and 'label' in album:
+        values[('album', 'label')] = result['labels'][0]
+        values[('labels',)] = [result['labels'][0], *(name for name in labels if name != result['labels'][0])]
+    changed = {}
+    updated = text
+    for path, value in values.items():
+        table = frontmatter
+        for name in path[:-1]:
+            table = table.get(name) or {}
+        if path[-1] not in table or table[path[-1]] == value:
+            continue
+        changed['.'.join(path)] = (table[path[-1]], value)
+        updated = set_value(updated, '.'.join(path[:-1]) or None, path[-1], value)
+
+    # set_value() works on the text; make sure it changed exactly what it should have
+    if changed:
+        check, _ = parse_entry(updated)
+        for path, (_, value) in changed.items():
+            table = check
+            for name in path.split('.'):
+                table = table[name]
+            if table != value:
+                raise ValueError(f"rewriting {path} went wrong, fix it by hand")
+    return updated, changed, result
@@ -0,0 +1,141 @@
+"""
+Per-stage timing for import runs.
+
+Code doing one distinct piece of work wraps it in `with span('stage'):`, and
+the process-wide `timings` recorder adds up count, total and slowest time per
+stage. The stages an import goes through are:
+
+    rate_limit_wait   waiting on a source's token bucket
+    http_fetch        metadata requests (Discogs API, Bandcamp album page)
+    entity_fetch      Discogs artist/label/master requests when enriching
+    dump_scan         reading releases from a Discogs data dump
+    parse             turning a response into collection data
+    cover_download    cover request and transfer, including cover_hash
+    cover_hash        SHA-256 comparison with the cover already on disk
+    render            building frontmatter and merging it into index.md
+    write             writing index.md and updating the search index
+    save              saving the manifest and search index at the end
+
+Times are wall-clock per span and summed over worker threads, so a stage can
+add up to more than the run took. With open_log(), every span is also
+written as a JSON line (stage, start offset, seconds, thread and any fields
+such as the URL) for a closer look at a slow run.
+
+profiled() runs a command under cProfile and tracemalloc, including the
+worker threads, and prints the hottest functions and largest allocations.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_PROFILE_PATH = '.cache/profile.pstats'
+
+
+class Timings:
+    """Thread-safe per-stage span totals, optionally logged as JSON lines."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.log = None
+        self.started = time.perf_counter()
+
+    def open_log(self, path):
+        self.log = open(path, 'w', encoding='utf-8')
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def record(self, stage, seconds, started=None, **fields):
+        with self.lock:
+            totals = self.stages.setdefault(stage, {'count': 0, 'total': 0.0, 'max': 0.0})
+            totals['count'] += 1
+            totals['total'] += seconds
+            totals['max'] = max(totals['max'], seconds)
+            if self.log is not None:
+                line = {
+                    'stage': stage,
+                    'start': round((started or time.perf_counter() - seconds) - self.started, 6),
+                    'seconds': round(seconds, 6),
+                    'thread': threading.current_thread().name,
+                    **fields,
+                }
+                self.log.write(json.dumps(line) + '\n')
+
+    @contextmanager
+    def span(self, stage, **fields):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, started, **fields)
+
+    def print_summary(self):
+        """Print a table of stages, slowest total first."""
+        if not self.stages:
+            return
+        print("\n  Time by stage (wall clock, summed over worker threads):")
+        print(f"  {'stage':<16} {'count':>6} {'total':>9} {'mean':>9} {'max':>9}")
+        for stage, totals in sorted(self.stages.items(), key=lambda item: -item[1]['total']):
+            mean = totals['total'] / totals['count']
+            print(f"  {stage:<16} {totals['count']:>6} {totals['total']:>8.2f}s "
+                  f"{mean * 1000:>7.1f}ms {totals['max'] * 1000:>7.1f}ms")
+
+
+timings = Timings()
+span = timings.span
+
+
+def profiled(run, path=DEFAULT_PROFILE_PATH, top=20):
+    """Run a command under cProfile and tracemalloc; returns its result.
+
+    The hottest functions (by own time, so time spent sleeping on the rate
+    limiter or waiting on sockets shows up as such) and the largest
+    allocations are printed, and the full profile is saved to path for
+    pstats/snakeviz.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+    from pathlib import Path
+
+    profilers = [cProfile.Profile()]
+    lock = threading.Lock()
+
+    def profile_thread(frame, event, arg):
+        # Runs once as the first profile event of each new thread, then hands over to cProfile
+        profiler = cProfile.Profile()
+        with lock:
+            profilers.append(profiler)
+        profiler.enable()
+
+    # From 3.12 cProfile uses sys.monitoring, which already sees every thread
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        threading.setprofile(profile_thread)
+    tracemalloc.start()
+    profilers[0].enable()
+    try:
+        return run()
+    finally:
+        profilers[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        stats = pstats.Stats(*profilers, stream=sys.stdout)
+        stats.dump_stats(path)
+        print("\nHottest functions (own time, summed over threads):")
+        stats.sort_stats('tottime').print_stats(top)
+        print(f"Largest allocations still held (peak traced memory {peak / 1024 / 1024:.1f}MB):")
+        for stat in snapshot.statistics('lineno')[:10]:
+            print(f"  {stat.size / 1024:>9.1f}KB  {stat.count:>7} blocks  {stat.traceback[0]}")
+        print(f"\n✓ Full profile saved to {path} (open with `python -m pstats {path}` or snakeviz)")
@@ -0,0 +1,148 @@
+"""
+Tracklist layout: grouping tracks into the sides/discs shown on album pages.
+
+Tracks are dicts with position, title and duration (seconds or None); Discogs
+headings are included as {'heading': True, 'title': ...}. Each position is
+classified with POSITION_GRAMMAR in one pass:
+
+    A1, B2a, AA, H4   vinyl/cassette side - a new side per letter (any letter)
+    1-3, CD2-4, 2.05  disc and track      - a new group per disc
+    1, 12, 3a         plain running order
+    anything else     stays with the group before it
+
+Consecutive tracks of the same side/disc form a group, and a heading always
+starts a new group named after it. Plain running orders (every Bandcamp
+album, single-disc CDs) are laid out like a vinyl pressing: when durations
+are known, the tracks are cut into an even number of sides of at most
+SIDE_CAPACITY seconds each, balanced by running time; without durations,
+lists longer than 10 tracks are split in half.
+
+Everything is a single linear pass plus a linear split, so 100+ track
+compilations cost next to nothing.
+"""
+
+import re
+
+# 12" LP at 33 1/3 rpm, at a cut level that still sounds good
+SIDE_CAPACITY = 22 * 60
+SPLIT_WITHOUT_DURATIONS = 10
+
+# (pattern, kind) - first match wins; group 1 is the side letter(s) or disc number
+POSITION_GRAMMAR = [
+    (re.compile(r'^(?:(?:CD|DVD|BD|SACD|LP|MC|DISC|DISK)\s*)?(\d+)\s*[-.]\s*\d+[A-Z]?$'), 'disc'),
+    (re.compile(r'^(([A-Z])\2?)(?:[-.]?\d+[A-Z]?)?$'), 'side'),
+    (re.compile(r'^()\d+[A-Z]?$'), 'number'),
+]
+GROUP_NAMES = {
+    'side': 'Side {}',
+    'disc': 'Disc {}',
+}
+DURATION = re.compile(r'^(?:(\d+):)?(\d+):(\d{1,2})$')
+
+
+def parse_duration(value):
+    """Seconds from a Discogs "4:35"/"1:02:03" string or a Bandcamp float, or None."""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = DURATION.match((value or '').strip())
+    if not match:
+        return None
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return float(hours * 3600 + minutes * 60 + seconds) or None
+
+
+def classify(position):
+    """(kind, side letter or disc number) for a position, or None if it doesn't parse."""
+    position = (position or '').strip().upper()
+    for pattern, kind in POSITION_GRAMMAR:
+        match = pattern.match(position)
+        if match:
+            return kind, match.group(1).lstrip('0') if kind == 'disc' else match.group(1)
+    return None
+
+
+def side_name(n):
+    """Vinyl side name for the n-th (0-based) side cut from a running order."""
+    return GROUP_NAMES['side'].format(chr(ord('A') + n) if n < 26 else n + 1)
+
+
+def track_label(track):
+    """Rendered line for a track, e.g. "A1. Title"."""
+    position = (track.get('position') or '').strip()
+    return f"{position}. {track['title']}" if position else track['title']
+
+
+def group_tracks(tracks):
+    """Consecutive runs of tracks on the same side/disc: [{'key', 'heading', 'tracks'}]."""
+    groups = []
+    heading = None
+    for track in tracks:
+        if track.get('heading'):
+            heading = track['title']
+            continue
+        key = classify(track.get('position'))
+        current = groups[-1] if groups else None
+        if key is None and current is not None and heading is None:
+            # Unparseable positions ("Video", "") stay with the tracks before them
+            key = current['key']
+        if current is None or heading is not None or key != current['key']:
+            current = {'key': key or ('number', ''), 'heading': heading, 'tracks': []}
+            groups.append(current)
+            heading = None
+        current['tracks'].append(track)
+    return groups
+
+
+def split_by_capacity(tracks):
+    """Cut a running order into sides: lists of tracks."""
+    durations = [parse_duration(track.get('duration')) for track in tracks]
+    if not all(durations):
+        if len(tracks) > SPLIT_WITHOUT_DURATIONS:
+            mid = len(tracks) // 2
+            return [tracks[:mid], tracks[mid:]]
+        return [tracks]
+
+    total = sum(durations)
+    sides = -(-total // SIDE_CAPACITY)
+    if sides <= 1:
+        return [tracks]
+    # Records have two sides
+    sides = int(min(sides + sides % 2, len(tracks)))
+
+    # Cut at the track boundary closest to each k/sides share of the running time
+    cuts = []
+    elapsed = 0.0
+    for i, duration in enumerate(durations):
+        if len(cuts) == sides - 1:
+            break
+        target = total * (len(cuts) + 1) / sides
+        if elapsed + duration >= target:
+            # Before or after this track, whichever lands closer (never an empty side)
+            closer_before = target - elapsed < elapsed + duration - target
+            cuts.append(i if closer_before and i > (cuts[-1] if cuts else 0) else i + 1)
+        elapsed += duration
+    bounds = [0] + cuts + [len(tracks)]
+    return [tracks[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def layout_sides(tracks):
+    """Group a tracklist into [{'side': name, 'tracks': [lines]}] for the entry frontmatter."""
+    groups = group_tracks(tracks)
+    # A single disc is just a running order
+    if len(groups) == 1 and groups[0]['key'][0] == 'disc' and not groups[0]['heading']:
+        groups[0]['key'] = ('number', '')
+
+    sides = []
+    cut_sides = 0
+    for group in groups:
+        kind, value = group['key']
+        if kind != 'number':
+            name = group['heading'] or GROUP_NAMES[kind].format(value)
+            sides.append({'side': name, 'tracks': [track_label(track) for track in group['tracks']]})
+        elif group['heading']:
+            sides.append({'side': group['heading'], 'tracks': [track_label(track) for track in group['tracks']]})
+        else:
+            for side_tracks in split_by_capacity(group['tracks']):
+                sides.append({'side': side_name(cut_sides), 'tracks': [track_label(track) for track in side_tracks]})
+                cut_sides += 1
+    return sides
@@ -0,0 +1,277 @@
+"""
+Pre-build validation of content/collection.
+
+Checks every <slug>/index.md against the frontmatter the importers write
+(album.artist, releaseYear, tracklist sides, credits sections, link URLs),
+confirms a cover.* exists and is a complete image, and reports entries whose
+artist and title map to the same slug. Results are cached in the site's
+.cache/validate.json by file size and mtime, so re-checking an unchanged
+collection only stats the files; changed entries are checked in a process
+pool when there are enough of them to be worth it.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from .frontmatter import parse_entry
+from .index import site_root
+from .slugs import entry_slug
+
+# Bump when the checks change so cached results are discarded
+VALIDATOR_VERSION = 3
+# Relative to the site root
+DEFAULT_CACHE_PATH = '.cache/validate.json'
+# Below this many changed entries, starting worker processes costs more than it saves
+POOL_THRESHOLD = 200
+IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': 'jpeg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'RIFF': 'webp',
+}
+
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def check_image(path):
+    """Problem with a cover file, or None if it looks like a complete image."""
+    size = path.stat().st_size
+    if size == 0:
+        return f"{path.name} is empty"
+    with open(path, 'rb') as f:
+        head = f.read(16)
+        f.seek(max(0, size - 16))
+        tail = f.read()
+    kind = next((kind for signature, kind in IMAGE_SIGNATURES.items() if head.startswith(signature)), None)
+    if kind is None:
+        return f"{path.name} is not a JPEG, PNG or WebP image"
+    # Truncated downloads lose the end-of-image marker
+    if kind == 'jpeg' and b'\xff\xd9' not in tail:
+        return f"{path.name} is truncated (no JPEG end marker)"
+    if kind == 'png' and b'IEND' not in tail:
+        return f"{path.name} is truncated (no PNG IEND chunk)"
+    if kind == 'webp' and (head[8:12] != b'WEBP' or int.from_bytes(head[4:8], 'little') + 8 != size):
+        return f"{path.name} is truncated or not a WebP image"
+    return None
+
+
+def check_frontmatter(frontmatter):
+    """Schema problems in a parsed entry."""
+    problems = []
+    if not isinstance(frontmatter.get('title'), str) or not frontmatter['title'].strip():
+        problems.append('title is missing or empty')
+    if 'date' in frontmatter and not isinstance(frontmatter['date'], (date, datetime)):
+        problems.append('date is not a TOML date')
+    for key in ('genres', 'labels', 'decades', 'artists'):
+        if key in frontmatter and not _is_str_list(frontmatter[key]):
+            problems.append(f"{key} is not a list of strings")
+
+    album = frontmatter.get('album')
+    if not isinstance(album, dict):
+        problems.append('[album] table is missing')
+        return problems
+
+    if not isinstance(album.get('artist'), str) or not album['artist'].strip():
+        problems.append('album.artist is missing or empty')
+    for key in ('releaseYear', 'pressingYear'):
+        if key == 'pressingYear' and key not in album:
+            continue
+        year = album.get(key)
+        if isinstance(year, bool) or not isinstance(year, int) or not 1000 <= year <= datetime.now().year + 1:
+            problems.append(f"album.{key} is not a plausible year: {year!r}")
+    for key in ('label', 'catalogNumber', 'artistProfile'):
+        if key in album and not isinstance(album[key], str):
+            problems.append(f"album.{key} is not a string")
+    if 'genres' in album and not _is_str_list(album['genres']):
+        problems.append('album.genres is not a list of strings')
+
+    for name, url in (album.get('links') or {}).items():
+        if not isinstance(url, str):
+            problems.append(f"album.links.{name} is not a string")
+        elif url:
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+                problems.append(f"album.links.{name} is not an http(s) URL: {url}")
+
+    tracklist = album.get('tracklist', [])
+    if not isinstance(tracklist, list):
+        problems.append('album.tracklist is not an array of tables')
+        tracklist = []
+    for n, side in enumerate(tracklist, 1):
+        if not isinstance(side, dict):
+            problems.append(f"album.tracklist #{n} is not a table")
+            continue
+        if not isinstance(side.get('side'), str) or not side['side'].strip():
+            problems.append(f"album.tracklist #{n} has no side name")
+        tracks = side.get('tracks')
+        if not _is_str_list(tracks) or not tracks or not all(track.strip() for track in tracks):
+            problems.append(f"album.tracklist #{n} ({side.get('side', '?')}) has no tracks or empty track titles")
+
+    credits = album.get('credits', [])
+    if not isinstance(credits, list):
+        problems.append('album.credits is not an array of tables')
+        credits = []
+    for n, section in enumerate(credits, 1):
+        if not isinstance(section, dict):
+            problems.append(f"album.credits #{n} is not a table")
+            continue
+        if 'section' in section and not isinstance(section['section'], str):
+            problems.append(f"album.credits #{n} section name is not a string")
+        if not _is_str_list(section.get('people')):
+            problems.append(f"album.credits #{n} has no people list")
+
+    cover = album.get('cover')
+    if cover is not None:
+        for key in ('width', 'height'):
+            if not isinstance(cover.get(key), int) or cover[key] <= 0:
+                problems.append(f"album.cover.{key} is not a positive integer")
+        if 'from' in cover and not isinstance(cover['from'], str):
+            problems.append('album.cover.from is not a string')
+    return problems
+
+
+def duplicate_key(frontmatter):
+    """The slug the importers would give an entry's artist and title."""
+    album = frontmatter.get('album') or {}
+    return entry_slug({'artist': album.get('artist', ''), 'title': frontmatter.get('title', '')})
+
+
+def cover_files(entry_dir):
+    """cover.* images in an entry, ignoring partial downloads."""
+    names = sorted(
+        name for name in os.listdir(entry_dir)
+        if name.startswith('cover.') and not name.endswith(('.part', '.validator'))
+    )
+    return [Path(entry_dir) / name for name in names]
+
+
+def shared_from(frontmatter):
+    """Slug of the entry whose identical cover an entry shows instead of its own, or None."""
+    album = frontmatter.get('album')
+    cover = album.get('cover') if isinstance(album, dict) else None
+    shared = cover.get('from') if isinstance(cover, dict) else None
+    return shared if isinstance(shared, str) else None
+
+
+def check_entry(entry_dir):
+    """Validate one entry directory; returns {'problems': [...], 'key': duplicate key}."""
+    entry_dir = Path(entry_dir)
+    problems = []
+    key = None
+    shared = None
+    try:
+        with open(entry_dir / 'index.md', encoding='utf-8') as f:
+            frontmatter, _ = parse_entry(f.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        problems.append(f"frontmatter does not parse: {e}")
+    else:
+        problems.extend(check_frontmatter(frontmatter))
+        if isinstance(frontmatter.get('album'), dict):
+            key = duplicate_key(frontmatter)
+        shared = shared_from(frontmatter)
+
+    covers = cover_files(entry_dir)
+    # Entries deduplicated by scripts/check_covers.py show another entry's identical cover
+    if not covers and shared:
+        if not (entry_dir.parent / shared).is_dir() or not cover_files(entry_dir.parent / shared):
+            problems.append(f"album.cover.from names {shared}, which has no cover.* image")
+    elif not covers:
+        problems.append('no cover.* image')
+    for cover in covers:
+        problem = check_image(cover)
+        if problem:
+            problems.append(problem)
+    return {'problems': problems, 'key': key}
+
+
+def file_signature(entry_dir):
+    """Size and mtime of index.md and cover.* - cheap to stat, changes whenever they are rewritten.
+
+    Returns None when the directory has no index.md.
+    """
+    signature = []
+    for path in [entry_dir / 'index.md', *cover_files(entry_dir)]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def cache_path_for(content_dir):
+    return site_root(content_dir) / DEFAULT_CACHE_PATH
+
+
+def load_cache(cache_path, content_dir):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('version') != VALIDATOR_VERSION or cache.get('content_dir') != str(Path(content_dir).resolve()):
+        return {}
+    return cache.get('entries', {})
+
+
+def save_cache(cache_path, content_dir, entries):
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        cache = {'version': VALIDATOR_VERSION, 'content_dir': str(Path(content_dir).resolve()), 'entries': entries}
+        f.write(json.dumps(cache, separators=(',', ':')))
+    os.replace(tmp_path, cache_path)
+
+
+def validate_collection(content_dir='content/collection', cache_path=None, workers=None):
+    """Validate every entry; returns ({slug: [problems]}, number of entries checked afresh).
+
+    Without a cache_path (see cache_path_for()) every entry is checked.
+    """
+    cache = load_cache(cache_path, content_dir) if cache_path else {}
+    names = sorted(entry.name for entry in os.scandir(content_dir) if entry.is_dir())
+    entry_dirs = [Path(content_dir, name) for name in names]
+
+    results = {}
+    stale = []
+    for entry_dir in entry_dirs:
+        slug = entry_dir.name
+        signature = file_signature(entry_dir)
+        if signature is None:
+            continue
+        cached = cache.get(slug)
+        if cached and cached['signature'] == signature:
+            results[slug] = cached
+        else:
+            stale.append((entry_dir, signature))
+
+    if len(stale) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            checked = pool.map(check_entry, [entry_dir for entry_dir, _ in stale], chunksize=64)
+            checked = list(checked)
+    else:
+        checked = [check_entry(entry_dir) for entry_dir, _ in stale]
+    for (entry_dir, signature), result in zip(stale, checked):
+        results[entry_dir.name] = dict(result, signature=signature)
+
+    if cache_path and (stale or len(results) != len(cache)):
+        save_cache(cache_path, content_dir, results)
+
+    problems = {slug: list(result['problems']) for slug, result in results.items() if result['problems']}
+    by_key = {}
+    for slug, result in results.items():
+        if result['key']:
+            by_key.setdefault(result['key'], []).append(slug)
+    for key, slugs in by_key.items():
+        if len(slugs) > 1:
+            for slug in slugs:
+                others = [other for other in slugs if other != slug]
+                listed = ', '.join(others[:3]) + (f" and {len(others) - 3} more" if len(others) > 3 else '')
+                problems.setdefault(slug, []).append(f"same artist and title as {listed}")
+    return problems, len(stale)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "requests",
+#     "beautifulsoup4",
+#     "python3-discogs-client",
+#     "tomli; python_version < '3.11'",
+# ]
+# ///
+"""
+Rebuild collection entries whose source data or template version changed.
+
+Same as `uv run scripts/collection.py regenerate`.
+
+Usage:
+    uv run scripts/regenerate_collection.py
+    uv run scripts/regenerate_collection.py --dry-run
+    uv run scripts/regenerate_collection.py --refresh   # refetch sources first
+"""
+
+import sys
+
+from praesens.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(['regenerate', *sys.argv[1:]]))
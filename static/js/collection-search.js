@@ -0,0 +1,92 @@
+// Client-side collection search.
+// Loads the index written by scripts/collection_index.py on first use and
+// filters it in memory; every query word must appear in the artist, title,
+// year, label, genres or track titles of an album.
+(function () {
+  var form = document.querySelector('[data-collection-search]');
+  if (!form) return;
+
+  var input = form.querySelector('input');
+  var results = document.querySelector('[data-collection-results]');
+  var grid = document.querySelector('.album-grid');
+  var pagination = document.querySelector('[data-collection-pagination]');
+  var baseURL = form.getAttribute('data-base-url');
+  var maxResults = 50;
+  var albums = null;
+  var loading = null;
+
+  function fold(text) {
+    return String(text).normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+  }
+
+  function load() {
+    if (!loading) {
+      loading = fetch(form.getAttribute('data-index-url'))
+        .then(function (response) {
+          if (!response.ok) throw new Error('Collection index: HTTP ' + response.status);
+          return response.json();
+        })
+        .then(function (index) {
+          var fields = index.fields;
+          albums = index.albums.map(function (row) {
+            var album = {};
+            fields.forEach(function (field, i) { album[field] = row[i]; });
+            album.haystack = fold([
+              album.artist, album.title, album.year, album.label,
+              album.genres.join(' '), album.tracks.join(' ')
+            ].join(' '));
+            return album;
+          });
+        })
+        .catch(function (error) {
+          // Let the next keystroke try again rather than keep the failed request
+          loading = null;
+          throw error;
+        });
+    }
+    return loading;
+  }
+
+  function render(query) {
+    var words = fold(query).split(/\s+/).filter(Boolean);
+    var searching = words.length > 0;
+    grid.hidden = searching;
+    if (pagination) pagination.hidden = searching;
+    results.hidden = !searching;
+    if (!searching) return;
+
+    var matches = [];
+    for (var i = 0; i < albums.length && matches.length < maxResults; i++) {
+      var album = albums[i];
+      if (words.every(function (word) { return album.haystack.indexOf(word) !== -1; })) {
+        matches.push(album);
+      }
+    }
+
+    results.innerHTML = '';
+    if (!matches.length) {
+      var empty = document.createElement('p');
+      empty.className = 'collection-search-empty';
+      empty.textContent = 'No albums found.';
+      results.appendChild(empty);
+      return;
+    }
+    var list = document.createElement('ul');
+    matches.forEach(function (album) {
+      var item = document.createElement('li');
+      var link = document.createElement('a');
+      link.href = baseURL + album.slug + '/';
+      link.textContent = album.artist + ' – ' + album.title + (album.year ? ', ' + album.year : '');
+      item.appendChild(link);
+      list.appendChild(item);
+    });
+    results.appendChild(list);
+  }
+
+  // Preload on focus; a failure there is retried (and reported) on input
+  input.addEventListener('focus', function () { load().catch(function () {}); }, { once: true });
+  input.addEventListener('input', function () {
+    load().then(function () { render(input.value); }, function (error) { console.error(error); });
+  });
+  form.addEventListener('submit', function (event) { event.preventDefault(); });
+})();